@@ -3,7 +3,11 @@ Aplicação Flask - Incident Atlas
 Arquitetura Simplificada
 """
 from flask import Flask, g
-from app.database import configurar_banco_dados, obter_bd
+from app.database import configurar_banco_dados, obter_bd, obter_pool
+from app.cache import CacheRespostas, verificar_requisicao_condicional, aplicar_cabecalhos_cache
+from app.cubo import obter_cubo
+from app.compressao import configurar_compressao
+from app.busca import obter_indice_busca
 
 
 def criar_app():
@@ -16,13 +20,51 @@ def criar_app():
     
     # Configurações
     app.config['DATABASE'] = 'acidentes.duckdb'
+    app.config['ARMAZENAMENTO'] = 'duckdb'            # 'duckdb' (tabela) ou 'parquet' (partições Hive)
+    app.config['PASTA_PARQUET'] = 'data/acidentes_parquet'
     app.config['DEBUG'] = True
     app.config['HOST'] = '0.0.0.0'
     app.config['PORT'] = 5001
+    app.config['POOL_TAMANHO'] = 8                  # Cursores simultâneos
+    app.config['POOL_TIMEOUT'] = 30.0               # Espera máxima por um cursor (s)
+    app.config['POOL_INTERVALO_VERIFICACAO'] = 60.0 # Health check dos cursores (s)
+    app.config['CACHE_HABILITADO'] = True
+    app.config['CACHE_MAX_BYTES'] = 64 * 1024 * 1024  # Limite do cache de respostas
+    app.config['CACHE_TTL'] = 3600                    # Validade das entradas (s)
+    app.config['ETAG_HABILITADO'] = True              # GET condicional (ETag / Last-Modified)
+    app.config['CUBO_HABILITADO'] = True              # Cubo OLAP para gráficos
+    app.config['BUSCA_INDEXADA'] = True               # Índice invertido para a busca textual
+    app.config['COMPRESSAO_HABILITADA'] = True        # gzip/brotli nas respostas da API
+    app.config['COMPRESSAO_MIN_BYTES'] = 1024         # Respostas menores vão sem compressão
+    app.config['COMPRESSAO_NIVEL_GZIP'] = 6
+    app.config['COMPRESSAO_NIVEL_BROTLI'] = 5
     
     # Configurar banco de dados
     configurar_banco_dados(app)
     
+    # Cache de respostas da API
+    app.extensions['cache_respostas'] = CacheRespostas(
+        max_bytes=app.config['CACHE_MAX_BYTES'],
+        ttl=app.config['CACHE_TTL']
+    )
+    
+    # Construir o cubo OLAP e o índice de busca na inicialização
+    # (ambos são atualizados a cada nova versão dos dados)
+    pool = obter_pool(app)
+    cursor = pool.retirar()
+    try:
+        obter_cubo(app, cursor)
+        obter_indice_busca(app, cursor)
+    finally:
+        pool.devolver(cursor)
+    
+    # GET condicional: responde 304 antes de retirar uma conexão do pool
+    app.before_request(verificar_requisicao_condicional)
+    app.after_request(aplicar_cabecalhos_cache)
+    
+    # Compressão das respostas e arquivos estáticos versionados (/assets)
+    configurar_compressao(app)
+    
     # Registrar g.bd para uso nas rotas
     @app.before_request
     def antes_requisicao():
@@ -0,0 +1,266 @@
+"""
+Backups deduplicados por conteúdo - Versões de CSVs e do banco sem cópias inteiras
+
+Os arquivos são divididos em blocos definidos pelo conteúdo (CDC com gear
+hash): um corte acontece onde o hash rolante dos últimos 32 bytes tem os
+bits da máscara zerados, então uma alteração só muda os blocos em volta
+dela e os demais continuam com o mesmo conteúdo. Cada bloco é gravado uma
+única vez, comprimido com zlib e endereçado pelo seu sha256:
+
+    data/backups/objetos/ab/abcdef...   blocos
+    data/backups/versoes/<versao>.json  manifesto: arquivo de origem, rótulo,
+                                        tamanho, sha256 e a lista de blocos
+
+Guardar uma versão custa ler o arquivo e gravar só os blocos novos; uma
+versão idêntica à anterior do mesmo arquivo não gera nada. podar aplica a
+política de retenção e apaga os blocos que nenhuma versão usa mais.
+"""
+import glob
+import hashlib
+import json
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+PASTA_BACKUPS = 'data/backups'
+
+BLOCO_MINIMO = 2 * 1024
+BLOCO_MAXIMO = 64 * 1024
+BITS_MASCARA = 13            # Corte a cada ~8 KB depois do mínimo
+TAMANHO_LEITURA = 4 * 1024 * 1024
+
+# Política de retenção padrão: as últimas versões de cada arquivo e tudo
+# o que tiver menos de DIAS_RETENCAO dias
+VERSOES_RETIDAS = 10
+DIAS_RETENCAO = 30
+
+# Tabela do gear hash: um inteiro de 32 bits por byte, derivado do sha256
+# (fixa entre versões do numpy, para os cortes nunca mudarem)
+_GEAR = np.array([int.from_bytes(hashlib.sha256(bytes([byte])).digest()[:4], 'little')
+                  for byte in range(256)], dtype=np.uint32)
+_MASCARA = np.uint32(((1 << BITS_MASCARA) - 1) << (32 - BITS_MASCARA))
+
+
+# ==================== BLOCOS ====================
+
+def _candidatos_corte(dados):
+    """
+    Posições (após o byte) em que o gear hash permite um corte
+
+    O gear hash h = (h << 1) + GEAR[byte] em 32 bits é a soma de
+    GEAR[b(i-k)] << k para k < 32. Somas de janelas que dobram de tamanho
+    (2, 4, 8, 16 e 32 bytes) calculam todas as posições em 5 passes
+    vetorizados, em vez de um laço por byte.
+    """
+    h = _GEAR[np.frombuffer(dados, dtype=np.uint8)]
+    passo = 1
+    while passo < 32:
+        h[passo:] += h[:-passo] << np.uint32(passo)
+        passo *= 2
+    return np.flatnonzero((h & _MASCARA) == 0) + 1
+
+
+def fatiar(arquivo, minimo=BLOCO_MINIMO, maximo=BLOCO_MAXIMO, leitura=TAMANHO_LEITURA):
+    """Gera os blocos de um arquivo binário aberto, lendo `leitura` bytes por vez"""
+    pendente = b''
+    while True:
+        lido = arquivo.read(leitura)
+        dados = pendente + lido
+        if not dados:
+            return
+        cortes = _candidatos_corte(dados)
+
+        inicio = 0
+        while inicio < len(dados):
+            posicao = np.searchsorted(cortes, inicio + minimo)
+            corte = int(cortes[posicao]) if posicao < len(cortes) else None
+            if corte is None or corte - inicio > maximo:
+                corte = inicio + maximo
+                if corte > len(dados):
+                    if lido:
+                        break  # Um corte ainda pode aparecer na próxima leitura
+                    corte = len(dados)
+            yield dados[inicio:corte]
+            inicio = corte
+        pendente = dados[inicio:]
+
+
+# ==================== ARMAZÉM ====================
+
+def _gravar_atomico(caminho, conteudo, sincronizar=True):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f'{caminho}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+        if sincronizar:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+class ArmazemBackups:
+    """
+    Versões de arquivos guardadas em blocos deduplicados
+
+    Blocos e manifestos são gravados com arquivo temporário + os.replace, e
+    o manifesto só depois dos blocos (um único os.sync para todos os blocos
+    novos, em vez de um fsync por bloco): uma interrupção deixa no máximo
+    blocos órfãos, apagados no próximo podar.
+    """
+
+    def __init__(self, pasta=PASTA_BACKUPS):
+        self.pasta = pasta
+
+    def _objeto(self, chave):
+        return os.path.join(self.pasta, 'objetos', chave[:2], chave)
+
+    def _manifesto(self, versao):
+        return os.path.join(self.pasta, 'versoes', f'{versao}.json')
+
+    def guardar(self, caminho, rotulo=None, origem=None):
+        """
+        Guarda uma versão do arquivo e retorna o manifesto
+
+        `origem` é o nome sob o qual as versões são agrupadas (por padrão o
+        próprio caminho); o banco, por exemplo, é guardado como
+        acidentes.duckdb qualquer que seja o snapshot ativo.
+
+        O manifesto ganha 'blocosNovos' e 'bytesGravados' (comprimidos) desta
+        chamada. Se o arquivo não mudou desde a última versão, ela é
+        retornada com os dois zerados.
+        """
+        origem = os.path.normpath(origem or caminho)
+        blocos, novos, gravados = [], 0, 0
+        sha_arquivo = hashlib.sha256()
+
+        with open(caminho, 'rb') as f:
+            for bloco in fatiar(f):
+                sha_arquivo.update(bloco)
+                chave = hashlib.sha256(bloco).hexdigest()
+                blocos.append([chave, len(bloco)])
+                objeto = self._objeto(chave)
+                if not os.path.exists(objeto):
+                    comprimido = zlib.compress(bloco, 6)
+                    _gravar_atomico(objeto, comprimido, sincronizar=False)
+                    novos += 1
+                    gravados += len(comprimido)
+
+        anteriores = self.listar(origem)
+        if anteriores and anteriores[0]['sha256'] == sha_arquivo.hexdigest():
+            return {**anteriores[0], 'blocosNovos': 0, 'bytesGravados': 0}
+
+        if novos and hasattr(os, 'sync'):
+            os.sync()
+        manifesto = {
+            'versao': f'{time.strftime("%Y%m%d%H%M%S")}-{uuid.uuid4().hex[:8]}',
+            'origem': origem,
+            'rotulo': rotulo,
+            'criadoEm': datetime.now().isoformat(timespec='microseconds'),
+            'tamanho': sum(tamanho for _, tamanho in blocos),
+            'sha256': sha_arquivo.hexdigest(),
+            'blocos': blocos,
+        }
+        _gravar_atomico(self._manifesto(manifesto['versao']),
+                        json.dumps(manifesto, ensure_ascii=False).encode('utf-8'))
+        return {**manifesto, 'blocosNovos': novos, 'bytesGravados': gravados}
+
+    def listar(self, origem=None):
+        """Manifestos guardados (todos ou de um arquivo), do mais recente ao mais antigo"""
+        manifestos = []
+        for caminho in glob.glob(os.path.join(self.pasta, 'versoes', '*.json')):
+            with open(caminho, encoding='utf-8') as f:
+                manifesto = json.load(f)
+            if origem is None or manifesto['origem'] == os.path.normpath(origem):
+                manifestos.append(manifesto)
+        return sorted(manifestos, key=lambda manifesto: manifesto['criadoEm'], reverse=True)
+
+    def obter(self, versao):
+        """Manifesto de uma versão (aceita um prefixo único do identificador)"""
+        encontrados = [manifesto for manifesto in self.listar() if manifesto['versao'].startswith(versao)]
+        if len(encontrados) != 1:
+            raise KeyError(f'{len(encontrados)} versões correspondem a {versao!r}')
+        return encontrados[0]
+
+    def restaurar(self, versao, destino=None):
+        """
+        Reconstrói uma versão em `destino` (por padrão, o arquivo de origem)
+
+        O arquivo é montado em um temporário, conferido pelo sha256 e só
+        então colocado no lugar. Retorna o caminho restaurado.
+        """
+        manifesto = self.obter(versao)
+        destino = destino or manifesto['origem']
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        temporario = f'{destino}.{uuid.uuid4().hex[:8]}.tmp'
+
+        sha_arquivo = hashlib.sha256()
+        try:
+            with open(temporario, 'wb') as saida:
+                for chave, tamanho in manifesto['blocos']:
+                    with open(self._objeto(chave), 'rb') as f:
+                        bloco = zlib.decompress(f.read())
+                    if len(bloco) != tamanho:
+                        raise ValueError(f'Bloco {chave} corrompido')
+                    sha_arquivo.update(bloco)
+                    saida.write(bloco)
+                saida.flush()
+                os.fsync(saida.fileno())
+            if sha_arquivo.hexdigest() != manifesto['sha256']:
+                raise ValueError(f'Versão {manifesto["versao"]} não confere com o sha256 guardado')
+            os.replace(temporario, destino)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return destino
+
+    def podar(self, manter=VERSOES_RETIDAS, dias=DIAS_RETENCAO):
+        """
+        Aplica a política de retenção e apaga os blocos sem uso
+
+        Uma versão fica se está entre as `manter` mais recentes do seu
+        arquivo ou tem menos de `dias` dias (dias=None desliga o critério
+        de idade). Não deve rodar ao mesmo tempo que um guardar, que pode
+        ter gravado blocos de um manifesto ainda não escrito.
+        """
+        limite = datetime.now() - timedelta(days=dias) if dias is not None else None
+        por_origem = {}
+        for manifesto in self.listar():
+            por_origem.setdefault(manifesto['origem'], []).append(manifesto)
+
+        versoes_removidas = 0
+        em_uso = set()
+        for manifestos in por_origem.values():
+            for posicao, manifesto in enumerate(manifestos):
+                recente = limite is not None and datetime.fromisoformat(manifesto['criadoEm']) >= limite
+                if posicao < manter or recente:
+                    em_uso.update(chave for chave, _ in manifesto['blocos'])
+                else:
+                    os.remove(self._manifesto(manifesto['versao']))
+                    versoes_removidas += 1
+
+        objetos_removidos = bytes_liberados = 0
+        for objeto in glob.glob(os.path.join(self.pasta, 'objetos', '*', '*')):
+            if os.path.basename(objeto) not in em_uso:
+                bytes_liberados += os.path.getsize(objeto)
+                os.remove(objeto)
+                objetos_removidos += 1
+
+        return {'versoes': versoes_removidas, 'objetos': objetos_removidos, 'bytes': bytes_liberados}
+
+    def ocupacao(self):
+        """Bytes originais de todas as versões e bytes realmente ocupados pelos blocos"""
+        originais = sum(manifesto['tamanho'] for manifesto in self.listar())
+        ocupados = sum(os.path.getsize(objeto)
+                       for objeto in glob.glob(os.path.join(self.pasta, 'objetos', '*', '*')))
+        return {'originais': originais, 'ocupados': ocupados}
+
+
+def guardar_backup(caminho, rotulo=None, origem=None, pasta=PASTA_BACKUPS):
+    """Atalho dos scripts: guarda uma versão do arquivo no armazém padrão"""
+    return ArmazemBackups(pasta).guardar(caminho, rotulo, origem)
@@ -0,0 +1,315 @@
+"""
+Busca textual - Índice invertido com ranking BM25 para os acidentes
+
+Substitui o ILIKE '%termo%' em seis colunas por um índice em memória:
+o texto é normalizado (minúsculas, sem acentos), reduzido a radicais em
+português e indexado por acidente. A consulta exige todos os termos,
+aceita prefixo no último termo (busca enquanto o usuário digita) e
+devolve os ids com sua pontuação BM25.
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from app.database import versao_do_cursor
+from app.versao_dados import ler_versao_dados
+
+
+# Colunas indexadas (as mesmas da busca por ILIKE)
+COLUNAS_BUSCA = ['Pais', 'Estado', 'Descricao', 'Nivel_Acidente',
+                 'Risco_Critico', 'Setor_Industrial']
+
+# Palavras muito frequentes que não são indexadas (já sem acentos)
+PALAVRAS_VAZIAS = frozenset("""
+    a ao aos as com da das de do dos e em entre foi na nas no nos o os ou
+    para pela pelas pelo pelos por que se sem seu sua seus suas um uma
+    uns umas ele ela eles elas lhe isso este esta esse essa
+""".split())
+
+
+# ==================== NORMALIZAÇÃO E RADICAIS ====================
+
+def normalizar_texto(texto):
+    """Converte para minúsculas e remove acentos: 'Mão Esquerda' -> 'mao esquerda'"""
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Quebra o texto normalizado em palavras alfanuméricas"""
+    return re.findall(r'[a-z0-9]+', normalizar_texto(texto))
+
+
+# Regras de redução (sufixo, substituição, tamanho mínimo do radical),
+# inspiradas no RSLP e aplicadas sobre o texto sem acentos
+_REGRAS_PLURAL = [('oes', 'ao', 1), ('aes', 'ao', 1), ('ais', 'al', 1), ('eis', 'el', 2),
+                  ('ois', 'ol', 1), ('ns', 'm', 1), ('res', 'r', 3), ('les', 'l', 3),
+                  ('s', '', 2)]
+_REGRAS_ADVERBIO = [('mente', '', 4)]
+_REGRAS_GRAU = [('zinho', '', 3), ('zinha', '', 3), ('inho', '', 3), ('inha', '', 3),
+                ('issimo', '', 3), ('issima', '', 3)]
+_REGRAS_NOMINAIS = [('amento', '', 3), ('imento', '', 3), ('acao', '', 3), ('icao', '', 3),
+                    ('ucao', '', 3), ('mento', '', 3), ('idade', '', 3), ('ismo', '', 3),
+                    ('ista', '', 3), ('avel', '', 3), ('ivel', '', 3), ('oso', '', 3),
+                    ('osa', '', 3)]
+_REGRAS_VERBAIS = [('aram', '', 3), ('eram', '', 3), ('iram', '', 3), ('ando', '', 3),
+                   ('endo', '', 3), ('indo', '', 3), ('ado', '', 3), ('ada', '', 3),
+                   ('ido', '', 3), ('ida', '', 3), ('ava', '', 3), ('ar', '', 3),
+                   ('er', '', 3), ('ir', '', 3), ('ou', '', 3)]
+_VOGAIS_FINAIS = ('a', 'e', 'o')
+
+
+def _aplicar_regras(palavra, regras):
+    for sufixo, substituto, minimo in regras:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= minimo:
+            return palavra[:-len(sufixo)] + substituto, True
+    return palavra, False
+
+
+def radical(palavra):
+    """
+    Reduz uma palavra normalizada ao seu radical aproximado
+    Exemplo: 'esmagamentos' -> 'esmag', 'maos' -> 'mao'
+    """
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+
+    palavra, _ = _aplicar_regras(palavra, _REGRAS_PLURAL)
+    palavra, adverbio = _aplicar_regras(palavra, _REGRAS_ADVERBIO)
+    if adverbio:
+        return palavra[:-1] if palavra.endswith(_VOGAIS_FINAIS) else palavra
+    palavra, _ = _aplicar_regras(palavra, _REGRAS_GRAU)
+    palavra, reduzida = _aplicar_regras(palavra, _REGRAS_NOMINAIS)
+    if not reduzida:
+        palavra, reduzida = _aplicar_regras(palavra, _REGRAS_VERBAIS)
+    if not reduzida and len(palavra) > 3 and palavra.endswith(_VOGAIS_FINAIS):
+        palavra = palavra[:-1]
+    return palavra
+
+
+def termos_do_texto(texto):
+    """Retorna as palavras indexáveis do texto (sem palavras vazias)"""
+    return [p for p in tokenizar(texto) if p not in PALAVRAS_VAZIAS]
+
+
+# ==================== ÍNDICE INVERTIDO ====================
+
+class IndiceBusca:
+    """
+    Índice invertido em memória com atualização incremental
+
+    Mantém, para cada radical, os acidentes em que aparece e a frequência;
+    o vocabulário de palavras (sem radical) permite a busca por prefixo.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.versao = None
+        self._trava = threading.RLock()
+        self._postings = {}          # radical -> {id: frequência}
+        self._termos_documento = {}  # id -> (Counter(radical), Counter(palavra))
+        self._tamanhos = {}          # id -> quantidade de termos
+        self._hashes = {}            # id -> hash do conteúdo indexado
+        self._palavras = {}          # palavra -> {radical: ocorrências}
+        self._vocabulario = []       # palavras ordenadas (para prefixo)
+        self._vocabulario_sujo = False
+        self._total_termos = 0
+
+    # ---------- manutenção ----------
+
+    def sincronizar(self, bd, versao=None):
+        """
+        Atualiza o índice com o conteúdo atual da tabela acidentes
+
+        Compara um hash por linha com o que já foi indexado e só reindexa
+        acidentes novos ou alterados, removendo os que saíram da tabela.
+        Retorna (adicionados/alterados, removidos).
+        """
+        colunas = ', '.join(COLUNAS_BUSCA)
+        hashes_atuais = dict(bd.execute(f"""
+            SELECT id, md5(concat_ws('|', {colunas})) FROM acidentes
+        """).fetchall())
+
+        with self._trava:
+            removidos = [i for i in self._hashes if i not in hashes_atuais]
+            alterados = [i for i, h in hashes_atuais.items() if self._hashes.get(i) != h]
+
+        linhas = []
+        if alterados:
+            linhas = bd.execute(f"""
+                SELECT id, {colunas} FROM acidentes
+                WHERE id IN (SELECT UNNEST($1::INTEGER[]))
+            """, [alterados]).fetchall()
+
+        with self._trava:
+            for id_acidente in removidos:
+                self.remover_documento(id_acidente)
+            for linha in linhas:
+                self.adicionar_documento(linha[0], linha[1:], hashes_atuais[linha[0]])
+            self.versao = versao
+
+        return len(alterados), len(removidos)
+
+    def adicionar_documento(self, id_acidente, campos, hash_conteudo=None):
+        """Indexa (ou reindexa) um acidente a partir dos valores das colunas"""
+        with self._trava:
+            if id_acidente in self._termos_documento:
+                self.remover_documento(id_acidente)
+
+            palavras = [p for campo in campos if campo for p in termos_do_texto(str(campo))]
+            termos = Counter()
+            for palavra in palavras:
+                termo = radical(palavra)
+                termos[termo] += 1
+                ocorrencias = self._palavras.setdefault(palavra, Counter())
+                if not ocorrencias:
+                    self._vocabulario_sujo = True
+                ocorrencias[termo] += 1
+
+            for termo, frequencia in termos.items():
+                self._postings.setdefault(termo, {})[id_acidente] = frequencia
+
+            self._termos_documento[id_acidente] = (termos, Counter(palavras))
+            self._tamanhos[id_acidente] = len(palavras)
+            self._hashes[id_acidente] = hash_conteudo
+            self._total_termos += len(palavras)
+
+    def remover_documento(self, id_acidente):
+        """Remove um acidente do índice"""
+        with self._trava:
+            entrada = self._termos_documento.pop(id_acidente, None)
+            if entrada is None:
+                return
+            termos, palavras = entrada
+
+            for termo in termos:
+                documentos = self._postings.get(termo)
+                if documentos is not None:
+                    documentos.pop(id_acidente, None)
+                    if not documentos:
+                        del self._postings[termo]
+
+            for palavra, quantidade in palavras.items():
+                ocorrencias = self._palavras.get(palavra)
+                if ocorrencias is None:
+                    continue
+                ocorrencias[radical(palavra)] -= quantidade
+                if ocorrencias[radical(palavra)] <= 0:
+                    del self._palavras[palavra]
+                    self._vocabulario_sujo = True
+
+            self._total_termos -= self._tamanhos.pop(id_acidente, 0)
+            self._hashes.pop(id_acidente, None)
+
+    # ---------- consulta ----------
+
+    def buscar(self, consulta):
+        """
+        Retorna {id: pontuação BM25} dos acidentes que contêm todos os termos
+
+        Retorna None se a consulta não tiver termos indexáveis (por exemplo,
+        apenas palavras vazias), caso em que ela não deve filtrar nada.
+        """
+        palavras = termos_do_texto(consulta)
+        if not palavras:
+            return None
+
+        with self._trava:
+            total_documentos = len(self._tamanhos)
+            if total_documentos == 0:
+                return {}
+            media_tamanho = self._total_termos / total_documentos
+
+            pontuacoes = None
+            for posicao, palavra in enumerate(palavras):
+                termos = {radical(palavra)}
+                # O último termo também casa por prefixo (busca enquanto digita)
+                if posicao == len(palavras) - 1:
+                    termos.update(self._termos_com_prefixo(palavra))
+
+                parciais = self._pontuar(termos, total_documentos, media_tamanho)
+                if pontuacoes is None:
+                    pontuacoes = parciais
+                else:
+                    pontuacoes = {i: p + parciais[i] for i, p in pontuacoes.items() if i in parciais}
+                if not pontuacoes:
+                    return {}
+
+            return pontuacoes
+
+    def _pontuar(self, termos, total_documentos, media_tamanho):
+        """Pontuação BM25 de cada documento para a melhor variante do termo"""
+        pontuacoes = {}
+        for termo in termos:
+            documentos = self._postings.get(termo)
+            if not documentos:
+                continue
+            idf = math.log(1 + (total_documentos - len(documentos) + 0.5) / (len(documentos) + 0.5))
+            for id_acidente, frequencia in documentos.items():
+                normalizacao = self.K1 * (1 - self.B + self.B * self._tamanhos[id_acidente] / media_tamanho)
+                pontuacao = idf * frequencia * (self.K1 + 1) / (frequencia + normalizacao)
+                if pontuacao > pontuacoes.get(id_acidente, 0.0):
+                    pontuacoes[id_acidente] = pontuacao
+        return pontuacoes
+
+    def _termos_com_prefixo(self, prefixo):
+        """Radicais de todas as palavras do vocabulário que começam com o prefixo"""
+        if self._vocabulario_sujo:
+            self._vocabulario = sorted(self._palavras)
+            self._vocabulario_sujo = False
+
+        termos = set()
+        inicio = bisect.bisect_left(self._vocabulario, prefixo)
+        for palavra in self._vocabulario[inicio:]:
+            if not palavra.startswith(prefixo):
+                break
+            termos.update(self._palavras.get(palavra, ()))
+        return termos
+
+    def metricas(self):
+        """Retorna o tamanho do índice"""
+        with self._trava:
+            return {
+                'documents': len(self._tamanhos),
+                'terms': len(self._postings),
+                'words': len(self._palavras),
+                'dataVersion': self.versao
+            }
+
+
+# ==================== ÍNDICE DA APLICAÇÃO ====================
+
+_trava_sincronizacao = threading.Lock()
+
+
+def obter_indice_busca(app, bd):
+    """
+    Retorna o índice de busca da aplicação, sincronizando-o quando a versão dos dados muda
+
+    Retorna None se a busca indexada estiver desabilitada na configuração ou
+    se bd lê um snapshot já substituído (a busca vai ao SQL nesse snapshot).
+    """
+    if not app.config['BUSCA_INDEXADA']:
+        return None
+
+    versao = versao_do_cursor(app, bd)
+    indice = app.extensions.get('indice_busca')
+    if indice is not None and indice.versao == versao:
+        return indice
+    if versao is None or versao != ler_versao_dados(app.config['DATABASE'])[0]:
+        return None
+
+    with _trava_sincronizacao:
+        indice = app.extensions.get('indice_busca')
+        if indice is None:
+            indice = IndiceBusca()
+            indice.sincronizar(bd, versao)
+            app.extensions['indice_busca'] = indice
+        elif indice.versao != versao:
+            indice.sincronizar(bd, versao)
+    return indice
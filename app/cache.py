@@ -0,0 +1,264 @@
+"""
+Cache de respostas da API - LRU com TTL, limite em bytes e invalidação por versão dos dados
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, g, request
+
+from app.database import versao_do_cursor
+from app.utils import FiltroAcidentes
+from app.versao_dados import ler_versao_dados
+
+
+# Parâmetros que formam o FiltroAcidentes (normalizados pela chave do filtro)
+PARAMETROS_FILTRO = ('gender', 'country', 'startDate', 'endDate')
+
+# Cache-Control por endpoint; os demais /api/* usam CACHE_CONTROL_PADRAO.
+# Com no-cache o cliente sempre revalida, o que custa só um 304 enquanto a
+# versão dos dados não muda; os painéis sem filtros podem ser reaproveitados
+# por alguns segundos sem nem revalidar.
+CACHE_CONTROL_PADRAO = 'public, no-cache'
+POLITICAS_CACHE_CONTROL = {
+    '/api/statistics': 'public, max-age=60, must-revalidate',
+    '/api/safety-record': 'public, max-age=60, must-revalidate',
+    '/api/next-actions': 'public, max-age=60, must-revalidate',
+    '/api/export': 'private, no-cache',
+    '/api/metrics': 'no-store'
+}
+
+
+# ==================== CACHE LRU/TTL ====================
+
+class CacheRespostas:
+    """
+    Cache LRU em memória para corpos de resposta já serializados
+
+    Cada entrada guarda os bytes da resposta; o tamanho total é limitado por
+    max_bytes, descartando as entradas menos usadas. Entradas expiram após
+    ttl segundos e todo o cache é descartado quando a versão dos dados muda.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+        self._bytes = 0
+        self._versao = None
+
+        # Contadores
+        self._acertos = 0
+        self._falhas = 0
+        self._descartes = 0
+        self._expiracoes = 0
+        self._invalidacoes = 0
+
+    def obter(self, chave, versao):
+        """Retorna a entrada da chave ou None se ausente, expirada ou de outra versão"""
+        with self._trava:
+            self._sincronizar_versao(versao)
+
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._falhas += 1
+                return None
+
+            if time.monotonic() - entrada['criado_em'] > self.ttl:
+                self._remover(chave)
+                self._expiracoes += 1
+                self._falhas += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self._acertos += 1
+            return entrada
+
+    def armazenar(self, chave, versao, corpo, mimetype):
+        """Armazena o corpo de uma resposta, descartando as entradas mais antigas se preciso"""
+        tamanho = len(corpo)
+        if tamanho > self.max_bytes:
+            return
+
+        with self._trava:
+            self._sincronizar_versao(versao)
+
+            if chave in self._entradas:
+                self._remover(chave)
+
+            while self._entradas and self._bytes + tamanho > self.max_bytes:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self._descartes += 1
+
+            self._entradas[chave] = {
+                'corpo': corpo,
+                'mimetype': mimetype,
+                'criado_em': time.monotonic()
+            }
+            self._bytes += tamanho
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def metricas(self):
+        """Retorna os contadores do cache"""
+        with self._trava:
+            consultas = self._acertos + self._falhas
+            return {
+                'entries': len(self._entradas),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'ttlSeconds': self.ttl,
+                'dataVersion': self._versao,
+                'hits': self._acertos,
+                'misses': self._falhas,
+                'hitRate': round(self._acertos / consultas, 4) if consultas else 0.0,
+                'evictions': self._descartes,
+                'expirations': self._expiracoes,
+                'invalidations': self._invalidacoes
+            }
+
+    def _sincronizar_versao(self, versao):
+        """Descarta tudo quando a versão dos dados muda (chamado com a trava)"""
+        if versao != self._versao:
+            if self._entradas:
+                self._invalidacoes += 1
+            self._entradas.clear()
+            self._bytes = 0
+            self._versao = versao
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        self._bytes -= len(entrada['corpo'])
+
+
+# ==================== CHAVES E DECORADOR ====================
+
+def normalizar_consulta(argumentos):
+    """
+    Gera uma representação canônica dos parâmetros da requisição
+    
+    Os filtros padrão entram pela chave do FiltroAcidentes (listas de
+    gênero e país ordenadas, datas normalizadas); os demais parâmetros
+    (range, paginação, busca) são mantidos na ordem recebida.
+    """
+    filtro = FiltroAcidentes.da_requisicao(argumentos)
+    outros = tuple(
+        (nome, tuple(argumentos.getlist(nome)))
+        for nome in sorted(argumentos.keys()) if nome not in PARAMETROS_FILTRO
+    )
+    return (filtro.chave(), outros)
+
+
+def chave_requisicao():
+    """Chave de cache da requisição atual: endpoint + filtros normalizados"""
+    return (request.path, normalizar_consulta(request.args))
+
+
+def obter_cache(app):
+    """Retorna o cache de respostas da aplicação"""
+    return app.extensions['cache_respostas']
+
+
+def armazenar_em_cache(visao):
+    """
+    Decorador que serve a resposta do cache quando a mesma consulta já foi calculada
+
+    A versão é a do snapshot que g.bd lê; requisições que ficaram com um
+    snapshot já substituído não usam o cache.
+    """
+    @wraps(visao)
+    def envoltorio(*args, **kwargs):
+        if not current_app.config['CACHE_HABILITADO']:
+            return visao(*args, **kwargs)
+
+        versao = versao_do_cursor(current_app, g.bd)
+        if versao is None or versao != ler_versao_dados(current_app.config['DATABASE'])[0]:
+            return visao(*args, **kwargs)
+
+        cache = obter_cache(current_app)
+        chave = chave_requisicao()
+
+        entrada = cache.obter(chave, versao)
+        if entrada is not None:
+            return current_app.response_class(entrada['corpo'], mimetype=entrada['mimetype'])
+
+        resposta = current_app.make_response(visao(*args, **kwargs))
+        if resposta.status_code == 200 and not resposta.is_streamed:
+            cache.armazenar(chave, versao, resposta.get_data(), resposta.mimetype)
+        return resposta
+
+    return envoltorio
+
+
+# ==================== GET CONDICIONAL ====================
+
+def gerar_etag(versao, chave):
+    """ETag da resposta: hash da versão dos dados com o endpoint e os filtros normalizados"""
+    conteudo = f'{versao}|{chave[0]}|{chave[1]!r}'
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def _politica_cache_control(caminho):
+    return POLITICAS_CACHE_CONTROL.get(caminho, CACHE_CONTROL_PADRAO)
+
+
+def verificar_requisicao_condicional():
+    """
+    Responde 304 quando o cliente já tem a versão atual da resposta
+
+    Executado antes de qualquer acesso ao banco: compara If-None-Match
+    (ou If-Modified-Since) com a ETag calculada a partir da versão dos
+    dados e da consulta normalizada.
+    """
+    if (not current_app.config['ETAG_HABILITADO'] or request.method != 'GET'
+            or not request.path.startswith('/api/')
+            or _politica_cache_control(request.path) == 'no-store'):
+        return None
+
+    versao, modificado_em = ler_versao_dados(current_app.config['DATABASE'])
+    if versao is None:
+        return None
+
+    g.etag = gerar_etag(versao, chave_requisicao())
+    g.ultima_modificacao = datetime.fromtimestamp(int(modificado_em), tz=timezone.utc)
+
+    if request.if_none_match:
+        atualizado = request.if_none_match.contains_weak(g.etag)
+    else:
+        atualizado = (request.if_modified_since is not None
+                      and request.if_modified_since >= g.ultima_modificacao)
+
+    if atualizado:
+        return _aplicar_cabecalhos(current_app.response_class(status=304))
+    return None
+
+
+def aplicar_cabecalhos_cache(resposta):
+    """Adiciona ETag, Last-Modified e Cache-Control às respostas da API"""
+    if not request.path.startswith('/api/'):
+        return resposta
+
+    if 'etag' in g and resposta.status_code == 200:
+        _aplicar_cabecalhos(resposta)
+    elif resposta.status_code == 200:
+        resposta.headers.setdefault('Cache-Control', _politica_cache_control(request.path))
+    else:
+        # Erros não devem ser guardados; o 304 já vem com a política do endpoint
+        resposta.headers.setdefault('Cache-Control', 'no-store')
+    return resposta
+
+
+def _aplicar_cabecalhos(resposta):
+    resposta.set_etag(g.etag, weak=True)
+    resposta.last_modified = g.ultima_modificacao
+    resposta.headers['Cache-Control'] = _politica_cache_control(request.path)
+    return resposta
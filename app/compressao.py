@@ -0,0 +1,136 @@
+"""
+Compressão - Respostas JSON comprimidas e arquivos estáticos pré-comprimidos
+
+As respostas JSON e HTML acima de um tamanho mínimo são comprimidas com brotli
+ou gzip conforme o Accept-Encoding do cliente. Os arquivos estáticos
+gerados por scripts/construir_estaticos.py (nome com hash do conteúdo e
+versões .br/.gz) são servidos em /assets com cache de longa duração.
+"""
+import gzip
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+
+# Tipos de resposta comprimidos dinamicamente
+MIMETYPES_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/csv', 'text/html')
+
+# Arquivos com hash no nome nunca mudam de conteúdo
+CACHE_CONTROL_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+
+# ==================== NEGOCIAÇÃO ====================
+
+def escolher_codificacao(disponiveis):
+    """Escolhe a melhor codificação aceita pelo cliente entre as disponíveis ('br', 'gzip')"""
+    aceitas = request.accept_encodings
+    for codificacao in ('br', 'gzip'):
+        if codificacao in disponiveis and aceitas[codificacao]:
+            return codificacao
+    return None
+
+
+def _codificacoes_dinamicas():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+# ==================== RESPOSTAS DINÂMICAS ====================
+
+def comprimir_resposta(resposta):
+    """Comprime respostas JSON/HTML acima de COMPRESSAO_MIN_BYTES (hook after_request)"""
+    config = current_app.config
+    if (not config['COMPRESSAO_HABILITADA'] or resposta.status_code != 200
+            or resposta.is_streamed or resposta.direct_passthrough
+            or resposta.mimetype not in MIMETYPES_COMPRIMIVEIS
+            or 'Content-Encoding' in resposta.headers):
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    corpo = resposta.get_data()
+    if len(corpo) < config['COMPRESSAO_MIN_BYTES']:
+        return resposta
+
+    codificacao = escolher_codificacao(_codificacoes_dinamicas())
+    if codificacao == 'br':
+        corpo = brotli.compress(corpo, quality=config['COMPRESSAO_NIVEL_BROTLI'])
+    elif codificacao == 'gzip':
+        corpo = gzip.compress(corpo, compresslevel=config['COMPRESSAO_NIVEL_GZIP'])
+    else:
+        return resposta
+
+    resposta.set_data(corpo)
+    resposta.headers['Content-Encoding'] = codificacao
+    return resposta
+
+
+# ==================== ARQUIVOS ESTÁTICOS ====================
+
+def _pasta_dist(app):
+    return os.path.join(app.static_folder, 'dist')
+
+
+def carregar_manifesto(app):
+    """Lê o manifesto gerado por construir_estaticos.py (vazio se o build não foi feito)"""
+    caminho = os.path.join(_pasta_dist(app), 'manifest.json')
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def url_estatico(caminho):
+    """
+    URL de um arquivo estático para os templates
+
+    Usa a versão com hash em /assets quando o build existe; senão, o
+    arquivo original em /static.
+    """
+    versionado = current_app.extensions['manifesto_estaticos'].get(caminho)
+    if versionado is None:
+        return url_for('static', filename=caminho)
+    return url_for('servir_asset', arquivo=versionado)
+
+
+def servir_asset(arquivo):
+    """Serve um arquivo com hash, na versão pré-comprimida que o cliente aceitar"""
+    app = current_app
+    if arquivo not in app.extensions['arquivos_versionados']:
+        abort(404)
+
+    pasta = _pasta_dist(app)
+    disponiveis = [c for c, extensao in (('br', '.br'), ('gzip', '.gz'))
+                   if os.path.exists(os.path.join(pasta, arquivo + extensao))]
+    codificacao = escolher_codificacao(disponiveis)
+
+    mimetype = mimetypes.guess_type(arquivo)[0] or 'application/octet-stream'
+    if codificacao is None:
+        resposta = send_from_directory(pasta, arquivo, mimetype=mimetype, max_age=31536000)
+    else:
+        extensao = '.br' if codificacao == 'br' else '.gz'
+        resposta = send_from_directory(pasta, arquivo + extensao, mimetype=mimetype,
+                                       max_age=31536000)
+        resposta.headers['Content-Encoding'] = codificacao
+
+    if disponiveis:
+        resposta.vary.add('Accept-Encoding')
+    resposta.headers['Cache-Control'] = CACHE_CONTROL_IMUTAVEL
+    return resposta
+
+
+def configurar_compressao(app):
+    """Registra a compressão das respostas e o serviço dos arquivos estáticos versionados"""
+    manifesto = carregar_manifesto(app)
+    app.extensions['manifesto_estaticos'] = manifesto
+    app.extensions['arquivos_versionados'] = set(manifesto.values())
+
+    app.add_url_rule('/assets/<path:arquivo>', 'servir_asset', servir_asset)
+    app.add_template_global(url_estatico, 'estatico')
+    app.after_request(comprimir_resposta)
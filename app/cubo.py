@@ -0,0 +1,231 @@
+"""
+Cubo OLAP em memória - Contagens pré-agregadas de acidentes
+
+As consultas de gráficos e do dashboard são todas COUNT(*) agrupados por
+dimensões de baixa cardinalidade. O cubo guarda essas contagens em um
+array NumPy denso (uma dimensão por coluna) e responde aos filtros de
+gênero, país e período somando fatias do array, sem SQL.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.database import versao_do_cursor
+from app.versao_dados import ler_versao_dados
+
+
+# Dimensões do cubo (coluna da tabela ou expressão derivada)
+DIMENSOES = ('Genero', 'Pais', 'Mes', 'Setor_Industrial', 'Estado', 'Parte_Corpo', 'Nivel_Acidente')
+
+
+def _converter_data(valor):
+    """Aceita datetime ou texto ISO (None se vazio)"""
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(valor)
+
+
+class CuboAcidentes:
+    """Cubo denso de contagens de acidentes por dimensão"""
+
+    def __init__(self, versao, categorias, contagens, intervalos_datas, apenas_meia_noite):
+        self.versao = versao
+        self.categorias = categorias
+        self.contagens = contagens
+        self.apenas_meia_noite = apenas_meia_noite
+
+        self._indices = {
+            dimensao: {valor: i for i, valor in enumerate(valores)}
+            for dimensao, valores in categorias.items()
+        }
+        # Datas mínima/máxima por célula (Genero, Pais, Mes)
+        self._intervalos_datas = intervalos_datas
+
+        datas = [d for intervalo in intervalos_datas.values() for d in intervalo]
+        self.data_minima = min(datas) if datas else None
+        self.data_maxima = max(datas) if datas else None
+
+    @classmethod
+    def construir(cls, bd, versao=None):
+        """Constrói o cubo a partir da tabela acidentes em uma única consulta"""
+        linhas = bd.execute("""
+            SELECT Genero, Pais, strftime(Mes, '%Y-%m'), Setor_Industrial,
+                   Estado, Parte_Corpo, Nivel_Acidente,
+                   contagem, data_minima, data_maxima, meia_noite
+            FROM (
+                SELECT Genero, Pais, Mes, Setor_Industrial, Estado, Parte_Corpo, Nivel_Acidente,
+                       COUNT(*) as contagem, MIN(Data) as data_minima, MAX(Data) as data_maxima,
+                       bool_and(Data = date_trunc('day', Data)) as meia_noite
+                FROM acidentes
+                GROUP BY ALL
+            )
+        """).fetchall()
+
+        numero_dimensoes = len(DIMENSOES)
+        categorias = {}
+        for posicao, dimensao in enumerate(DIMENSOES):
+            valores = {linha[posicao] for linha in linhas}
+            categorias[dimensao] = sorted(valores, key=lambda v: (v is None, v or ''))
+
+        indices = {
+            dimensao: {valor: i for i, valor in enumerate(categorias[dimensao])}
+            for dimensao in DIMENSOES
+        }
+        formato = tuple(len(categorias[dimensao]) for dimensao in DIMENSOES)
+        contagens = np.zeros(formato, dtype=np.int64)
+
+        intervalos_datas = {}
+        apenas_meia_noite = True
+
+        for linha in linhas:
+            celula = tuple(indices[dimensao][linha[posicao]]
+                           for posicao, dimensao in enumerate(DIMENSOES))
+            contagens[celula] += linha[numero_dimensoes]
+
+            data_minima, data_maxima, meia_noite = linha[numero_dimensoes + 1:]
+            if meia_noite is False:
+                apenas_meia_noite = False
+            if data_minima is not None:
+                chave = celula[:3]
+                atual = intervalos_datas.get(chave)
+                if atual:
+                    data_minima = min(data_minima, atual[0])
+                    data_maxima = max(data_maxima, atual[1])
+                intervalos_datas[chave] = (data_minima, data_maxima)
+
+        return cls(versao, categorias, contagens, intervalos_datas, apenas_meia_noite)
+
+    # ==================== SELEÇÃO ====================
+
+    def selecionar(self, generos=None, paises=None, data_inicio=None, data_fim=None, pais=None):
+        """
+        Converte os filtros em uma seleção de índices por dimensão
+
+        Retorna None quando o filtro não pode ser expresso no cubo (por
+        exemplo, datas que não caem em limites de mês); nesse caso o
+        chamador deve recorrer ao SQL.
+        """
+        selecao = [None] * len(DIMENSOES)
+
+        if generos:
+            selecao[0] = self._indices_de('Genero', generos)
+        if paises:
+            selecao[1] = self._indices_de('Pais', paises)
+        if pais and pais != 'all':
+            indices_pais = self._indices_de('Pais', [pais])
+            selecao[1] = (indices_pais if selecao[1] is None
+                          else np.intersect1d(selecao[1], indices_pais))
+
+        meses = self._selecionar_meses(data_inicio, data_fim)
+        if meses is False:
+            return None
+        selecao[2] = meses
+
+        return tuple(selecao)
+
+    def _indices_de(self, dimensao, valores):
+        indices = self._indices[dimensao]
+        return np.array(sorted({indices[v] for v in valores if v in indices}), dtype=np.intp)
+
+    def _selecionar_meses(self, data_inicio, data_fim):
+        """Índices dos meses dentro do período, None sem restrição ou False se inexprimível"""
+        if not data_inicio and not data_fim:
+            return None
+
+        try:
+            inicio = _converter_data(data_inicio)
+            fim = _converter_data(data_fim)
+        except ValueError:
+            return False
+
+        # Datas com fuso horário não se comparam às do cubo (sem fuso): ficam com o SQL
+        if any(data is not None and data.tzinfo is not None for data in (inicio, fim)):
+            return False
+
+        # Linhas sem data nunca satisfazem um filtro de período (o mês nulo é o último)
+        meses = [mes for mes in self.categorias['Mes'] if mes is not None]
+        primeiro, ultimo = 0, len(meses)
+
+        if inicio is not None and self.data_minima is not None and inicio > self.data_minima:
+            if inicio.day != 1 or inicio.time() != datetime.min.time():
+                return False
+            primeiro = bisect.bisect_left(meses, inicio.strftime('%Y-%m'))
+
+        if fim is not None and self.data_maxima is not None and fim < self.data_maxima:
+            fim_do_mes = (fim.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            if (fim.date() != fim_do_mes.date() or fim.time() != datetime.min.time()
+                    or not self.apenas_meia_noite):
+                return False
+            ultimo = bisect.bisect_right(meses, fim.strftime('%Y-%m'))
+
+        return np.arange(primeiro, max(primeiro, ultimo), dtype=np.intp)
+
+    # ==================== AGREGAÇÃO ====================
+
+    def _fatia(self, selecao):
+        """Aplica a seleção ao cubo, uma dimensão por vez"""
+        fatia = self.contagens
+        for eixo, indices in enumerate(selecao):
+            if indices is not None:
+                fatia = np.take(fatia, indices, axis=eixo)
+        return fatia
+
+    def contar_por(self, dimensao, selecao):
+        """Retorna {valor: contagem} da dimensão para as células selecionadas (sem zeros)"""
+        eixo = DIMENSOES.index(dimensao)
+        fatia = self._fatia(selecao)
+        outros_eixos = tuple(i for i in range(fatia.ndim) if i != eixo)
+        totais = fatia.sum(axis=outros_eixos)
+
+        categorias = self.categorias[dimensao]
+        indices = selecao[eixo] if selecao[eixo] is not None else range(len(categorias))
+        return {categorias[i]: int(total) for i, total in zip(indices, totais) if total > 0}
+
+    def total(self, selecao):
+        """Retorna o total de acidentes das células selecionadas"""
+        return int(self._fatia(selecao).sum())
+
+    def intervalo_datas(self, selecao):
+        """Retorna (data mínima, data máxima) da seleção (considera gênero, país e mês)"""
+        permitidos = [set(indices.tolist()) if indices is not None else None
+                      for indices in selecao[:3]]
+        data_minima = data_maxima = None
+        for chave, (minima, maxima) in self._intervalos_datas.items():
+            if all(p is None or i in p for i, p in zip(chave, permitidos)):
+                data_minima = minima if data_minima is None else min(data_minima, minima)
+                data_maxima = maxima if data_maxima is None else max(data_maxima, maxima)
+        return data_minima, data_maxima
+
+
+# ==================== CUBO DA APLICAÇÃO ====================
+
+_trava_construcao = threading.Lock()
+
+
+def obter_cubo(app, bd):
+    """
+    Retorna o cubo da aplicação, reconstruindo-o quando a versão dos dados muda
+
+    Retorna None se o cubo estiver desabilitado na configuração ou se bd lê
+    um snapshot já substituído (a consulta vai ao SQL nesse snapshot).
+    """
+    if not app.config['CUBO_HABILITADO']:
+        return None
+
+    versao = versao_do_cursor(app, bd)
+    cubo = app.extensions.get('cubo_acidentes')
+    if cubo is not None and cubo.versao == versao:
+        return cubo
+    if versao is None or versao != ler_versao_dados(app.config['DATABASE'])[0]:
+        return None
+
+    with _trava_construcao:
+        cubo = app.extensions.get('cubo_acidentes')
+        if cubo is None or cubo.versao != versao:
+            cubo = CuboAcidentes.construir(bd, versao)
+            app.extensions['cubo_acidentes'] = cubo
+    return cubo
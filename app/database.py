@@ -1,54 +1,352 @@
 """
 Gerenciamento de conexão com o banco de dados DuckDB
 """
-from flask import g
+import logging
+import os
+import queue
+import threading
+import time
+from flask import g, current_app
 import duckdb
-from scripts.subir_csv_para_db import subir_csv_para_db
+from app.versao_dados import garantir_versao, ler_versao_dados
+from app.esquema import (tabela_existe, visao_existe, esquema_otimizado, carregar_csv, migrar_esquema,
+                         inicializar_parquet, criar_visao_parquet)
+from app.snapshots import arquivo_ativo
 
 
+logger = logging.getLogger(__name__)
+
+
+# ==================== POOL DE CONEXÕES ====================
+
+class HandleBanco:
+    """
+    Handle aberto de um arquivo do banco e quantos cursores dele estão em uso
+
+    Os cursores não são guardados aqui: fechar bd fecha também os cursores
+    criados a partir dele, e os livres ficam só na lista do pool. versao é a
+    versão dos dados que o arquivo contém, atualizada pelas retiradas
+    enquanto ele é o arquivo ativo.
+    """
+
+    def __init__(self, caminho, read_only=False):
+        self.caminho = caminho
+        self.bd = duckdb.connect(caminho, read_only=read_only)
+        self.em_uso = 0
+        self.versao = None
+
+
+class PoolConexoes:
+    """
+    Pool de conexões DuckDB por processo
+
+    Mantém um handle do banco aberto e entrega cursores (conexões filhas que
+    compartilham catálogo e buffer cache) de uma lista de cursores livres:
+    a retirada pega o devolvido mais recentemente (LIFO) e só cria um
+    cursor novo se a lista estiver vazia, então o servidor, que atende cada
+    requisição em uma thread nova, reaproveita sempre os mesmos cursores. O
+    tamanho do pool limita quantos cursores podem estar em uso
+    simultaneamente (e, portanto, quantos são criados por handle).
+
+    Com snapshots, o handle segue o ponteiro de app/snapshots.py: quando uma
+    carga publica um snapshot novo, a retirada seguinte abre o arquivo novo
+    (somente leitura) e as retiradas passam a usá-lo. O handle antigo conta
+    os cursores ainda em uso e é fechado quando o último é devolvido.
+    """
+
+    def __init__(self, caminho_bd, tamanho=8, timeout=30.0, intervalo_verificacao=60.0,
+                 snapshots=True):
+        self.caminho_bd = caminho_bd
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.intervalo_verificacao = intervalo_verificacao
+        self.snapshots = snapshots
+
+        self._semaforo = threading.BoundedSemaphore(tamanho)
+        self._trava = threading.Lock()
+        self._livres = queue.LifoQueue()  # (cursor, handle, verificado_em) dos cursores livres
+        self._atual = self._abrir(self._arquivo_ativo())
+        self._substituidos = []         # Handles antigos com cursores ainda em uso
+        self._retirados = {}            # id(cursor) -> (handle, verificado_em) dos cursores em uso
+        self._falha_troca = None        # Snapshot que não abriu (não tenta a cada retirada)
+
+        # Métricas
+        self._em_uso = 0
+        self._pico_em_uso = 0
+        self._total_retiradas = 0
+        self._total_espera = 0.0
+        self._maior_espera = 0.0
+        self._cursores_criados = 0
+        self._falhas_verificacao = 0
+        self._trocas = 0
+        self._falhas_trocas = 0
+
+    def retirar(self):
+        """Retira um cursor do pool, aguardando caso todos estejam em uso"""
+        inicio = time.perf_counter()
+        if not self._semaforo.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f'Nenhuma conexão disponível no pool após {self.timeout}s'
+            )
+        espera = time.perf_counter() - inicio
+
+        try:
+            handle = self._handle_para_retirada()
+            try:
+                cursor, verificado_em = self._cursor_livre(handle)
+            except Exception:
+                self._liberar(handle)
+                raise
+        except Exception:
+            self._semaforo.release()
+            raise
+
+        with self._trava:
+            self._retirados[id(cursor)] = (handle, verificado_em)
+            self._em_uso += 1
+            self._pico_em_uso = max(self._pico_em_uso, self._em_uso)
+            self._total_retiradas += 1
+            self._total_espera += espera
+            self._maior_espera = max(self._maior_espera, espera)
+
+        return cursor
+
+    def devolver(self, cursor):
+        """Devolve um cursor à lista de livres (cursores de um snapshot substituído são descartados)"""
+        with self._trava:
+            self._em_uso -= 1
+            handle, verificado_em = self._retirados.pop(id(cursor), (None, None))
+            if handle is self._atual:
+                self._livres.put((cursor, handle, verificado_em))
+        if handle is not None:
+            self._liberar(handle)
+        self._semaforo.release()
+
+    def versao_do_cursor(self, cursor):
+        """Versão dos dados do arquivo que um cursor retirado lê (None se ele não saiu do pool)"""
+        with self._trava:
+            handle, _ = self._retirados.get(id(cursor), (None, None))
+            return handle.versao if handle is not None else None
+
+    def metricas(self):
+        """Retorna as métricas atuais do pool"""
+        with self._trava:
+            media_espera = (self._total_espera / self._total_retiradas
+                            if self._total_retiradas else 0.0)
+            return {
+                'size': self.tamanho,
+                'inUse': self._em_uso,
+                'peakInUse': self._pico_em_uso,
+                'checkouts': self._total_retiradas,
+                'cursorsCreated': self._cursores_criados,
+                'idleCursors': self._livres.qsize(),
+                'healthCheckFailures': self._falhas_verificacao,
+                'snapshot': os.path.basename(self._atual.caminho),
+                'snapshotSwaps': self._trocas,
+                'snapshotSwapFailures': self._falhas_trocas,
+                'retiredSnapshotsInUse': len(self._substituidos),
+                'waitTimeMs': {
+                    'total': round(self._total_espera * 1000, 3),
+                    'avg': round(media_espera * 1000, 3),
+                    'max': round(self._maior_espera * 1000, 3)
+                }
+            }
+
+    def fechar(self):
+        """Fecha os handles do banco e invalida todos os cursores"""
+        with self._trava:
+            for handle in [self._atual] + self._substituidos:
+                self._fechar_handle(handle)
+            self._substituidos = []
+
+    def _arquivo_ativo(self):
+        """Arquivo que as novas retiradas devem usar"""
+        return arquivo_ativo(self.caminho_bd) if self.snapshots else self.caminho_bd
+
+    def _abrir(self, caminho):
+        """Abre um handle; snapshots publicados são imutáveis e abrem somente leitura"""
+        return HandleBanco(caminho, read_only=caminho != self.caminho_bd)
+
+    def _handle_para_retirada(self):
+        """Retorna o handle atual (trocando de snapshot se o ponteiro mudou) e conta o uso"""
+        # A versão é lida antes do ponteiro: publicar_snapshot troca o ponteiro
+        # antes de renovar a versão, então um arquivo nunca recebe a versão de
+        # uma carga posterior a ele (no máximo a anterior, até a próxima retirada)
+        versao, _ = ler_versao_dados(self.caminho_bd)
+        caminho = self._arquivo_ativo()
+        with self._trava:
+            if caminho != self._atual.caminho and caminho != self._falha_troca:
+                self._trocar(caminho)
+            if self._atual.caminho == caminho:
+                self._atual.versao = versao
+            self._atual.em_uso += 1
+            return self._atual
+
+    def _trocar(self, caminho):
+        """Passa a servir outro arquivo; chamado com a trava adquirida"""
+        try:
+            novo = self._abrir(caminho)
+        except Exception as erro:
+            # Continua servindo o snapshot anterior em vez de falhar as requisições
+            logger.warning('Não foi possível abrir o snapshot %s: %s', caminho, erro)
+            self._falha_troca = caminho
+            self._falhas_trocas += 1
+            return
+
+        antigo = self._atual
+        self._atual = novo
+        self._falha_troca = None
+        self._trocas += 1
+        if antigo.em_uso:
+            self._substituidos.append(antigo)
+        else:
+            self._fechar_handle(antigo)
+
+    def _liberar(self, handle):
+        """Desconta um uso do handle e fecha handles substituídos que ficaram livres"""
+        with self._trava:
+            handle.em_uso -= 1
+            if handle is not self._atual and handle.em_uso == 0 and handle in self._substituidos:
+                self._substituidos.remove(handle)
+                self._fechar_handle(handle)
+
+    def _fechar_handle(self, handle):
+        """Fecha o handle (e com ele os cursores)"""
+        handle.bd.close()
+
+    def _cursor_livre(self, handle):
+        """
+        Retorna (cursor, hora da verificação): o livre mais recente do handle,
+        verificado se ficou parado mais que intervalo_verificacao, ou um novo
+        """
+        agora = time.monotonic()
+        while True:
+            try:
+                cursor, dono, verificado_em = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if dono is not handle:
+                continue  # Cursor de um snapshot substituído: fecha junto com o handle dele
+            if agora - verificado_em >= self.intervalo_verificacao and not self._cursor_saudavel(cursor):
+                with self._trava:
+                    self._falhas_verificacao += 1
+                continue
+            return cursor, agora
+
+        cursor = handle.bd.cursor()
+        with self._trava:
+            self._cursores_criados += 1
+        return cursor, agora
+
+    def _cursor_saudavel(self, cursor):
+        """Verifica se o cursor ainda responde a consultas"""
+        try:
+            cursor.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            return False
+
+
+def obter_pool(app):
+    """Retorna o pool de conexões da aplicação"""
+    return app.extensions['pool_bd']
+
+
+# ==================== CONEXÃO POR REQUISIÇÃO ====================
+
 def obter_bd(app):
     """Obtém a conexão com o banco de dados"""
     if 'bd' not in g:
-        g.bd = duckdb.connect(app.config['DATABASE'])
+        g.bd = obter_pool(app).retirar()
+        if app.config['ARMAZENAMENTO'] == 'parquet':
+            sincronizar_visao_parquet(app, g.bd)
     return g.bd
 
 
+def versao_do_cursor(app, bd):
+    """
+    Versão dos dados que o cursor lê
+
+    Um cursor retirado antes da troca de snapshot continua no arquivo antigo
+    e devolve a versão dele, não a de <banco>.versao: cubo, índice de busca e
+    cache só guardam o que o cursor leu quando as duas coincidem.
+    """
+    return obter_pool(app).versao_do_cursor(bd)
+
+
 def fechar_bd(erro=None):
-    """Fecha a conexão com o banco de dados"""
+    """Devolve a conexão ao pool"""
     bd = g.pop('bd', None)
     if bd is not None:
-        bd.close()
-
-
-def inicializar_bd(app):
-    """Inicializa o banco de dados e cria as tabelas"""
-    bd = duckdb.connect(app.config['DATABASE'])
-    
-    bd.execute("""
-    CREATE TABLE IF NOT EXISTS acidentes (
-        id INTEGER PRIMARY KEY,
-        Data TIMESTAMP,
-        Pais VARCHAR(100),
-        Estado VARCHAR(200),
-        Setor_Industrial VARCHAR(100),
-        Nivel_Acidente VARCHAR(50),
-        Nivel_Acidente_Potencial VARCHAR(50),
-        Genero VARCHAR(20),
-        Tipo_Trabalhador VARCHAR(50),
-        Risco_Critico VARCHAR(200),
-        Descricao TEXT,
-        Parte_Corpo VARCHAR(50)
-    )
-    """)
-    
-    resultado = bd.execute("SELECT COUNT(*) FROM acidentes").fetchall()
-    if resultado[0][0] == 0:
-        subir_csv_para_db(bd)
-    
-    bd.close()
+        obter_pool(current_app).devolver(bd)
+
+
+# ==================== INICIALIZAÇÃO ====================
+
+_trava_visao_parquet = threading.Lock()
+
+
+def inicializar_bd(bd, armazenamento='duckdb', pasta_parquet=None):
+    """
+    Inicializa o banco de dados e cria as tabelas
+
+    No armazenamento 'duckdb', bancos vazios são carregados do CSV e bancos
+    no layout antigo (colunas VARCHAR, sem a coluna Mes) são migrados para o
+    layout de app/esquema.py. No armazenamento 'parquet', acidentes é uma
+    view sobre as partições em pasta_parquet.
+    """
+    if armazenamento == 'parquet':
+        inicializar_parquet(bd, pasta_parquet)
+    elif visao_existe(bd):
+        logger.info('Copiando os acidentes do Parquet para a tabela acidentes...')
+        migrar_esquema(bd)
+    elif not tabela_existe(bd) or bd.execute("SELECT COUNT(*) FROM acidentes").fetchone()[0] == 0:
+        carregar_csv(bd)
+    elif not esquema_otimizado(bd):
+        logger.info('Migrando a tabela acidentes para o layout otimizado...')
+        migrar_esquema(bd)
+
+
+def sincronizar_visao_parquet(app, bd):
+    """
+    Recria a view do Parquet quando a versão dos dados muda
+
+    Uma carga em outro processo (scripts/anexar_parquet.py) grava novas
+    partições e renova a versão; a view e os tipos ENUM são refeitos na
+    próxima requisição para incluir valores novos (um país novo, por exemplo).
+    """
+    versao, _ = ler_versao_dados(app.config['DATABASE'])
+    if app.extensions.get('versao_visao_parquet') == versao:
+        return
+
+    with _trava_visao_parquet:
+        if app.extensions.get('versao_visao_parquet') != versao:
+            criar_visao_parquet(bd, app.config['PASTA_PARQUET'])
+            app.extensions['versao_visao_parquet'] = versao
 
 
 def configurar_banco_dados(app):
     """Configura o banco de dados na aplicação Flask"""
-    inicializar_bd(app)
+    pool = PoolConexoes(
+        app.config['DATABASE'],
+        tamanho=app.config['POOL_TAMANHO'],
+        timeout=app.config['POOL_TIMEOUT'],
+        intervalo_verificacao=app.config['POOL_INTERVALO_VERIFICACAO'],
+        snapshots=app.config['ARMAZENAMENTO'] == 'duckdb'
+    )
+    app.extensions['pool_bd'] = pool
+
+    cursor = pool.retirar()
+    try:
+        inicializar_bd(cursor, app.config['ARMAZENAMENTO'], app.config['PASTA_PARQUET'])
+    finally:
+        pool.devolver(cursor)
+    versao = garantir_versao(app.config['DATABASE'])
+    if app.config['ARMAZENAMENTO'] == 'parquet':
+        app.extensions['versao_visao_parquet'] = versao
+
     app.teardown_appcontext(fechar_bd)
@@ -0,0 +1,235 @@
+"""
+Detecção de acidentes duplicados e quase duplicados
+
+- Duplicatas exatas: cada linha é reduzida uma única vez a um hash de 64
+  bits das colunas de comparação (pd.util.hash_pandas_object), e os grupos
+  saem de um único passe, em tempo linear. Linhas com o mesmo hash são
+  conferidas coluna a coluna contra a primeira do grupo, então uma colisão
+  nunca remove um acidente.
+- Quase duplicatas: a Descricao vira um conjunto de trigramas de palavras
+  (sem acentos e sem pontuação), resumido por uma assinatura MinHash. O LSH
+  divide a assinatura em bandas e só compara descrições que caem no mesmo
+  balde de alguma banda, dentro do mesmo escopo (Data, Estado). Os
+  candidatos são confirmados pela similaridade de Jaccard estimada.
+
+O DetectorDuplicatas guarda o estado entre chamadas: linhas já existentes
+(por exemplo, as da tabela acidentes) são indexadas com indexar e as novas
+conferidas com verificar, que compara cada linha com as indexadas e com as
+anteriores do próprio lote.
+"""
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from app.esquema import COLUNAS_ORIGEM
+
+
+# id é renumerado e Parte_Corpo é derivada da Descricao: nenhuma das duas
+# distingue um acidente de outro
+COLUNAS_COMPARACAO = [coluna for coluna in COLUNAS_ORIGEM if coluna not in ('id', 'Parte_Corpo')]
+COLUNAS_ESCOPO = ['Data', 'Estado']
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+TAMANHO_SHINGLE = 3      # Palavras por shingle
+PERMUTACOES = 128        # Tamanho da assinatura MinHash
+BANDAS = 32              # 32 bandas de 4 linhas: pares com Jaccard 0,8 viram candidatos em ~100% dos casos
+LIMIAR_SIMILARIDADE = 0.8
+
+_PALAVRA = re.compile(r'\w+')
+
+
+# ==================== DUPLICATAS EXATAS ====================
+
+def normalizar(df):
+    """
+    Colunas de comparação como texto, com a Data em um formato único
+
+    Deixa comparáveis as linhas lidas do CSV (tudo texto) e as lidas da
+    tabela (TIMESTAMP e ENUM).
+    """
+    normalizado = df.reindex(columns=COLUNAS_COMPARACAO).astype('string')
+    datas = pd.to_datetime(normalizado['Data'], errors='coerce')
+    normalizado['Data'] = datas.dt.strftime(FORMATO_DATA).astype('string').fillna(normalizado['Data'])
+    return normalizado
+
+
+def hash_linhas(df):
+    """Hash de 64 bits de cada linha, sobre as colunas de comparação normalizadas"""
+    return pd.util.hash_pandas_object(normalizar(df), index=False).to_numpy()
+
+
+# ==================== QUASE DUPLICATAS ====================
+
+def shingles(texto, tamanho=TAMANHO_SHINGLE):
+    """Conjunto de hashes (crc32) dos n-gramas de palavras do texto normalizado"""
+    if not isinstance(texto, str):
+        return set()
+    sem_acentos = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode()
+    palavras = _PALAVRA.findall(sem_acentos)
+    if len(palavras) <= tamanho:
+        return {zlib.crc32(' '.join(palavras).encode())} if palavras else set()
+    return {zlib.crc32(' '.join(palavras[i:i + tamanho]).encode())
+            for i in range(len(palavras) - tamanho + 1)}
+
+
+class IndiceMinHash:
+    """
+    Índice LSH de assinaturas MinHash, particionado por escopo
+
+    As permutações são hashes multiplicativos ((a·x + b) mod 2^64) >> 32,
+    com coeficientes sorteados por uma semente fixa, então assinaturas de
+    execuções diferentes são comparáveis.
+    """
+
+    def __init__(self, permutacoes=PERMUTACOES, bandas=BANDAS, limiar=LIMIAR_SIMILARIDADE, semente=1):
+        if permutacoes % bandas:
+            raise ValueError('permutacoes deve ser múltiplo de bandas')
+        aleatorio = np.random.default_rng(semente)
+        self._a = aleatorio.integers(0, 2 ** 63, (permutacoes, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = aleatorio.integers(0, 2 ** 63, (permutacoes, 1), dtype=np.uint64)
+        self.bandas = bandas
+        self.linhas_banda = permutacoes // bandas
+        self.limiar = limiar
+        self._baldes = {}
+        self._assinaturas = {}
+
+    def __len__(self):
+        return len(self._assinaturas)
+
+    def assinaturas(self, textos, bloco=20_000):
+        """
+        Assinaturas MinHash das descrições (None onde não há palavras)
+
+        Os shingles de todas as descrições são permutados juntos, em blocos
+        de ~bloco shingles, e o mínimo por descrição sai de um reduceat.
+        """
+        conjuntos = [shingles(texto) for texto in textos]
+        resultado = [None] * len(conjuntos)
+        posicoes = [posicao for posicao, conjunto in enumerate(conjuntos) if conjunto]
+
+        inicio = 0
+        while inicio < len(posicoes):
+            fim, total = inicio, 0
+            while fim < len(posicoes) and (total == 0 or total + len(conjuntos[posicoes[fim]]) <= bloco):
+                total += len(conjuntos[posicoes[fim]])
+                fim += 1
+            grupo = posicoes[inicio:fim]
+            tamanhos = np.array([len(conjuntos[posicao]) for posicao in grupo])
+            valores = np.fromiter((valor for posicao in grupo for valor in conjuntos[posicao]),
+                                  dtype=np.uint64, count=int(tamanhos.sum()))
+            permutados = (self._a * valores + self._b) >> np.uint64(32)  # permutações x shingles
+            minimos = np.minimum.reduceat(permutados, np.r_[0, np.cumsum(tamanhos)[:-1]], axis=1)
+            for posicao, minimo in zip(grupo, np.ascontiguousarray(minimos.T, dtype=np.uint32)):
+                resultado[posicao] = minimo
+            inicio = fim
+        return resultado
+
+    def _chaves(self, escopo, assinatura):
+        bandas = assinatura.reshape(self.bandas, self.linhas_banda).view(f'V{4 * self.linhas_banda}')
+        return [(escopo, banda, valor) for banda, valor in enumerate(bandas.ravel().tolist())]
+
+    def consultar(self, escopo, assinatura):
+        """Lista de (chave, similaridade) das entradas indexadas acima do limiar, da mais parecida"""
+        candidatos = set()
+        for chave_balde in self._chaves(escopo, assinatura):
+            candidatos.update(self._baldes.get(chave_balde, ()))
+
+        encontrados = []
+        for chave in candidatos:
+            similaridade = float(np.mean(self._assinaturas[chave] == assinatura))
+            if similaridade >= self.limiar:
+                encontrados.append((chave, similaridade))
+        return sorted(encontrados, key=lambda par: -par[1])
+
+    def adicionar(self, chave, escopo, assinatura):
+        """Indexa a assinatura de uma entrada"""
+        self._assinaturas[chave] = assinatura
+        for chave_balde in self._chaves(escopo, assinatura):
+            self._baldes.setdefault(chave_balde, []).append(chave)
+
+
+# ==================== DETECTOR ====================
+
+class DetectorDuplicatas:
+    """
+    Duplicatas exatas e quase duplicatas, com estado entre chamadas
+
+    As chaves das linhas são os valores da coluna id (ou o índice, se não
+    houver id); cada duplicata aponta para a primeira ocorrência.
+    """
+
+    def __init__(self, quase_duplicatas=True, **opcoes_minhash):
+        self._exatas = {}  # hash -> (chave, linha normalizada)
+        self._original = {}  # chave de uma linha do índice MinHash -> chave da primeira ocorrência
+        self.indice = IndiceMinHash(**opcoes_minhash) if quase_duplicatas else None
+
+    def indexar(self, df):
+        """Registra linhas já aceitas (sem conferi-las)"""
+        self._percorrer(df, conferir=False)
+
+    def verificar(self, df):
+        """
+        Confere as linhas contra as indexadas e as anteriores do lote, e as indexa
+
+        Retorna um DataFrame com uma linha por duplicata encontrada: chave,
+        original, tipo ('exata' ou 'quase') e similaridade.
+        """
+        return pd.DataFrame(self._percorrer(df, conferir=True),
+                            columns=['chave', 'original', 'tipo', 'similaridade'])
+
+    def _percorrer(self, df, conferir):
+        normalizado = normalizar(df)
+        hashes = pd.util.hash_pandas_object(normalizado, index=False).to_numpy().tolist()
+        chaves = df['id'].tolist() if 'id' in df.columns else df.index.tolist()
+        linhas = list(normalizado.itertuples(index=False, name=None))
+        escopos = list(zip(*(normalizado[coluna].tolist() for coluna in COLUNAS_ESCOPO)))
+        descricoes = df['Descricao'].tolist() if 'Descricao' in df.columns else [None] * len(df)
+        assinaturas = self.indice.assinaturas(descricoes) if self.indice is not None else [None] * len(df)
+
+        duplicatas = []
+        for chave, valor, linha, escopo, assinatura in zip(chaves, hashes, linhas, escopos, assinaturas):
+            existente = self._exatas.get(valor)
+            if existente is not None and existente[1] == linha:
+                if conferir:
+                    duplicatas.append((chave, existente[0], 'exata', 1.0))
+                continue
+            if existente is None:
+                self._exatas[valor] = (chave, linha)
+
+            if assinatura is None:
+                continue
+            if conferir:
+                parecidas = self.indice.consultar(escopo, assinatura)
+                if parecidas:
+                    semelhante, similaridade = parecidas[0]
+                    self._original[chave] = self._original[semelhante]
+                    duplicatas.append((chave, self._original[chave], 'quase', similaridade))
+            self._original.setdefault(chave, chave)
+            self.indice.adicionar(chave, escopo, assinatura)
+        return duplicatas
+
+
+def linhas_existentes(bd, df):
+    """
+    Linhas da tabela acidentes nos escopos (Data, Estado) presentes em df
+
+    É o que basta indexar para conferir df contra o banco na carga
+    incremental: duplicatas exatas e quase duplicatas só ocorrem dentro do
+    mesmo escopo.
+    """
+    escopos = normalizar(df)[COLUNAS_ESCOPO].drop_duplicates()
+    bd.register('escopos_novos', escopos)
+    try:
+        return bd.execute(f"""
+            SELECT a.* EXCLUDE (Data), strftime(a.Data, '{FORMATO_DATA}') AS Data
+            FROM acidentes a
+            JOIN escopos_novos e
+              ON strftime(a.Data, '{FORMATO_DATA}') = e.Data AND a.Estado::VARCHAR = e.Estado
+            ORDER BY a.id
+        """).df()
+    finally:
+        bd.unregister('escopos_novos')
@@ -0,0 +1,378 @@
+"""
+Esquema - Layout físico da tabela acidentes
+
+Centraliza o DDL usado pela aplicação e pelos scripts de carga:
+- colunas categóricas (país, setor, níveis, gênero, tipo de trabalhador e
+  parte do corpo) gravadas como ENUM, com os valores tirados dos dados;
+- linhas gravadas em ordem de Data, para que os filtros de período
+  descartem row groups inteiros pelas estatísticas min/max (zone maps);
+- coluna Mes (primeiro dia do mês) calculada na carga, em vez de
+  date_trunc/strftime por linha em cada consulta mensal;
+- Parte_Corpo vazia na origem preenchida na carga pelo classificador de
+  app/parte_corpo.py, registrado como UDF do DuckDB.
+
+Alternativamente, os acidentes podem ficar em Parquet particionado por
+Ano/Mes/Pais (layout Hive); nesse caso acidentes é uma view sobre
+read_parquet com os mesmos nomes e tipos de colunas da tabela.
+"""
+import glob
+import logging
+import os
+
+from app.parte_corpo import NOME_UDF, registrar_udf
+from app.versao_dados import caminho_do_banco, registrar_nova_versao
+
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_CSV = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
+
+# Colunas na ordem do CSV
+COLUNAS_ORIGEM = ['id', 'Data', 'Pais', 'Estado', 'Setor_Industrial', 'Nivel_Acidente',
+                  'Nivel_Acidente_Potencial', 'Genero', 'Tipo_Trabalhador', 'Risco_Critico',
+                  'Descricao', 'Parte_Corpo']
+
+# Colunas de domínio pequeno e fechado, gravadas como ENUM
+COLUNAS_CATEGORICAS = ['Pais', 'Setor_Industrial', 'Nivel_Acidente', 'Nivel_Acidente_Potencial',
+                       'Genero', 'Tipo_Trabalhador', 'Parte_Corpo']
+
+
+def nome_tipo(coluna):
+    """Nome do tipo ENUM de uma coluna categórica: Pais -> categoria_pais"""
+    return f'categoria_{coluna.lower()}'
+
+
+def _ddl_tabela():
+    return f"""
+        CREATE TABLE acidentes (
+            id INTEGER PRIMARY KEY,
+            Data TIMESTAMP,
+            Pais {nome_tipo('Pais')},
+            Estado VARCHAR(200),
+            Setor_Industrial {nome_tipo('Setor_Industrial')},
+            Nivel_Acidente {nome_tipo('Nivel_Acidente')},
+            Nivel_Acidente_Potencial {nome_tipo('Nivel_Acidente_Potencial')},
+            Genero {nome_tipo('Genero')},
+            Tipo_Trabalhador {nome_tipo('Tipo_Trabalhador')},
+            Risco_Critico VARCHAR(200),
+            Descricao TEXT,
+            Parte_Corpo {nome_tipo('Parte_Corpo')},
+            Mes DATE
+        )
+    """
+
+
+def _colunas_como_texto():
+    """Lista de colunas da origem com as categóricas convertidas para VARCHAR"""
+    return ', '.join(f'{coluna}::VARCHAR AS {coluna}' if coluna in COLUNAS_CATEGORICAS
+                     else coluna for coluna in COLUNAS_ORIGEM)
+
+
+def _recriar_tipos(bd, origem):
+    """Recria os tipos ENUM com os valores presentes na origem, em ordem alfabética"""
+    for coluna in COLUNAS_CATEGORICAS:
+        bd.execute(f"DROP TYPE IF EXISTS {nome_tipo(coluna)}")
+        bd.execute(f"""
+            CREATE TYPE {nome_tipo(coluna)} AS ENUM (
+                SELECT DISTINCT {coluna}::VARCHAR FROM {origem}
+                WHERE {coluna} IS NOT NULL ORDER BY 1
+            )
+        """)
+
+
+def _classificar_partes_corpo(bd, tabela):
+    """Preenche Parte_Corpo NULL da tabela de carga a partir da Descricao"""
+    registrar_udf(bd)
+    bd.execute(f"""
+        UPDATE {tabela} SET Parte_Corpo = {NOME_UDF}(Descricao)
+        WHERE Parte_Corpo IS NULL
+    """)
+
+
+# ==================== INSPEÇÃO ====================
+
+def tabela_existe(bd):
+    """Indica se a tabela acidentes existe no banco"""
+    return bd.execute("""
+        SELECT COUNT(*) FROM duckdb_tables()
+        WHERE table_name = 'acidentes' AND database_name = current_database()
+    """).fetchone()[0] > 0
+
+
+def visao_existe(bd):
+    """Indica se acidentes é uma view (armazenamento em Parquet)"""
+    return bd.execute("""
+        SELECT COUNT(*) FROM duckdb_views()
+        WHERE view_name = 'acidentes' AND database_name = current_database()
+    """).fetchone()[0] > 0
+
+
+def esquema_otimizado(bd):
+    """Indica se a tabela acidentes já está no layout com ENUM e coluna Mes"""
+    tipos = dict(bd.execute("""
+        SELECT column_name, data_type FROM duckdb_columns()
+        WHERE table_name = 'acidentes' AND database_name = current_database()
+    """).fetchall())
+    return 'Mes' in tipos and all(tipos.get(coluna, '').startswith('ENUM')
+                                  for coluna in COLUNAS_CATEGORICAS)
+
+
+# ==================== CARGA ====================
+
+def carregar_acidentes(bd, origem):
+    """
+    Recria a tabela acidentes no layout otimizado a partir de uma relação SQL
+
+    A origem pode ser um read_csv(...), a própria tabela antiga (migração)
+    ou a view sobre o Parquet (volta para o armazenamento em tabela).
+    Parte_Corpo vazia é classificada na tabela de carga, antes dos tipos ENUM
+    serem recriados com os valores presentes (em ordem alfabética, para que
+    ORDER BY nessas colunas continue igual ao VARCHAR).
+    Tudo acontece em uma transação. Retorna o número de linhas carregadas.
+    """
+    colunas = ', '.join(COLUNAS_ORIGEM)
+
+    bd.execute("BEGIN TRANSACTION")
+    try:
+        bd.execute(f"""
+            CREATE OR REPLACE TEMP TABLE acidentes_carga AS
+            SELECT {_colunas_como_texto()} FROM {origem}
+        """)
+        _classificar_partes_corpo(bd, 'acidentes_carga')
+        bd.execute(f"DROP {'VIEW' if visao_existe(bd) else 'TABLE'} IF EXISTS acidentes")
+        _recriar_tipos(bd, 'acidentes_carga')
+        bd.execute(_ddl_tabela())
+        bd.execute(f"""
+            INSERT INTO acidentes
+            SELECT {colunas}, date_trunc('month', Data)::DATE
+            FROM acidentes_carga
+            ORDER BY Data NULLS LAST, id
+        """)
+        bd.execute("DROP TABLE acidentes_carga")
+        bd.execute("COMMIT")
+    except Exception:
+        bd.execute("ROLLBACK")
+        raise
+
+    # Libera os blocos da tabela antiga e grava as estatísticas dos row groups
+    bd.execute("CHECKPOINT")
+    return bd.execute("SELECT COUNT(*) FROM acidentes").fetchone()[0]
+
+
+def origem_csv(caminho_csv=ARQUIVO_CSV):
+    """Relação SQL que lê o CSV de acidentes (valores 'NA' viram NULL)"""
+    caminho = caminho_csv.replace("'", "''")
+    return f"read_csv('{caminho}', header = true, nullstr = 'NA')"
+
+
+def carregar_csv(bd, caminho_csv=ARQUIVO_CSV):
+    """Carrega o CSV de acidentes e renova a versão dos dados"""
+    total = carregar_acidentes(bd, origem_csv(caminho_csv))
+    registrar_nova_versao(caminho_do_banco(bd))
+    return total
+
+
+def migrar_esquema(bd, renovar_versao=True):
+    """
+    Converte uma tabela acidentes no layout antigo (VARCHAR, ordem do CSV)
+    para o layout otimizado, preservando os dados. Retorna o número de linhas
+
+    renovar_versao=False deixa a versão dos dados para quem publica o banco
+    (um snapshot, por exemplo, tem a versão renovada por publicar_snapshot).
+    """
+    total = carregar_acidentes(bd, f"(SELECT {', '.join(COLUNAS_ORIGEM)} FROM acidentes)")
+    if renovar_versao:
+        registrar_nova_versao(caminho_do_banco(bd))
+    return total
+
+
+# ==================== CARGA INCREMENTAL ====================
+
+def _expressao_hash(prefixo=''):
+    """md5 do conteúdo da linha (JSON da lista de colunas, sem ambiguidade com NULL)"""
+    valores = ', '.join(f'{prefixo}{coluna}::VARCHAR' for coluna in COLUNAS_ORIGEM)
+    return f"md5(to_json([{valores}])::VARCHAR)"
+
+
+def atualizar_incremental(bd, origem, remover_ausentes=False):
+    """
+    Aplica à tabela acidentes apenas as linhas novas ou alteradas da origem
+
+    Compara o hash do conteúdo de cada linha da origem com o da linha de
+    mesmo id na tabela; só as diferentes vão para a tabela temporária de
+    alterações, aplicada com INSERT ... ON CONFLICT em uma transação (a
+    tabela nunca fica vazia para quem está consultando). Com
+    remover_ausentes, ids que não estão na origem são apagados.
+
+    O DuckDB não permite acrescentar valores a um ENUM; se as alterações
+    trouxerem uma categoria nova, a tabela é recriada por
+    carregar_acidentes, também em uma transação.
+
+    Retorna {'inserted', 'updated', 'unchanged', 'deleted', 'rebuilt'}.
+    """
+    colunas = ', '.join(COLUNAS_ORIGEM)
+
+    try:
+        bd.execute(f"""
+            CREATE OR REPLACE TEMP TABLE acidentes_entrada AS
+            SELECT {_colunas_como_texto()} FROM {origem}
+            QUALIFY row_number() OVER (PARTITION BY id) = 1
+        """)
+        _classificar_partes_corpo(bd, 'acidentes_entrada')
+        bd.execute(f"""
+            CREATE OR REPLACE TEMP TABLE acidentes_alteracoes AS
+            SELECT e.*, a.id IS NULL AS novo
+            FROM acidentes_entrada e
+            LEFT JOIN (SELECT id, {_expressao_hash()} AS hash FROM acidentes) a ON a.id = e.id
+            WHERE a.id IS NULL OR a.hash <> {_expressao_hash('e.')}
+        """)
+
+        total, inseridos = bd.execute("""
+            SELECT (SELECT COUNT(*) FROM acidentes_entrada), COUNT(*) FILTER (WHERE novo)
+            FROM acidentes_alteracoes
+        """).fetchone()
+        alterados = bd.execute("SELECT COUNT(*) FROM acidentes_alteracoes").fetchone()[0]
+        ausentes = bd.execute("""
+            SELECT COUNT(*) FROM acidentes WHERE id NOT IN (SELECT id FROM acidentes_entrada)
+        """).fetchone()[0] if remover_ausentes else 0
+
+        resultado = {'inserted': inseridos, 'updated': alterados - inseridos,
+                     'unchanged': total - alterados, 'deleted': ausentes, 'rebuilt': False}
+        if not alterados and not ausentes:
+            return resultado
+
+        if _tem_categorias_novas(bd, 'acidentes_alteracoes'):
+            filtro_ausentes = ("id IN (SELECT id FROM acidentes_entrada)" if remover_ausentes
+                               else "TRUE")
+            carregar_acidentes(bd, f"""(
+                SELECT {_colunas_como_texto()} FROM acidentes
+                WHERE id NOT IN (SELECT id FROM acidentes_alteracoes) AND {filtro_ausentes}
+                UNION ALL
+                SELECT {colunas} FROM acidentes_alteracoes
+            )""")
+            resultado['rebuilt'] = True
+            return resultado
+
+        atualizacoes = ', '.join(f'{coluna} = EXCLUDED.{coluna}'
+                                 for coluna in COLUNAS_ORIGEM[1:] + ['Mes'])
+        bd.execute("BEGIN TRANSACTION")
+        try:
+            bd.execute(f"""
+                INSERT INTO acidentes
+                SELECT {colunas}, date_trunc('month', Data)::DATE
+                FROM acidentes_alteracoes
+                ORDER BY Data NULLS LAST, id
+                ON CONFLICT (id) DO UPDATE SET {atualizacoes}
+            """)
+            if remover_ausentes:
+                bd.execute("DELETE FROM acidentes WHERE id NOT IN (SELECT id FROM acidentes_entrada)")
+            bd.execute("COMMIT")
+        except Exception:
+            bd.execute("ROLLBACK")
+            raise
+        return resultado
+    finally:
+        bd.execute("DROP TABLE IF EXISTS acidentes_alteracoes")
+        bd.execute("DROP TABLE IF EXISTS acidentes_entrada")
+
+
+def _tem_categorias_novas(bd, origem):
+    """Indica se alguma coluna categórica da origem tem valor fora do ENUM atual"""
+    condicoes = ' OR '.join(
+        f'({coluna} IS NOT NULL AND TRY_CAST({coluna} AS {nome_tipo(coluna)}) IS NULL)'
+        for coluna in COLUNAS_CATEGORICAS)
+    return bd.execute(f"SELECT COUNT(*) FROM {origem} WHERE {condicoes}").fetchone()[0] > 0
+
+
+# ==================== PARQUET PARTICIONADO ====================
+
+# Colunas de partição, na ordem dos diretórios: Ano=2016/Mes=2016-03-01/Pais=Brasil
+COLUNAS_PARTICAO = ['Ano', 'Mes', 'Pais']
+
+
+def origem_parquet(pasta):
+    """Relação SQL que lê todas as partições (as colunas de partição vêm do caminho)"""
+    caminho = os.path.join(pasta, '**', '*.parquet').replace("'", "''")
+    return (f"read_parquet('{caminho}', hive_partitioning = true, "
+            "hive_types = {'Ano': INTEGER, 'Mes': DATE, 'Pais': VARCHAR})")
+
+
+def particoes_existem(pasta):
+    """Indica se a pasta já tem algum arquivo Parquet"""
+    return next(glob.iglob(os.path.join(pasta, '**', '*.parquet'), recursive=True), None) is not None
+
+
+def anexar_particoes(bd, origem, pasta):
+    """
+    Grava em Parquet as linhas da origem cujo id ainda não está na pasta
+
+    Cada carga cria arquivos novos dentro das partições (Ano/Mes/Pais) sem
+    reescrever os existentes; as linhas de cada arquivo ficam em ordem de
+    Data. Retorna o número de linhas gravadas.
+    """
+    existentes = (f"SELECT id FROM {origem_parquet(pasta)}" if particoes_existem(pasta)
+                  else "SELECT NULL::INTEGER AS id WHERE false")
+
+    bd.execute(f"""
+        CREATE OR REPLACE TEMP TABLE acidentes_novos AS
+        SELECT {_colunas_como_texto()} FROM {origem}
+        WHERE id NOT IN ({existentes})
+    """)
+    try:
+        _classificar_partes_corpo(bd, 'acidentes_novos')
+        total = bd.execute("SELECT COUNT(*) FROM acidentes_novos").fetchone()[0]
+        if total:
+            destino = pasta.replace("'", "''")
+            bd.execute(f"""
+                COPY (
+                    SELECT *, year(Data) AS Ano, date_trunc('month', Data)::DATE AS Mes
+                    FROM acidentes_novos
+                    ORDER BY Data NULLS LAST, id
+                ) TO '{destino}' (FORMAT parquet, PARTITION_BY ({', '.join(COLUNAS_PARTICAO)}),
+                                  APPEND, FILENAME_PATTERN 'parte_{{uuid}}')
+            """)
+    finally:
+        bd.execute("DROP TABLE IF EXISTS acidentes_novos")
+    return total
+
+
+def criar_visao_parquet(bd, pasta):
+    """
+    (Re)cria a view acidentes sobre as partições Parquet
+
+    Os tipos ENUM são recriados com os valores atuais dos arquivos e a view
+    expõe as mesmas colunas e tipos da tabela, então os serviços não mudam.
+    Filtros em Pais e Mes descartam diretórios inteiros (partition pruning).
+    Deve ser chamada novamente quando uma carga adiciona partições.
+    """
+    origem = origem_parquet(pasta)
+    colunas = ', '.join(f'{coluna}::{nome_tipo(coluna)} AS {coluna}' if coluna in COLUNAS_CATEGORICAS
+                        else coluna for coluna in COLUNAS_ORIGEM)
+
+    bd.execute("BEGIN TRANSACTION")
+    try:
+        bd.execute("DROP VIEW IF EXISTS acidentes")
+        _recriar_tipos(bd, origem)
+        bd.execute(f"CREATE VIEW acidentes AS SELECT {colunas}, Mes FROM {origem}")
+        bd.execute("COMMIT")
+    except Exception:
+        bd.execute("ROLLBACK")
+        raise
+
+
+def inicializar_parquet(bd, pasta):
+    """
+    Prepara o armazenamento em Parquet: carrega o CSV (ou a tabela acidentes
+    existente no banco) quando a pasta está vazia e cria a view
+    """
+    os.makedirs(pasta, exist_ok=True)
+    if tabela_existe(bd):
+        logger.info('Movendo a tabela acidentes para Parquet em %s', pasta)
+        anexar_particoes(bd, 'acidentes', pasta)
+        bd.execute("DROP TABLE acidentes")
+        registrar_nova_versao(caminho_do_banco(bd))
+    elif not particoes_existem(pasta):
+        anexar_particoes(bd, origem_csv(), pasta)
+        registrar_nova_versao(caminho_do_banco(bd))
+
+    criar_visao_parquet(bd, pasta)
@@ -0,0 +1,221 @@
+"""
+Classificação da parte do corpo afetada a partir da descrição do acidente
+
+As palavras-chave de cada parte são compiladas uma única vez em uma
+alternância por parte. A classificação de uma série de descrições é
+vetorizada: as partes são testadas em ordem de prioridade (mais específica
+primeiro) com Series.str.contains, só sobre as descrições ainda sem
+rótulo, o que dá o mesmo resultado da busca palavra a palavra original
+(a primeira parte com alguma palavra encontrada vence).
+
+O classificador também é registrado como UDF do DuckDB
+(classificar_parte_corpo), usada pela ingestão de app/esquema.py para
+preencher Parte_Corpo dentro do banco.
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional: sem ele a UDF é escalar (linha a linha)
+    pa = None
+
+
+SEM_PARTE = 'Não especificado'
+
+# Palavras-chave de cada parte do corpo
+# Ordem de prioridade: mais específico primeiro
+PARTES_CORPO = {
+    # Cabeça e Face
+    'Olhos': [
+        'olho', 'olhos', 'eye', 'eyes', 'córnea', 'pálpebra', 'visão', 
+        'pupila', 'íris', 'retina', 'cego', 'cegueira'
+    ],
+    'Face': [
+        'rosto', 'face', 'facial', 'bochecha', 'zigomático', 'maxilar',
+        'queixo', 'testa', 'nariz', 'boca', 'lábio', 'dente', 'mandíbula'
+    ],
+    'Cabeça': [
+        'cabeça', 'crânio', 'craniano', 'head', 'skull', 'couro cabeludo',
+        'têmpora', 'occipital', 'frontal'
+    ],
+    'Orelha': [
+        'orelha', 'ouvido', 'ear', 'audição', 'tímpano', 'auricular'
+    ],
+    'Pescoço': [
+        'pescoço', 'cervical', 'neck', 'garganta', 'throat', 'traqueia',
+        'laringe', 'nuca'
+    ],
+    
+    # Membros Superiores - Específico para Esquerdo/Direito
+    'Mão Esquerda': [
+        'mão esquerda', 'left hand', 'dedo esquerdo', 'dedos esquerdos',
+        'pulso esquerdo', 'palma esquerda', 'quirodáctilo esquerdo'
+    ],
+    'Mão Direita': [
+        'mão direita', 'right hand', 'dedo direito', 'dedos direitos',
+        'pulso direito', 'palma direita', 'quirodáctilo direito'
+    ],
+    'Braço Esquerdo': [
+        'braço esquerdo', 'left arm', 'antebraço esquerdo', 
+        'cotovelo esquerdo', 'úmero esquerdo', 'ombro esquerdo'
+    ],
+    'Braço Direito': [
+        'braço direito', 'right arm', 'antebraço direito',
+        'cotovelo direito', 'úmero direito', 'ombro direito'
+    ],
+    
+    # Membros Superiores - Genérico
+    'Mãos': [
+        'mão', 'mãos', 'hand', 'hands', 'dedo', 'dedos', 'finger', 'fingers',
+        'pulso', 'wrist', 'palma', 'punho', 'metacarpo', 'falange',
+        'quirodáctilo', 'polegar', 'indicador', 'médio', 'anelar', 'mindinho'
+    ],
+    'Braços': [
+        'braço', 'braços', 'arm', 'arms', 'antebraço', 'forearm',
+        'cotovelo', 'elbow', 'úmero', 'rádio', 'ulna', 'ombro', 'shoulder'
+    ],
+    
+    # Tronco
+    'Tórax': [
+        'tórax', 'peito', 'chest', 'peitoral', 'costela', 'esterno',
+        'clavícula', 'escápula', 'rib'
+    ],
+    'Abdômen': [
+        'abdômen', 'abdomen', 'barriga', 'belly', 'estômago', 'stomach',
+        'abdominal', 'ventre', 'umbigo'
+    ],
+    'Costas': [
+        'costas', 'back', 'dorsal', 'lombar', 'coluna', 'vértebra',
+        'espinha', 'spine', 'lombo'
+    ],
+    'Quadril': [
+        'quadril', 'hip', 'pelve', 'pélvico', 'ilíaco', 'sacro', 'cóccix'
+    ],
+    
+    # Membros Inferiores - Específico para Esquerdo/Direito
+    'Perna Esquerda': [
+        'perna esquerda', 'left leg', 'coxa esquerda', 'joelho esquerdo',
+        'canela esquerda', 'panturrilha esquerda', 'tíbia esquerda'
+    ],
+    'Perna Direita': [
+        'perna direita', 'right leg', 'coxa direita', 'joelho direito',
+        'canela direita', 'panturrilha direita', 'tíbia direita'
+    ],
+    'Pé Esquerdo': [
+        'pé esquerdo', 'left foot', 'tornozelo esquerdo', 
+        'calcanhar esquerdo', 'dedos do pé esquerdo'
+    ],
+    'Pé Direito': [
+        'pé direito', 'right foot', 'tornozelo direito',
+        'calcanhar direito', 'dedos do pé direito'
+    ],
+    
+    # Membros Inferiores - Genérico
+    'Pernas': [
+        'perna', 'pernas', 'leg', 'legs', 'coxa', 'thigh', 
+        'joelho', 'knee', 'canela', 'panturrilha', 'calf',
+        'fêmur', 'tíbia', 'fíbula', 'patela'
+    ],
+    'Pés': [
+        'pé', 'pés', 'foot', 'feet', 'tornozelo', 'ankle',
+        'calcanhar', 'heel', 'dedos do pé', 'toe', 'toes',
+        'metatarso', 'tarso', 'calcâneo', 'planta do pé'
+    ],
+    
+    # Múltiplas partes
+    'Múltiplas': [
+        'várias partes', 'multiple', 'politraumatismo', 'politrauma',
+        'corpo todo', 'whole body', 'várias regiões'
+    ]
+}
+
+
+# Uma alternância por parte, na ordem de prioridade: \b(?:olho|olhos|...)\b
+PADROES_PARTES = [
+    (parte, re.compile(r'\b(?:' + '|'.join(re.escape(palavra) for palavra in palavras) + r')\b'))
+    for parte, palavras in PARTES_CORPO.items()
+]
+
+NOME_UDF = 'classificar_parte_corpo'
+
+# Abaixo disso o custo de iniciar os processos supera o ganho
+MINIMO_POR_PROCESSO = 50_000
+
+
+def detectar_parte_corpo(descricao):
+    """
+    Detecta a parte do corpo afetada baseada na descrição do acidente
+    Retorna a parte do corpo em português para o mapa de calor
+    """
+    if not descricao or pd.isna(descricao):
+        return SEM_PARTE
+
+    texto = descricao.lower()
+    for parte, padrao in PADROES_PARTES:
+        if padrao.search(texto):
+            return parte
+    return SEM_PARTE
+
+
+def classificar_partes_corpo(descricoes, processos=1):
+    """
+    Classifica uma série de descrições, retornando uma Series de rótulos
+
+    Com processos > 1, séries grandes são divididas em blocos classificados
+    em paralelo (o regex do Python não libera o GIL).
+    """
+    serie = pd.Series(descricoes)
+    processos = min(processos, len(serie) // MINIMO_POR_PROCESSO)
+    if processos <= 1:
+        return _classificar_bloco(serie)
+
+    blocos = np.array_split(np.arange(len(serie)), processos)
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        rotulos = list(executor.map(_classificar_bloco, [serie.iloc[bloco] for bloco in blocos]))
+    return pd.concat(rotulos)
+
+
+def _classificar_bloco(serie):
+    """Classificação vetorizada de um bloco de descrições"""
+    textos = serie.where(serie.map(lambda valor: isinstance(valor, str)), '').str.lower()
+
+    rotulos = np.full(len(textos), SEM_PARTE, dtype=object)
+    pendentes = np.flatnonzero(textos.str.len().to_numpy() > 0)
+    for parte, padrao in PADROES_PARTES:
+        if not len(pendentes):
+            break
+        encontrou = textos.iloc[pendentes].str.contains(padrao).to_numpy(dtype=bool)
+        rotulos[pendentes[encontrou]] = parte
+        pendentes = pendentes[~encontrou]
+
+    return pd.Series(rotulos, index=serie.index, name='Parte_Corpo')
+
+
+def _classificar_arrow(descricoes):
+    """Corpo da UDF vetorizada: um vetor do DuckDB por chamada, como array Arrow"""
+    return pa.array(_classificar_bloco(descricoes.to_pandas()).tolist(), type=pa.string())
+
+
+def registrar_udf(bd):
+    """
+    Registra classificar_parte_corpo(VARCHAR) -> VARCHAR na conexão, se ainda não existe
+
+    Com pyarrow a UDF é vetorizada (type='arrow'); sem ele, escalar. Descrição
+    NULL vira 'Não especificado', como em detectar_parte_corpo.
+    """
+    existe = bd.execute("""
+        SELECT COUNT(*) FROM duckdb_functions() WHERE function_name = ?
+    """, [NOME_UDF]).fetchone()[0]
+    if existe:
+        return
+
+    if pa is not None:
+        bd.create_function(NOME_UDF, _classificar_arrow, ['VARCHAR'], 'VARCHAR',
+                           type='arrow', null_handling='special')
+    else:
+        bd.create_function(NOME_UDF, detectar_parte_corpo, ['VARCHAR'], 'VARCHAR',
+                           null_handling='special')
@@ -1,10 +1,16 @@
 """
 Rotas da aplicação - Todos os endpoints
 """
-from flask import render_template, jsonify, g, request
+from flask import render_template, jsonify, g, request, Response, stream_with_context
+from app.database import obter_pool
+from app.cache import armazenar_em_cache, obter_cache
+from app.cubo import obter_cubo
+from app.busca import obter_indice_busca
+from app.utils import gerar_ndjson, gerar_array_json
+from app.serializacao import resposta_json
 from app.services import (
     ServicoAcidentes, ServicoEstatisticas, ServicoDashboard,
-    ServicoGraficos, ServicoSeguranca, ServicoAcoes
+    ServicoGraficos, ServicoSeguranca, ServicoAcoes, ServicoExportacao
 )
 
 
@@ -27,27 +33,73 @@ def registrar_rotas(app):
     # ==================== API - ACIDENTES ====================
     
     @app.route('/api/accidents')
+    @armazenar_em_cache
     def obter_acidentes():
         """Endpoint API para retornar todos os acidentes"""
+        # Modo streaming: lotes lidos do banco e enviados à medida que são serializados
+        # (?stream=ndjson -> um acidente por linha; ?stream=json -> o mesmo array, em partes)
+        formato_stream = request.args.get('stream')
+        if formato_stream == 'ndjson':
+            return transmitir(lambda cursor: gerar_ndjson(
+                ServicoAcidentes(cursor).iterar_todos_acidentes()), 'application/x-ndjson')
+        if formato_stream == 'json':
+            return transmitir(lambda cursor: gerar_array_json(
+                ServicoAcidentes(cursor).iterar_todos_acidentes()), 'application/json')
+        
+        # ?shape=columns -> formato compacto {columns, rows}
         servico = ServicoAcidentes(g.bd)
-        acidentes = servico.obter_todos_acidentes()
-        return jsonify(acidentes)
+        acidentes = servico.obter_todos_acidentes(formato=request.args.get('shape', 'records'))
+        return resposta_json(acidentes)
+    
+    def transmitir(gerar, mimetype, cabecalhos=None):
+        """
+        Resposta em streaming gerada a partir de um cursor do banco
+        
+        O gerador retira seu próprio cursor do pool e só o devolve ao fim da
+        transmissão, já que o teardown da requisição ocorre antes disso.
+        """
+        pool = obter_pool(app)
+        
+        def gerar_com_cursor():
+            cursor = pool.retirar()
+            try:
+                yield from gerar(cursor)
+            finally:
+                pool.devolver(cursor)
+        
+        return Response(stream_with_context(gerar_com_cursor()), mimetype=mimetype,
+                        headers=cabecalhos)
     
     @app.route('/api/accidents/filtered')
+    @armazenar_em_cache
     def obter_acidentes_filtrados():
         """Endpoint API para retornar acidentes filtrados com paginação"""
-        servico = ServicoAcidentes(g.bd)
+        servico = ServicoAcidentes(g.bd, obter_indice_busca(app, g.bd))
         
         pagina = int(request.args.get('page', 1)) #essa API é paginada.
         por_pagina = int(request.args.get('perPage', 10))
         consulta_busca = request.args.get('search', '').strip()
+        formato = request.args.get('shape', 'records')
+        
+        # Paginação por cursor (keyset) quando o cliente envia 'cursor' (vazio = primeira página);
+        # sem ele, mantém a paginação por 'page' e a resposta em lista
+        if 'cursor' in request.args:
+            try:
+                resultado = servico.obter_acidentes_por_cursor(
+                    por_pagina, consulta_busca, request.args['cursor'], formato=formato)
+            except ValueError as erro:
+                return jsonify({'error': str(erro)}), 400
+            return resposta_json(resultado)
         
-        acidentes = servico.obter_acidentes_filtrados(pagina, por_pagina, consulta_busca)
-        return jsonify(acidentes)
+        ordenacao = request.args.get('sort', 'date')
+        acidentes = servico.obter_acidentes_filtrados(pagina, por_pagina, consulta_busca,
+                                                      ordenacao=ordenacao, formato=formato)
+        return resposta_json(acidentes)
     
     # ==================== API - ESTATÍSTICAS ====================
     
     @app.route('/api/statistics')
+    @armazenar_em_cache
     def obter_estatisticas():
         """Endpoint API para retornar estatísticas agregadas"""
         servico = ServicoEstatisticas(g.bd)
@@ -55,6 +107,7 @@ def registrar_rotas(app):
         return jsonify(estatisticas)
     
     @app.route('/api/safety-record')
+    @armazenar_em_cache
     def obter_registro_seguranca():
         """Endpoint API para retornar dados do recorde de segurança"""
         servico = ServicoSeguranca(g.bd)
@@ -62,6 +115,7 @@ def registrar_rotas(app):
         return jsonify(registro)
     
     @app.route('/api/next-actions')
+    @armazenar_em_cache
     def obter_proximas_acoes():
         """Endpoint API para retornar próximas ações baseadas nos dados históricos"""
         servico = ServicoAcoes(g.bd)
@@ -71,40 +125,100 @@ def registrar_rotas(app):
     # ==================== API - DASHBOARD ====================
     
     @app.route('/api/dashboard/stats')
+    @armazenar_em_cache
     def obter_estatisticas_dashboard():
         """Endpoint API para retornar estatísticas do dashboard com filtros"""
-        servico = ServicoDashboard(g.bd)
+        servico = ServicoDashboard(g.bd, obter_cubo(app, g.bd))
         estatisticas = servico.obter_estatisticas_dashboard()
         return jsonify(estatisticas)
     
+    @app.route('/api/dashboard/bundle')
+    @armazenar_em_cache
+    def obter_pacote_dashboard():
+        """Endpoint API para retornar todos os painéis do dashboard em uma requisição"""
+        servico = ServicoDashboard(g.bd, obter_cubo(app, g.bd), obter_indice_busca(app, g.bd))
+        
+        intervalo_meses = request.args.get('range', 'all')
+        filtro_pais = request.args.get('filterCountry', 'all')
+        por_pagina = int(request.args.get('perPage', 10))
+        consulta_busca = request.args.get('search', '').strip()
+        
+        pacote = servico.obter_pacote_dashboard(intervalo_meses, filtro_pais,
+                                                por_pagina, consulta_busca)
+        return resposta_json(pacote)
+    
     # ==================== API - GRÁFICOS ====================
     
     @app.route('/api/charts/monthly')
+    @armazenar_em_cache
     def obter_grafico_mensal():
         """Endpoint API para retornar dados do gráfico mensal"""
-        servico = ServicoGraficos(g.bd)
+        servico = ServicoGraficos(g.bd, obter_cubo(app, g.bd))
         intervalo_meses = request.args.get('range', 'all')
         dados = servico.obter_dados_grafico_mensal(intervalo_meses)
         return jsonify(dados)
     
     @app.route('/api/charts/sectors')
+    @armazenar_em_cache
     def obter_grafico_setores():
         """Endpoint API para retornar dados do gráfico de setores"""
-        servico = ServicoGraficos(g.bd)
+        servico = ServicoGraficos(g.bd, obter_cubo(app, g.bd))
         dados = servico.obter_dados_grafico_setores()
         return jsonify(dados)
     
     @app.route('/api/charts/locations')
+    @armazenar_em_cache
     def obter_grafico_localizacoes():
         """Endpoint API para retornar dados do gráfico de localização"""
-        servico = ServicoGraficos(g.bd)
+        servico = ServicoGraficos(g.bd, obter_cubo(app, g.bd))
         filtro_pais = request.args.get('filterCountry', 'all')
         dados = servico.obter_dados_grafico_localizacoes(filtro_pais)
         return jsonify(dados)
     
     @app.route('/api/heatmap/bodyparts')
+    @armazenar_em_cache
     def obter_mapa_calor_partes_corpo():
         """Endpoint API para retornar dados do mapa de calor"""
-        servico = ServicoGraficos(g.bd)
+        servico = ServicoGraficos(g.bd, obter_cubo(app, g.bd))
         dados = servico.obter_dados_mapa_calor_partes_corpo()
         return jsonify(dados)
+    
+    # ==================== API - EXPORTAÇÃO ====================
+    
+    @app.route('/api/export')
+    def exportar_acidentes():
+        """Endpoint API para exportar os acidentes filtrados (arrow, parquet ou csv)"""
+        formato = request.args.get('format', 'csv')
+        if formato not in ServicoExportacao.FORMATOS:
+            return jsonify({'error': f'Formato inválido: {formato}'}), 400
+        if not ServicoExportacao.formato_disponivel(formato):
+            return jsonify({'error': 'Exportação Arrow requer o pacote pyarrow'}), 501
+        
+        servico = ServicoExportacao(g.bd, obter_indice_busca(app, g.bd))
+        consulta, parametros = servico.montar_consulta(request.args.get('search', '').strip())
+        
+        mimetype, extensao = ServicoExportacao.FORMATOS[formato]
+        cabecalhos = {'Content-Disposition': f'attachment; filename=acidentes.{extensao}'}
+        
+        if formato == 'arrow':
+            return transmitir(lambda cursor: ServicoExportacao(cursor).gerar_arrow(consulta, parametros),
+                              mimetype, cabecalhos)
+        
+        # Parquet e CSV: COPY ... TO em arquivo temporário, removido ao fim da resposta
+        caminho = servico.exportar_arquivo(consulta, parametros, formato)
+        resposta = Response(ServicoExportacao.gerar_arquivo(caminho), mimetype=mimetype,
+                            headers=cabecalhos)
+        resposta.call_on_close(lambda: ServicoExportacao.remover_arquivo(caminho))
+        return resposta
+    
+    # ==================== API - MÉTRICAS ====================
+    
+    @app.route('/api/metrics')
+    def obter_metricas():
+        """Endpoint API para retornar métricas internas da aplicação"""
+        indice = app.extensions.get('indice_busca')
+        return jsonify({
+            'pool': obter_pool(app).metricas(),
+            'cache': obter_cache(app).metricas(),
+            'search': indice.metricas() if indice is not None else None
+        })
@@ -0,0 +1,105 @@
+"""
+Serialização - Conversão colunar dos resultados do DuckDB para JSON
+
+Os resultados são lidos por coluna (fetchnumpy), as datas são formatadas
+de uma vez com NumPy e a codificação usa o orjson quando disponível.
+Além da lista de objetos, há o formato compacto {columns, rows}.
+"""
+import numpy as np
+from flask import current_app
+
+from app.utils import formatar_data
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, usa o codificador JSON do Flask
+    orjson = None
+
+
+# ==================== LEITURA COLUNAR ====================
+
+def ler_colunas(resultado):
+    """
+    Lê todo o resultado de uma consulta por coluna
+
+    Retorna (nomes, colunas), em que cada coluna é uma lista de valores
+    Python já prontos para JSON (datas em ISO 8601, nulos como None).
+    """
+    nomes = [descricao[0] for descricao in resultado.description]
+    arrays = resultado.fetchnumpy()
+    return nomes, [_coluna_para_lista(arrays[nome]) for nome in nomes]
+
+
+def _coluna_para_lista(array):
+    """Converte um array (possivelmente mascarado) em lista Python"""
+    if np.issubdtype(array.dtype, np.datetime64):
+        return _formatar_datas(array)
+
+    mascara = np.ma.getmaskarray(array)
+    valores = np.ma.getdata(array).astype(object)
+    if array.dtype == object:
+        # Colunas ENUM chegam como objetos, com NaN no lugar dos nulos
+        mascara = mascara | np.asarray(valores != valores, dtype=bool)
+    if mascara.any():
+        valores[mascara] = None
+    return valores.tolist()
+
+
+def _formatar_datas(array):
+    """Formata timestamps como isoformat() em uma única operação vetorizada"""
+    mascara = np.ma.getmaskarray(array)
+    datas = np.ma.getdata(array).astype('datetime64[us]')
+
+    textos = np.datetime_as_string(datas, unit='s').astype(object)
+    fracionarias = (datas.astype(np.int64) % 1_000_000) != 0
+    if fracionarias.any():
+        textos[fracionarias] = np.datetime_as_string(datas[fracionarias], unit='us')
+    textos[mascara] = None
+    return textos.tolist()
+
+
+# ==================== FORMATOS DE SAÍDA ====================
+
+def registros(nomes, colunas):
+    """Lista de objetos: [{coluna: valor, ...}, ...]"""
+    return [dict(zip(nomes, linha)) for linha in zip(*colunas)]
+
+
+def formato_colunar(nomes, colunas):
+    """Formato compacto: {columns: [...], rows: [[...], ...]}"""
+    return {'columns': nomes, 'rows': [list(linha) for linha in zip(*colunas)]}
+
+
+def registros_de_linhas(descricao, linhas):
+    """
+    Lista de objetos a partir de linhas já lidas (fetchmany)
+
+    As colunas de data são identificadas pelo tipo em cursor.description,
+    então só essas células passam por formatar_data.
+    """
+    nomes = [coluna[0] for coluna in descricao]
+    colunas_data = [(coluna[0], i) for i, coluna in enumerate(descricao)
+                    if str(coluna[1]).startswith(('TIMESTAMP', 'DATE'))]
+
+    acidentes = []
+    for linha in linhas:
+        registro = dict(zip(nomes, linha))
+        for nome, i in colunas_data:
+            registro[nome] = formatar_data(linha[i])
+        acidentes.append(registro)
+    return acidentes
+
+
+# ==================== CODIFICAÇÃO ====================
+
+def codificar_json(dados):
+    """Codifica em JSON (bytes), com orjson quando instalado"""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return current_app.json.dumps(dados).encode('utf-8')
+
+
+def resposta_json(dados, status=200):
+    """Resposta JSON codificada com codificar_json"""
+    return current_app.response_class(codificar_json(dados), status=status,
+                                      mimetype='application/json')
@@ -1,8 +1,65 @@
 """
 Serviços - Toda a lógica de negócio da aplicação
 """
+import io
+import os
+import tempfile
 from datetime import datetime, timedelta
-from app.utils import ConstrutorConsulta, formatar_data, formatar_rotulo_mes
+from app.utils import (
+    ConstrutorConsulta, FiltroAcidentes, formatar_data, formatar_rotulo_mes,
+    codificar_cursor, decodificar_cursor
+)
+from app.busca import COLUNAS_BUSCA
+from app.serializacao import ler_colunas, registros, formato_colunar, registros_de_linhas
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional: só a exportação Arrow depende dele
+    pa = None
+
+
+# Colunas de um acidente com os nomes usados pela API
+COLUNAS_ACIDENTES = """
+    id, Data as date, Pais as country, Estado as local,
+    Setor_Industrial as sector, Nivel_Acidente as accidentLevel,
+    Nivel_Acidente_Potencial as potentialLevel, Genero as gender,
+    Tipo_Trabalhador as employeeType, Risco_Critico as criticalRisk,
+    Descricao as description, Parte_Corpo as bodyPart
+"""
+
+
+def _preparar_filtros(filtro, fonte=None):
+    """
+    Define a tabela de origem e o construtor de filtros de uma consulta
+    
+    Sem fonte, consulta a tabela acidentes com os filtros padrão (gênero,
+    país e período) do FiltroAcidentes. Com fonte, consulta uma tabela já filtrada.
+    """
+    construtor_consulta = ConstrutorConsulta(filtro)
+    if fonte is None:
+        construtor_consulta.adicionar_filtro_genero() \
+                    .adicionar_filtro_pais() \
+                    .adicionar_filtro_intervalo_data()
+        fonte = 'acidentes'
+    return fonte, construtor_consulta
+
+
+def _selecionar_no_cubo(cubo, filtro, fonte=None, pais=None):
+    """
+    Traduz os filtros padrão em uma seleção do cubo OLAP
+    
+    Retorna None quando a consulta deve ir ao SQL: sem cubo, com fonte já
+    filtrada ou com filtros que o cubo não consegue expressar.
+    """
+    if cubo is None or fonte is not None:
+        return None
+    return cubo.selecionar(
+        generos=filtro.generos,
+        paises=filtro.paises,
+        data_inicio=filtro.data_inicio,
+        data_fim=filtro.data_fim,
+        pais=pais
+    )
 
 
 # ==================== SERVIÇO DE ACIDENTES ====================
@@ -10,71 +67,231 @@ from app.utils import ConstrutorConsulta, formatar_data, formatar_rotulo_mes
 class ServicoAcidentes:
     """Serviço para operações com acidentes"""
     
-    def __init__(self, bd):
+    def __init__(self, bd, indice=None, filtro=None):
         self.bd = bd
+        self.indice = indice
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
     
-    def obter_todos_acidentes(self):
+    def obter_todos_acidentes(self, formato='records'):
         """Retorna todos os acidentes ordenados por data"""
-        resultado = self.bd.execute("""
-            SELECT 
-                id, Data as date, Pais as country, Estado as local,
-                Setor_Industrial as sector, Nivel_Acidente as accidentLevel,
-                Nivel_Acidente_Potencial as potentialLevel, Genero as gender,
-                Tipo_Trabalhador as employeeType, Risco_Critico as criticalRisk,
-                Descricao as description, Parte_Corpo as bodyPart
+        return self._formatar_acidentes(self._consultar_todos(), formato)
+    
+    def iterar_todos_acidentes(self, tamanho_lote=1000):
+        """
+        Gera todos os acidentes em lotes, na mesma ordem de obter_todos_acidentes
+        
+        Os lotes são lidos do DuckDB com fetchmany, então apenas um lote fica
+        em memória por vez, qualquer que seja o tamanho da tabela.
+        """
+        resultado = self._consultar_todos()
+        descricao = resultado.description
+        while True:
+            lote = resultado.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            yield registros_de_linhas(descricao, lote)
+    
+    def _consultar_todos(self):
+        """Executa a consulta de todos os acidentes e retorna o cursor"""
+        return self.bd.execute(f"""
+            SELECT {COLUNAS_ACIDENTES}
             FROM acidentes
             ORDER BY Data DESC
-        """).fetchall()
+        """)
+    
+    def obter_acidentes_filtrados(self, pagina=1, por_pagina=10, consulta_busca='', fonte=None,
+                                  ordenacao='date', formato='records'):
+        """
+        Retorna acidentes filtrados com paginação por página (LIMIT/OFFSET)
         
-        return self._formatar_acidentes(resultado)
+        Com ordenacao='relevance' e o índice de busca disponível, os
+        resultados de uma busca são ordenados pela pontuação BM25.
+        Com formato='columns', retorna {columns, rows}.
+        """
+        fonte, construtor_consulta = self._preparar_consulta_filtrada(fonte, consulta_busca)
+        deslocamento = (pagina - 1) * por_pagina
+        
+        ranking = None
+        if ordenacao == 'relevance' and consulta_busca and self.indice is not None:
+            pontuacoes = self.indice.buscar(consulta_busca)
+            if pontuacoes:
+                ranking = sorted(pontuacoes, key=lambda i: (-pontuacoes[i], -i))
+        
+        resultado = self._consultar_pagina(fonte, construtor_consulta, por_pagina,
+                                           deslocamento, ranking)
+        return self._formatar_acidentes(resultado, formato)
     
-    def obter_acidentes_filtrados(self, pagina=1, por_pagina=10, consulta_busca=''):
-        """Retorna acidentes filtrados com paginação"""
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data()
+    def obter_acidentes_por_cursor(self, por_pagina=10, consulta_busca='', cursor='', fonte=None,
+                                   formato='records'):
+        """
+        Retorna acidentes filtrados com paginação por cursor (keyset em Data, id)
+        
+        Cada página parte do último acidente da anterior, então o custo é o
+        mesmo em qualquer profundidade. Um cursor vazio retorna a primeira
+        página; nextCursor é None quando não há mais acidentes.
+        """
+        fonte, construtor_consulta = self._preparar_consulta_filtrada(fonte, consulta_busca)
+        if cursor:
+            construtor_consulta.adicionar_filtro_cursor(*decodificar_cursor(cursor))
+        
+        # Uma linha a mais indica se existe próxima página
+        resultado = self._consultar_pagina(fonte, construtor_consulta, por_pagina + 1)
+        nomes, colunas = ler_colunas(resultado)
+        tem_mais = len(colunas[0]) > por_pagina
+        colunas = [coluna[:por_pagina] for coluna in colunas]
+        
+        proximo_cursor = None
+        if tem_mais:
+            ultima_data = colunas[1][-1]
+            proximo_cursor = codificar_cursor(
+                datetime.fromisoformat(ultima_data) if ultima_data else None, colunas[0][-1])
+        
+        if formato == 'columns':
+            pagina = formato_colunar(nomes, colunas)
+        else:
+            pagina = {'accidents': registros(nomes, colunas)}
+        pagina['nextCursor'] = proximo_cursor
+        return pagina
+    
+    def _preparar_consulta_filtrada(self, fonte, consulta_busca):
+        """Monta fonte e filtros (padrão + busca textual) da lista de acidentes"""
+        fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
         
         if consulta_busca:
-            colunas_busca = ['Pais', 'Estado', 'Descricao', 'Nivel_Acidente',
-                            'Risco_Critico', 'Setor_Industrial']
-            construtor_consulta.adicionar_filtro_busca(consulta_busca, colunas_busca)
+            if self.indice is not None:
+                # Índice invertido: termos normalizados, radicais e prefixo no último termo
+                pontuacoes = self.indice.buscar(consulta_busca)
+                if pontuacoes is not None:
+                    construtor_consulta.adicionar_filtro_ids(pontuacoes)
+            else:
+                construtor_consulta.adicionar_filtro_busca(consulta_busca, COLUNAS_BUSCA)
         
+        return fonte, construtor_consulta
+    
+    def _consultar_pagina(self, fonte, construtor_consulta, limite, deslocamento=0, ranking=None):
+        """Executa a consulta paginada na ordem Data DESC, id DESC (ou na ordem do ranking)"""
         clausula_where = construtor_consulta.obter_clausula_where()
         parametros = construtor_consulta.obter_parametros()
-        deslocamento = (pagina - 1) * por_pagina
         
+        ordem = "Data DESC NULLS LAST, id DESC"
+        if ranking is not None:
+            parametros.append(ranking)
+            ordem = f"list_position(${len(parametros)}::INTEGER[], id)"
+        
+        # Limite e deslocamento também como parâmetros, nunca interpolados no SQL
+        parametros.extend([int(limite), int(deslocamento)])
         consulta = f"""
-            SELECT 
-                id, Data as date, Pais as country, Estado as local,
-                Setor_Industrial as sector, Nivel_Acidente as accidentLevel,
-                Nivel_Acidente_Potencial as potentialLevel, Genero as gender,
-                Tipo_Trabalhador as employeeType, Risco_Critico as criticalRisk,
-                Descricao as description, Parte_Corpo as bodyPart
-            FROM acidentes
+            SELECT {COLUNAS_ACIDENTES}
+            FROM {fonte}
             WHERE {clausula_where}
-            ORDER BY Data DESC
-            LIMIT {por_pagina} OFFSET {deslocamento}
+            ORDER BY {ordem}
+            LIMIT ${len(parametros) - 1} OFFSET ${len(parametros)}
         """
         
-        resultado = self.bd.execute(consulta, parametros).fetchall()
-        return self._formatar_acidentes(resultado)
+        return self.bd.execute(consulta, parametros)
+    
+    def _formatar_acidentes(self, resultado, formato='records'):
+        """Lê o resultado por coluna e o formata como lista de objetos ou {columns, rows}"""
+        nomes, colunas = ler_colunas(resultado)
+        if formato == 'columns':
+            return formato_colunar(nomes, colunas)
+        return registros(nomes, colunas)
+
+
+# ==================== SERVIÇO DE EXPORTAÇÃO ====================
+
+class ServicoExportacao:
+    """
+    Serviço para exportar acidentes filtrados em formatos colunares ou CSV
+    
+    Os dados saem do DuckDB direto para o formato de destino (lotes Arrow
+    ou COPY ... TO), sem passar por objetos Python linha a linha.
+    """
+    
+    FORMATOS = {
+        'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+        'parquet': ('application/vnd.apache.parquet', 'parquet'),
+        'csv': ('text/csv', 'csv')
+    }
+    
+    def __init__(self, bd, indice=None, filtro=None):
+        self.bd = bd
+        self.indice = indice
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
+    
+    @staticmethod
+    def formato_disponivel(formato):
+        """Indica se o formato é suportado (Arrow exige o pyarrow instalado)"""
+        if formato == 'arrow':
+            return pa is not None
+        return formato in ServicoExportacao.FORMATOS
     
-    def _formatar_acidentes(self, resultado):
-        """Formata resultado da query em lista de dicionários"""
-        colunas = ['id', 'date', 'country', 'local', 'sector', 'accidentLevel', 
-                   'potentialLevel', 'gender', 'employeeType', 'criticalRisk', 
-                   'description', 'bodyPart']
+    def montar_consulta(self, consulta_busca=''):
+        """Retorna (consulta, parâmetros) com os mesmos filtros de /api/accidents/filtered"""
+        servico_acidentes = ServicoAcidentes(self.bd, self.indice, self.filtro)
+        fonte, construtor_consulta = servico_acidentes._preparar_consulta_filtrada(None, consulta_busca)
         
-        acidentes = []
-        for linha in resultado:
-            acidente = {}
-            for i, col in enumerate(colunas):
-                valor = linha[i]
-                acidente[col] = formatar_data(valor) if col == 'date' else valor
-            acidentes.append(acidente)
+        consulta = f"""
+            SELECT {COLUNAS_ACIDENTES}
+            FROM {fonte}
+            WHERE {construtor_consulta.obter_clausula_where()}
+            ORDER BY Data DESC NULLS LAST, id DESC
+        """
+        return consulta, construtor_consulta.obter_parametros()
+    
+    def gerar_arrow(self, consulta, parametros, linhas_por_lote=65536):
+        """Gera o stream IPC do Arrow, enviando cada lote de registros assim que é lido"""
+        leitor = self.bd.execute(consulta, parametros).to_arrow_reader(linhas_por_lote)
+        buffer = io.BytesIO()
+        with pa.ipc.new_stream(pa.PythonFile(buffer, mode='w'), leitor.schema) as escritor:
+            for lote in leitor:
+                escritor.write_batch(lote)
+                yield self._drenar(buffer)
+        yield self._drenar(buffer)
+    
+    def exportar_arquivo(self, consulta, parametros, formato):
+        """
+        Grava o resultado em um arquivo temporário com COPY ... TO e retorna o caminho
         
-        return acidentes
+        O Parquet só fica válido com o rodapé, então o arquivo é gerado
+        inteiro pelo DuckDB antes de ser transmitido.
+        """
+        opcoes = {'parquet': "FORMAT PARQUET", 'csv': "FORMAT CSV, HEADER"}[formato]
+        descritor, caminho = tempfile.mkstemp(suffix=f'.{formato}')
+        os.close(descritor)
+        
+        try:
+            self.bd.execute(f"COPY ({consulta}) TO '{caminho}' ({opcoes})", parametros)
+        except Exception:
+            os.remove(caminho)
+            raise
+        return caminho
+    
+    @staticmethod
+    def gerar_arquivo(caminho, tamanho_bloco=1024 * 1024):
+        """Lê o arquivo exportado em blocos"""
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                bloco = arquivo.read(tamanho_bloco)
+                if not bloco:
+                    break
+                yield bloco
+    
+    @staticmethod
+    def remover_arquivo(caminho):
+        """Remove o arquivo temporário da exportação (se ainda existir)"""
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def _drenar(buffer):
+        """Retorna os bytes acumulados no buffer e o esvazia"""
+        dados = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return dados
 
 
 # ==================== SERVIÇO DE ESTATÍSTICAS ====================
@@ -85,58 +302,64 @@ class ServicoEstatisticas:
     def __init__(self, bd):
         self.bd = bd
     
+    # Máscaras de GROUPING(Genero, Pais, Setor_Industrial, Mes, Estado, Parte_Corpo)
+    # que identificam cada conjunto de agrupamento (bit 1 = coluna não agrupada)
+    CONJUNTO_GENERO = 0b011111
+    CONJUNTO_PAIS = 0b101111
+    CONJUNTO_SETOR = 0b110111
+    CONJUNTO_MES = 0b111011
+    CONJUNTO_LOCALIZACAO = 0b101101
+    CONJUNTO_PARTE_CORPO = 0b111110
+    
     def obter_todas_estatisticas(self):
-        """Retorna todas as estatísticas agregadas"""
+        """Retorna todas as estatísticas agregadas em uma única varredura"""
+        resultado = self.bd.execute("""
+            SELECT GROUPING(Genero, Pais, Setor_Industrial, Mes, Estado, Parte_Corpo) as conjunto,
+                   Genero, Pais, Setor_Industrial, strftime(Mes, '%Y-%m'), Estado, Parte_Corpo,
+                   COUNT(*) as count
+            FROM acidentes
+            GROUP BY GROUPING SETS (
+                (Genero), (Pais), (Setor_Industrial), (Mes), (Estado, Pais), (Parte_Corpo)
+            )
+        """).fetchall()
+        
+        conjuntos = {}
+        for linha in resultado:
+            conjuntos.setdefault(linha[0], []).append(linha[1:])
+        
         return {
-            'gender': self._obter_estatisticas_genero(),
-            'countries': self._obter_estatisticas_pais(),
-            'sectors': self._obter_estatisticas_setor(),
-            'months': self._obter_estatisticas_mes(),
-            'locations': self._obter_estatisticas_localizacao(),
-            'bodyParts': self._obter_estatisticas_parte_corpo()
+            'gender': self._formatar_genero(conjuntos.get(self.CONJUNTO_GENERO, [])),
+            'countries': self._formatar_pais(conjuntos.get(self.CONJUNTO_PAIS, [])),
+            'sectors': self._formatar_setor(conjuntos.get(self.CONJUNTO_SETOR, [])),
+            'months': self._formatar_mes(conjuntos.get(self.CONJUNTO_MES, [])),
+            'locations': self._formatar_localizacao(conjuntos.get(self.CONJUNTO_LOCALIZACAO, [])),
+            'bodyParts': self._formatar_parte_corpo(conjuntos.get(self.CONJUNTO_PARTE_CORPO, []))
         }
     
-    def _obter_estatisticas_genero(self):
-        resultado = self.bd.execute("""
-            SELECT Genero, COUNT(*) as count
-            FROM acidentes GROUP BY Genero
-        """).fetchall()
-        return [{'gender': linha[0], 'count': linha[1]} for linha in resultado]
+    # Cada linha agrupada tem o formato
+    # (Genero, Pais, Setor_Industrial, Mes, Estado, Parte_Corpo, count)
     
-    def _obter_estatisticas_pais(self):
-        resultado = self.bd.execute("""
-            SELECT Pais, COUNT(*) as count
-            FROM acidentes GROUP BY Pais ORDER BY count DESC
-        """).fetchall()
-        return [{'country': linha[0], 'count': linha[1]} for linha in resultado]
+    def _formatar_genero(self, linhas):
+        return [{'gender': linha[0], 'count': linha[6]} for linha in linhas]
     
-    def _obter_estatisticas_setor(self):
-        resultado = self.bd.execute("""
-            SELECT Setor_Industrial, COUNT(*) as count
-            FROM acidentes GROUP BY Setor_Industrial
-        """).fetchall()
-        return [{'sector': linha[0], 'count': linha[1]} for linha in resultado]
+    def _formatar_pais(self, linhas):
+        linhas = sorted(linhas, key=lambda linha: -linha[6])
+        return [{'country': linha[1], 'count': linha[6]} for linha in linhas]
     
-    def _obter_estatisticas_mes(self):
-        resultado = self.bd.execute("""
-            SELECT strftime(Data, '%Y-%m') as month, COUNT(*) as count
-            FROM acidentes GROUP BY month ORDER BY month
-        """).fetchall()
-        return [{'month': linha[0], 'count': linha[1]} for linha in resultado]
+    def _formatar_setor(self, linhas):
+        return [{'sector': linha[2], 'count': linha[6]} for linha in linhas]
     
-    def _obter_estatisticas_localizacao(self):
-        resultado = self.bd.execute("""
-            SELECT Estado, Pais, COUNT(*) as count
-            FROM acidentes GROUP BY Estado, Pais ORDER BY count DESC LIMIT 10
-        """).fetchall()
-        return [{'local': linha[0], 'country': linha[1], 'count': linha[2]} for linha in resultado]
+    def _formatar_mes(self, linhas):
+        linhas = sorted(linhas, key=lambda linha: (linha[3] is None, linha[3] or ''))
+        return [{'month': linha[3], 'count': linha[6]} for linha in linhas]
     
-    def _obter_estatisticas_parte_corpo(self):
-        resultado = self.bd.execute("""
-            SELECT Parte_Corpo, COUNT(*) as count
-            FROM acidentes GROUP BY Parte_Corpo ORDER BY count DESC
-        """).fetchall()
-        return [{'bodyPart': linha[0], 'count': linha[1]} for linha in resultado]
+    def _formatar_localizacao(self, linhas):
+        linhas = sorted(linhas, key=lambda linha: -linha[6])[:10]
+        return [{'local': linha[4], 'country': linha[1], 'count': linha[6]} for linha in linhas]
+    
+    def _formatar_parte_corpo(self, linhas):
+        linhas = sorted(linhas, key=lambda linha: -linha[6])
+        return [{'bodyPart': linha[5], 'count': linha[6]} for linha in linhas]
 
 
 # ==================== SERVIÇO DE DASHBOARD ====================
@@ -144,17 +367,45 @@ class ServicoEstatisticas:
 class ServicoDashboard:
     """Serviço para estatísticas do dashboard com filtros"""
     
-    def __init__(self, bd):
+    def __init__(self, bd, cubo=None, indice=None, filtro=None):
         self.bd = bd
+        self.cubo = cubo
+        self.indice = indice
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
     
-    def obter_estatisticas_dashboard(self):
+    def obter_estatisticas_dashboard(self, fonte=None):
         """Retorna estatísticas do dashboard com filtros aplicados"""
-        from flask import request
+        selecao = _selecionar_no_cubo(self.cubo, self.filtro, fonte)
         
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data()
+        if selecao is not None:
+            estatisticas_genero = list(self.cubo.contar_por('Genero', selecao).items())
+            total = self.cubo.total(selecao)
+            intervalo_data = self.cubo.intervalo_datas(selecao)
+        else:
+            estatisticas_genero, total, intervalo_data = self._consultar_estatisticas(fonte)
+        
+        # Calcular porcentagens
+        contagem_mulheres = next((linha[1] for linha in estatisticas_genero if linha[0] == 'Mulher'), 0)
+        contagem_homens = next((linha[1] for linha in estatisticas_genero if linha[0] == 'Homem'), 0)
+        percentual_mulheres = round(contagem_mulheres / total * 100, 1) if total > 0 else 0
+        percentual_homens = round(contagem_homens / total * 100, 1) if total > 0 else 0
+        
+        paises = self.filtro.paises
+        
+        return {
+            'total': total,
+            'women': {'count': contagem_mulheres, 'percent': percentual_mulheres},
+            'men': {'count': contagem_homens, 'percent': percentual_homens},
+            'countriesCount': len(paises) if paises else 0,
+            'dateRange': {
+                'start': formatar_data(intervalo_data[0]) if intervalo_data and intervalo_data[0] else None,
+                'end': formatar_data(intervalo_data[1]) if intervalo_data and intervalo_data[1] else None
+            }
+        }
+    
+    def _consultar_estatisticas(self, fonte):
+        """Consulta no banco as contagens por gênero, o total e o range de datas"""
+        fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
         
         clausula_where = construtor_consulta.obter_clausula_where()
         parametros = construtor_consulta.obter_parametros()
@@ -162,39 +413,68 @@ class ServicoDashboard:
         # Estatísticas de gênero
         estatisticas_genero = self.bd.execute(f"""
             SELECT Genero, COUNT(*) as count
-            FROM acidentes WHERE {clausula_where}
+            FROM {fonte} WHERE {clausula_where}
             GROUP BY Genero
         """, parametros).fetchall()
         
         # Total
         total = self.bd.execute(f"""
             SELECT COUNT(*) as total
-            FROM acidentes WHERE {clausula_where}
+            FROM {fonte} WHERE {clausula_where}
         """, parametros).fetchone()[0]
         
-        # Calcular porcentagens
-        contagem_mulheres = next((linha[1] for linha in estatisticas_genero if linha[0] == 'Mulher'), 0)
-        contagem_homens = next((linha[1] for linha in estatisticas_genero if linha[0] == 'Homem'), 0)
-        percentual_mulheres = round(contagem_mulheres / total * 100, 1) if total > 0 else 0
-        percentual_homens = round(contagem_homens / total * 100, 1) if total > 0 else 0
-        
         # Range de datas
         intervalo_data = self.bd.execute(f"""
             SELECT MIN(Data) as min_date, MAX(Data) as max_date
-            FROM acidentes WHERE {clausula_where}
+            FROM {fonte} WHERE {clausula_where}
         """, parametros).fetchone()
         
-        paises = request.args.getlist('country')
+        return estatisticas_genero, total, intervalo_data
+    
+    def obter_pacote_dashboard(self, intervalo_meses='all', filtro_pais='all',
+                               por_pagina=10, consulta_busca=''):
+        """
+        Retorna todos os painéis do dashboard para um mesmo estado de filtros
+        
+        Quando o cubo OLAP expressa os filtros, os painéis saem do cubo e só
+        a lista de acidentes vai ao banco. Caso contrário, os filtros são
+        aplicados uma única vez, materializando as linhas filtradas em uma
+        tabela temporária da conexão; cada painel é calculado a partir dela.
+        """
+        if _selecionar_no_cubo(self.cubo, self.filtro) is not None:
+            return self._montar_pacote(None, intervalo_meses, filtro_pais,
+                                       por_pagina, consulta_busca)
+        
+        fonte, construtor_consulta = _preparar_filtros(self.filtro)
+        clausula_where = construtor_consulta.obter_clausula_where()
+        parametros = construtor_consulta.obter_parametros()
+        
+        tabela_filtrada = 'acidentes_filtrados'
+        self.bd.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {tabela_filtrada} AS
+            SELECT * FROM {fonte} WHERE {clausula_where}
+        """, parametros)
+        
+        try:
+            return self._montar_pacote(tabela_filtrada, intervalo_meses, filtro_pais,
+                                       por_pagina, consulta_busca)
+        finally:
+            self.bd.execute(f"DROP TABLE IF EXISTS {tabela_filtrada}")
+    
+    def _montar_pacote(self, fonte, intervalo_meses, filtro_pais, por_pagina, consulta_busca):
+        """Calcula cada painel do dashboard a partir da mesma fonte (ou do cubo)"""
+        servico_graficos = ServicoGraficos(self.bd, self.cubo, self.filtro)
+        pagina_acidentes = ServicoAcidentes(self.bd, self.indice, self.filtro).obter_acidentes_por_cursor(
+            por_pagina, consulta_busca, fonte=fonte)
         
         return {
-            'total': total,
-            'women': {'count': contagem_mulheres, 'percent': percentual_mulheres},
-            'men': {'count': contagem_homens, 'percent': percentual_homens},
-            'countriesCount': len(paises) if paises else 0,
-            'dateRange': {
-                'start': formatar_data(intervalo_data[0]) if intervalo_data and intervalo_data[0] else None,
-                'end': formatar_data(intervalo_data[1]) if intervalo_data and intervalo_data[1] else None
-            }
+            'stats': self.obter_estatisticas_dashboard(fonte=fonte),
+            'monthly': servico_graficos.obter_dados_grafico_mensal(intervalo_meses, fonte=fonte),
+            'sectors': servico_graficos.obter_dados_grafico_setores(fonte=fonte),
+            'locations': servico_graficos.obter_dados_grafico_localizacoes(filtro_pais, fonte=fonte),
+            'heatmap': servico_graficos.obter_dados_mapa_calor_partes_corpo(fonte=fonte),
+            'accidents': pagina_acidentes['accidents'],
+            'nextCursor': pagina_acidentes['nextCursor']
         }
 
 
@@ -203,50 +483,60 @@ class ServicoDashboard:
 class ServicoGraficos:
     """Serviço para gerar dados de gráficos"""
     
-    def __init__(self, bd):
+    def __init__(self, bd, cubo=None, filtro=None):
         self.bd = bd
+        self.cubo = cubo
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
     
-    def obter_dados_grafico_mensal(self, intervalo_meses='all'):
+    def obter_dados_grafico_mensal(self, intervalo_meses='all', fonte=None):
         """Retorna dados do gráfico mensal"""
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data()
-        
-        clausula_where = construtor_consulta.obter_clausula_where()
-        parametros = construtor_consulta.obter_parametros()
-        
-        consulta = f"""
-            SELECT strftime(Data, '%Y-%m') as month, COUNT(*) as count
-            FROM acidentes WHERE {clausula_where}
-            GROUP BY month ORDER BY month
-        """
-        
-        if intervalo_meses != 'all':
-            consulta += f" LIMIT {int(intervalo_meses)}"
-        
-        dados_mensais = self.bd.execute(consulta, parametros).fetchall()
+        selecao = _selecionar_no_cubo(self.cubo, self.filtro, fonte)
+        
+        if selecao is not None:
+            dados_mensais = sorted(self.cubo.contar_por('Mes', selecao).items(),
+                                   key=lambda linha: (linha[0] is None, linha[0] or ''))
+            if intervalo_meses != 'all':
+                dados_mensais = dados_mensais[:int(intervalo_meses)]
+        else:
+            fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
+            
+            clausula_where = construtor_consulta.obter_clausula_where()
+            parametros = construtor_consulta.obter_parametros()
+            
+            consulta = f"""
+                SELECT strftime(Mes, '%Y-%m') as month, COUNT(*) as count
+                FROM {fonte} WHERE {clausula_where}
+                GROUP BY Mes ORDER BY Mes
+            """
+            
+            if intervalo_meses != 'all':
+                consulta += f" LIMIT {int(intervalo_meses)}"
+            
+            dados_mensais = self.bd.execute(consulta, parametros).fetchall()
         
         rotulos = [formatar_rotulo_mes(linha[0]) for linha in dados_mensais]
         dados = [linha[1] for linha in dados_mensais]
         
         return {'labels': rotulos, 'data': dados}
     
-    def obter_dados_grafico_setores(self):
+    def obter_dados_grafico_setores(self, fonte=None):
         """Retorna dados do gráfico de setores"""
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data()
-        
-        clausula_where = construtor_consulta.obter_clausula_where()
-        parametros = construtor_consulta.obter_parametros()
+        selecao = _selecionar_no_cubo(self.cubo, self.filtro, fonte)
         
-        dados_setores = self.bd.execute(f"""
-            SELECT Setor_Industrial, COUNT(*) as count
-            FROM acidentes WHERE {clausula_where}
-            GROUP BY Setor_Industrial ORDER BY count DESC
-        """, parametros).fetchall()
+        if selecao is not None:
+            dados_setores = sorted(self.cubo.contar_por('Setor_Industrial', selecao).items(),
+                                   key=lambda linha: -linha[1])
+        else:
+            fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
+            
+            clausula_where = construtor_consulta.obter_clausula_where()
+            parametros = construtor_consulta.obter_parametros()
+            
+            dados_setores = self.bd.execute(f"""
+                SELECT Setor_Industrial, COUNT(*) as count
+                FROM {fonte} WHERE {clausula_where}
+                GROUP BY Setor_Industrial ORDER BY count DESC
+            """, parametros).fetchall()
         
         setores = {'Mineração': 0, 'Metalurgia': 0, 'Outros': 0}
         for linha in dados_setores:
@@ -258,44 +548,54 @@ class ServicoGraficos:
         
         return {'labels': list(setores.keys()), 'data': list(setores.values())}
     
-    def obter_dados_grafico_localizacoes(self, filtro_pais='all'):
+    def obter_dados_grafico_localizacoes(self, filtro_pais='all', fonte=None):
         """Retorna dados do gráfico de localização"""
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data() \
-                    .adicionar_filtro_customizado('Pais', filtro_pais)
-        
-        clausula_where = construtor_consulta.obter_clausula_where()
-        parametros = construtor_consulta.obter_parametros()
-        
-        dados_localizacoes = self.bd.execute(f"""
-            SELECT Estado, COUNT(*) as count
-            FROM acidentes WHERE {clausula_where}
-            GROUP BY Estado ORDER BY count DESC LIMIT 6
-        """, parametros).fetchall()
+        selecao = _selecionar_no_cubo(self.cubo, self.filtro, fonte, pais=filtro_pais)
+        
+        if selecao is not None:
+            dados_localizacoes = sorted(self.cubo.contar_por('Estado', selecao).items(),
+                                        key=lambda linha: -linha[1])[:6]
+        else:
+            fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
+            construtor_consulta.adicionar_filtro_customizado('Pais', filtro_pais)
+            
+            clausula_where = construtor_consulta.obter_clausula_where()
+            parametros = construtor_consulta.obter_parametros()
+            
+            dados_localizacoes = self.bd.execute(f"""
+                SELECT Estado, COUNT(*) as count
+                FROM {fonte} WHERE {clausula_where}
+                GROUP BY Estado ORDER BY count DESC LIMIT 6
+            """, parametros).fetchall()
         
         return {
             'labels': [linha[0] for linha in dados_localizacoes],
             'data': [linha[1] for linha in dados_localizacoes]
         }
     
-    def obter_dados_mapa_calor_partes_corpo(self):
+    def obter_dados_mapa_calor_partes_corpo(self, fonte=None):
         """Retorna dados do mapa de calor de partes do corpo"""
-        construtor_consulta = ConstrutorConsulta()
-        construtor_consulta.adicionar_filtro_genero() \
-                    .adicionar_filtro_pais() \
-                    .adicionar_filtro_intervalo_data()
-        
-        clausula_where = construtor_consulta.obter_clausula_where()
-        parametros = construtor_consulta.obter_parametros()
-        
-        dados_partes_corpo = self.bd.execute(f"""
-            SELECT Parte_Corpo, COUNT(*) as count
-            FROM acidentes WHERE {clausula_where} 
-            AND Parte_Corpo != 'Não especificado'
-            GROUP BY Parte_Corpo ORDER BY count DESC
-        """, parametros).fetchall()
+        selecao = _selecionar_no_cubo(self.cubo, self.filtro, fonte)
+        
+        if selecao is not None:
+            contagens = self.cubo.contar_por('Parte_Corpo', selecao)
+            dados_partes_corpo = sorted(
+                ((parte, contagem) for parte, contagem in contagens.items()
+                 if parte is not None and parte != 'Não especificado'),
+                key=lambda linha: -linha[1]
+            )
+        else:
+            fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
+            
+            clausula_where = construtor_consulta.obter_clausula_where()
+            parametros = construtor_consulta.obter_parametros()
+            
+            dados_partes_corpo = self.bd.execute(f"""
+                SELECT Parte_Corpo, COUNT(*) as count
+                FROM {fonte} WHERE {clausula_where} 
+                AND Parte_Corpo != 'Não especificado'
+                GROUP BY Parte_Corpo ORDER BY count DESC
+            """, parametros).fetchall()
         
         return {
             'bodyParts': [{'part': linha[0], 'count': linha[1]} for linha in dados_partes_corpo]
@@ -307,46 +607,95 @@ class ServicoGraficos:
 class ServicoSeguranca:
     """Serviço para calcular métricas de segurança"""
     
-    def __init__(self, bd):
+    NIVEIS_GRAVES = "('IV - Alto', 'V - Muito Alto', 'VI - Crítico')"
+    
+    def __init__(self, bd, filtro=None):
         self.bd = bd
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
     
-    def obter_registro_seguranca(self):
-        """Retorna dados do recorde de segurança"""
-        acidentes_graves = self.bd.execute("""
-            SELECT DISTINCT Data FROM acidentes
-            WHERE Nivel_Acidente IN ('IV - Alto', 'V - Muito Alto', 'VI - Crítico')
-               OR Nivel_Acidente_Potencial IN ('IV - Alto', 'V - Muito Alto', 'VI - Crítico')
-            ORDER BY Data
-        """).fetchall()
+    def obter_registro_seguranca(self, fonte=None):
+        """
+        Retorna o recorde de dias sem acidentes graves, no geral e por local
         
-        if len(acidentes_graves) < 2:
-            return {
-                'recordDays': 0, 'recordStartDate': None, 'recordEndDate': None,
-                'currentDaysSinceLast': 0, 'lastSevereAccidentDate': None
-            }
+        Uma única consulta calcula, com LAG() sobre as datas distintas de
+        acidentes graves, o maior intervalo entre dois acidentes graves
+        consecutivos do conjunto todo e de cada (Estado, Pais), além da
+        última data registrada em cada um. Aceita os filtros padrão.
+        """
+        fonte, construtor_consulta = _preparar_filtros(self.filtro, fonte)
+        clausula_where = construtor_consulta.obter_clausula_where()
+        parametros = construtor_consulta.obter_parametros()
         
-        # Calcular maior intervalo
-        dias_maximos, data_inicio, data_fim = 0, None, None
-        for i in range(len(acidentes_graves) - 1):
-            data_atual = acidentes_graves[i][0]
-            proxima_data = acidentes_graves[i + 1][0]
-            diferenca_dias = (proxima_data - data_atual).days
-            
-            if diferenca_dias > dias_maximos:
-                dias_maximos = diferenca_dias
-                data_inicio = data_atual
-                data_fim = proxima_data
+        # geral = TRUE para o conjunto todo, FALSE para cada local
+        linhas = self.bd.execute(f"""
+            WITH filtrados AS (
+                SELECT Estado, Pais, Data,
+                       Nivel_Acidente IN {self.NIVEIS_GRAVES}
+                           OR Nivel_Acidente_Potencial IN {self.NIVEIS_GRAVES} as grave
+                FROM {fonte}
+                WHERE {clausula_where} AND Data IS NOT NULL
+            ),
+            ultimas AS (
+                SELECT GROUPING(Estado, Pais) = 3 as geral, Estado, Pais, MAX(Data) as ultima_data
+                FROM filtrados
+                GROUP BY GROUPING SETS ((), (Estado, Pais))
+            ),
+            graves AS (
+                SELECT DISTINCT TRUE as geral, NULL as Estado, NULL as Pais, Data
+                FROM filtrados WHERE grave
+                UNION ALL
+                SELECT DISTINCT FALSE, Estado, Pais, Data
+                FROM filtrados WHERE grave
+            ),
+            intervalos AS (
+                SELECT geral, Estado, Pais, Data,
+                       LAG(Data) OVER (PARTITION BY geral, Estado, Pais ORDER BY Data) as anterior
+                FROM graves
+            ),
+            resumo AS (
+                SELECT geral, Estado, Pais, COUNT(*) as total_graves, MAX(Data) as ultimo_grave,
+                       arg_max(anterior, [date_part('day', Data - anterior), -epoch(Data)])
+                           FILTER (WHERE anterior IS NOT NULL) as inicio_recorde,
+                       arg_max(Data, [date_part('day', Data - anterior), -epoch(Data)])
+                           FILTER (WHERE anterior IS NOT NULL) as fim_recorde
+                FROM intervalos
+                GROUP BY geral, Estado, Pais
+            )
+            SELECT u.geral, u.Estado, u.Pais, u.ultima_data,
+                   r.total_graves, r.ultimo_grave, r.inicio_recorde, r.fim_recorde
+            FROM ultimas u
+            LEFT JOIN resumo r
+                ON r.geral = u.geral
+               AND r.Estado IS NOT DISTINCT FROM u.Estado
+               AND r.Pais IS NOT DISTINCT FROM u.Pais
+            ORDER BY u.geral DESC, u.Pais, u.Estado
+        """, parametros).fetchall()
         
-        # Dias desde último acidente grave
-        ultimo_grave = acidentes_graves[-1][0]
-        ultima_data_total = self.bd.execute("SELECT MAX(Data) FROM acidentes").fetchone()[0]
-        dias_desde_ultimo = (ultima_data_total - ultimo_grave).days
+        geral = None
+        locais = []
+        for eh_geral, estado, pais, ultima_data, total_graves, ultimo_grave, inicio, fim in linhas:
+            registro = self._formatar_registro(ultima_data, ultimo_grave, inicio, fim)
+            if eh_geral:
+                # No geral, menos de dois acidentes graves não formam um recorde
+                geral = registro if (total_graves or 0) >= 2 else None
+            else:
+                locais.append({'country': pais, 'local': estado, **registro})
         
+        if geral is None:
+            geral = {
+                'recordDays': 0, 'recordStartDate': None, 'recordEndDate': None,
+                'currentDaysSinceLast': 0, 'lastSevereAccidentDate': None
+            }
+        geral['sites'] = locais
+        return geral
+    
+    def _formatar_registro(self, ultima_data, ultimo_grave, inicio, fim):
+        """Formata o recorde de um local (ou do geral) no formato da API"""
         return {
-            'recordDays': dias_maximos,
-            'recordStartDate': formatar_data(data_inicio),
-            'recordEndDate': formatar_data(data_fim),
-            'currentDaysSinceLast': dias_desde_ultimo,
+            'recordDays': (fim - inicio).days if inicio is not None else 0,
+            'recordStartDate': formatar_data(inicio),
+            'recordEndDate': formatar_data(fim),
+            'currentDaysSinceLast': (ultima_data - ultimo_grave).days if ultimo_grave else None,
             'lastSevereAccidentDate': formatar_data(ultimo_grave)
         }
 
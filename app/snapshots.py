@@ -0,0 +1,170 @@
+"""
+Snapshots do banco - Troca atômica do arquivo DuckDB servido pela aplicação
+
+Cada carga completa grava um arquivo novo em <banco>.snapshots/, que é
+validado e só então publicado trocando o ponteiro <banco>.atual (os.replace
+é atômico). O pool de conexões percebe a troca na retirada seguinte: as
+requisições em andamento terminam no snapshot antigo, fechado quando o
+último cursor é devolvido. Sem ponteiro, o próprio <banco> é servido.
+"""
+import glob
+import os
+import threading
+import time
+import uuid
+
+import duckdb
+
+from app.esquema import tabela_existe, esquema_otimizado
+from app.versao_dados import registrar_nova_versao
+
+
+_trava = threading.Lock()
+_ponteiros_lidos = {}
+
+
+def caminho_ponteiro(caminho_bd):
+    """Retorna o caminho do arquivo que aponta para o snapshot ativo"""
+    return f'{caminho_bd}.atual'
+
+
+def pasta_snapshots(caminho_bd):
+    """Retorna a pasta onde ficam os snapshots de um banco"""
+    return f'{caminho_bd}.snapshots'
+
+
+def snapshot_atual(caminho_bd):
+    """
+    Retorna o caminho do snapshot ativo (None se não há ponteiro)
+
+    Como ler_versao_dados, o ponteiro só é relido quando o arquivo muda, então
+    a chamada custa apenas um stat por retirada do pool.
+    """
+    ponteiro = caminho_ponteiro(caminho_bd)
+    try:
+        estado = os.stat(ponteiro)
+    except FileNotFoundError:
+        return None
+    assinatura = (estado.st_ino, estado.st_mtime_ns)
+
+    with _trava:
+        lido = _ponteiros_lidos.get(ponteiro)
+        if lido and lido[1] == assinatura:
+            return lido[0]
+
+    with open(ponteiro, encoding='utf-8') as f:
+        nome = f.read().strip()
+    caminho = os.path.join(os.path.dirname(os.path.abspath(ponteiro)), nome)
+
+    with _trava:
+        _ponteiros_lidos[ponteiro] = (caminho, assinatura)
+    return caminho
+
+
+def arquivo_ativo(caminho_bd):
+    """Retorna o arquivo que a aplicação deve abrir: o snapshot ativo ou o próprio banco"""
+    return snapshot_atual(caminho_bd) or caminho_bd
+
+
+def novo_snapshot(caminho_bd):
+    """Reserva o caminho de um snapshot novo (nome em ordem cronológica)"""
+    pasta = pasta_snapshots(caminho_bd)
+    os.makedirs(pasta, exist_ok=True)
+    base = os.path.splitext(os.path.basename(caminho_bd))[0]
+    return os.path.join(pasta, f'{base}-{time.strftime("%Y%m%d%H%M%S")}-{uuid.uuid4().hex[:8]}.duckdb')
+
+
+def validar_snapshot(caminho_snapshot):
+    """
+    Confere se o snapshot pode ser servido e retorna o total de acidentes
+
+    Exige a tabela acidentes no layout de app/esquema.py, com linhas, e
+    executa uma agregação sobre as colunas usadas pelas rotas. Levanta
+    ValueError se algo estiver errado.
+    """
+    bd = duckdb.connect(caminho_snapshot, read_only=True)
+    try:
+        if not tabela_existe(bd):
+            raise ValueError(f'Snapshot sem a tabela acidentes: {caminho_snapshot}')
+        if not esquema_otimizado(bd):
+            raise ValueError(f'Snapshot fora do layout de app/esquema.py: {caminho_snapshot}')
+
+        total, sem_mes = bd.execute("""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE Data IS NOT NULL AND Mes IS NULL)
+            FROM acidentes
+        """).fetchone()
+        if not total:
+            raise ValueError(f'Snapshot sem acidentes: {caminho_snapshot}')
+        if sem_mes:
+            raise ValueError(f'Snapshot com {sem_mes} acidentes sem a coluna Mes: {caminho_snapshot}')
+
+        bd.execute("""
+            SELECT Genero, Pais, Setor_Industrial, Mes, Parte_Corpo, COUNT(*)
+            FROM acidentes GROUP BY ALL
+        """).fetchall()
+        return total
+    finally:
+        bd.close()
+
+
+def publicar_snapshot(caminho_bd, caminho_snapshot):
+    """
+    Valida o snapshot, aponta o ponteiro para ele e renova a versão dos dados
+
+    O snapshot precisa estar fechado por quem o escreveu. O ponteiro é
+    trocado antes da versão: o pool lê a versão antes do ponteiro, então a
+    versão nova nunca é atribuída ao snapshot antigo. Requisições que já
+    tinham um cursor do snapshot antigo continuam nele, e cubo, índice e
+    cache comparam a versão do cursor (versao_do_cursor em app/database.py)
+    antes de guardar o que ele leu.
+    """
+    validar_snapshot(caminho_snapshot)
+
+    ponteiro = caminho_ponteiro(caminho_bd)
+    temporario = f'{ponteiro}.tmp'
+    nome = os.path.relpath(os.path.abspath(caminho_snapshot),
+                           os.path.dirname(os.path.abspath(ponteiro)))
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(nome)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, ponteiro)
+
+    return registrar_nova_versao(caminho_bd)
+
+
+def descartar_snapshot(caminho_snapshot):
+    """Apaga um snapshot e o WAL dele, se existirem"""
+    for arquivo in (caminho_snapshot, f'{caminho_snapshot}.wal'):
+        try:
+            os.remove(arquivo)
+        except FileNotFoundError:
+            pass
+
+
+def coletar_snapshots(caminho_bd, manter=2):
+    """
+    Apaga os snapshots antigos, mantendo o ativo e os anteriores mais recentes
+
+    manter conta o ativo (manter=2 guarda um snapshot para rollback). Arquivos
+    mais novos que o ativo são cargas em andamento e não são tocados. Um
+    processo que ainda tenha o arquivo aberto continua lendo normalmente no
+    Linux; onde a remoção falha (arquivo em uso no Windows), o snapshot fica
+    para a próxima coleta. Retorna os caminhos apagados.
+    """
+    atual = snapshot_atual(caminho_bd)
+    if atual is None:
+        return []
+
+    arquivos = sorted(glob.glob(os.path.join(pasta_snapshots(caminho_bd), '*.duckdb')))
+    anteriores = [arquivo for arquivo in arquivos
+                  if os.path.basename(arquivo) < os.path.basename(atual)]
+
+    removidos = []
+    for arquivo in anteriores[:max(len(anteriores) - (manter - 1), 0)]:
+        try:
+            descartar_snapshot(arquivo)
+            removidos.append(arquivo)
+        except OSError:
+            pass
+    return removidos
@@ -1,7 +1,12 @@
 """
 Utilitários - Formatação e construção de queries
 """
-from flask import request
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request, has_request_context
+
+from app.esquema import COLUNAS_CATEGORICAS, nome_tipo
 
 
 # ==================== FORMATADORES ====================
@@ -13,6 +18,25 @@ def formatar_data(obj_data):
     return None
 
 
+def gerar_ndjson(lotes):
+    """Serializa lotes de registros como NDJSON (um objeto JSON por linha)"""
+    for lote in lotes:
+        yield ''.join(current_app.json.dumps(registro) + '\n' for registro in lote)
+
+
+def gerar_array_json(lotes):
+    """Serializa lotes de registros como um único array JSON, enviado em partes"""
+    yield '['
+    primeiro = True
+    for lote in lotes:
+        if not lote:
+            continue
+        parte = ','.join(current_app.json.dumps(registro) for registro in lote)
+        yield parte if primeiro else ',' + parte
+        primeiro = False
+    yield ']\n'
+
+
 def formatar_rotulo_mes(str_mes):
     """
     Formata string de mês (YYYY-MM) para label (Mês/Ano)
@@ -29,53 +53,134 @@ def formatar_rotulo_mes(str_mes):
     return f'{rotulo_mes}/{ano}'
 
 
+# ==================== CURSORES DE PAGINAÇÃO ====================
+
+def codificar_cursor(data, id_acidente):
+    """
+    Gera o token opaco de paginação a partir do último acidente da página
+    Exemplo: (datetime(2016, 1, 1), 7) -> 'WyIyMDE2LTAxLTAxVDAwOjAwOjAwIiwgN10'
+    """
+    conteudo = json.dumps([formatar_data(data), id_acidente])
+    return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token):
+    """Retorna (data, id) de um token de paginação; lança ValueError se inválido"""
+    try:
+        preenchimento = '=' * (-len(token) % 4)
+        data, id_acidente = json.loads(base64.urlsafe_b64decode(token + preenchimento))
+        data = datetime.fromisoformat(data) if data is not None else None
+        return data, int(id_acidente)
+    except (TypeError, ValueError, json.JSONDecodeError) as erro:
+        raise ValueError(f'Cursor inválido: {token}') from erro
+
+
+# ==================== FILTROS ====================
+
+def _normalizar_data(valor):
+    """Converte uma data ISO em datetime (sem fuso); mantém o texto se não for uma data válida"""
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        data = datetime.fromisoformat(valor)
+    except ValueError:
+        return valor
+    return data if data.tzinfo is None else valor
+
+
+class FiltroAcidentes:
+    """
+    Filtros padrão das consultas (gênero, país e período), independente da requisição
+    
+    Os valores são normalizados (listas ordenadas e sem repetição, datas
+    como datetime), então filtros equivalentes têm a mesma chave e o
+    mesmo hash e podem indexar caches.
+    """
+    
+    __slots__ = ('generos', 'paises', 'data_inicio', 'data_fim')
+    
+    def __init__(self, generos=(), paises=(), data_inicio=None, data_fim=None):
+        self.generos = tuple(sorted(set(generos)))
+        self.paises = tuple(sorted(set(paises)))
+        self.data_inicio = _normalizar_data(data_inicio)
+        self.data_fim = _normalizar_data(data_fim)
+    
+    @classmethod
+    def da_requisicao(cls, argumentos=None):
+        """Cria o filtro a partir dos parâmetros gender, country, startDate e endDate"""
+        if argumentos is None:
+            if not has_request_context():
+                return cls()
+            argumentos = request.args
+        return cls(
+            generos=argumentos.getlist('gender'),
+            paises=argumentos.getlist('country'),
+            data_inicio=argumentos.get('startDate'),
+            data_fim=argumentos.get('endDate')
+        )
+    
+    def chave(self):
+        """Chave canônica e hashable do filtro"""
+        return (self.generos, self.paises, self.data_inicio, self.data_fim)
+    
+    def __eq__(self, outro):
+        return isinstance(outro, FiltroAcidentes) and self.chave() == outro.chave()
+    
+    def __hash__(self):
+        return hash(self.chave())
+    
+    def __repr__(self):
+        return (f'FiltroAcidentes(generos={self.generos!r}, paises={self.paises!r}, '
+                f'data_inicio={self.data_inicio!r}, data_fim={self.data_fim!r})')
+
+
 # ==================== CONSTRUTOR DE CONSULTAS ====================
 
 class ConstrutorConsulta:
-    """Classe auxiliar para construir queries SQL com filtros dinâmicos"""
+    """
+    Classe auxiliar para construir queries SQL com filtros dinâmicos
     
-    def __init__(self):
+    Os filtros padrão vêm de um FiltroAcidentes; sem ele, são lidos da
+    requisição atual.
+    """
+    
+    def __init__(self, filtro=None):
         self.clausulas_where = []
         self.parametros = {}
         self.contador_parametros = 0
+        self.filtro = filtro if filtro is not None else FiltroAcidentes.da_requisicao()
     
     def adicionar_filtro_genero(self):
         """Adiciona filtro de gênero à query"""
-        generos = request.args.getlist('gender')
-        if generos:
-            placeholders = []
-            for genero in generos:
-                placeholder = self._proximo_placeholder()
-                placeholders.append(placeholder)
-                self.parametros[placeholder] = genero
-            self.clausulas_where.append(f"Genero IN ({', '.join(placeholders)})")
-        return self
+        return self._adicionar_filtro_categorico('Genero', self.filtro.generos)
     
     def adicionar_filtro_pais(self):
         """Adiciona filtro de país à query"""
-        paises = request.args.getlist('country')
-        if paises:
-            placeholders = []
-            for pais in paises:
-                placeholder = self._proximo_placeholder()
-                placeholders.append(placeholder)
-                self.parametros[placeholder] = pais
-            self.clausulas_where.append(f"Pais IN ({', '.join(placeholders)})")
-        return self
+        return self._adicionar_filtro_categorico('Pais', self.filtro.paises)
     
     def adicionar_filtro_intervalo_data(self):
-        """Adiciona filtro de período de datas à query"""
-        data_inicio = request.args.get('startDate')
-        data_fim = request.args.get('endDate')
+        """
+        Adiciona filtro de período de datas à query
+        
+        O mesmo período também é aplicado à coluna Mes, que é a chave de
+        partição no armazenamento em Parquet: assim o DuckDB descarta os
+        diretórios de meses fora do período sem abrir os arquivos.
+        """
+        data_inicio = self.filtro.data_inicio
+        data_fim = self.filtro.data_fim
         
         if data_inicio:
             placeholder = self._proximo_placeholder()
-            self.clausulas_where.append(f"Data >= {placeholder}")
+            self.clausulas_where.append(
+                f"Data >= {placeholder} AND Mes >= date_trunc('month', {placeholder}::TIMESTAMP)::DATE")
             self.parametros[placeholder] = data_inicio
         
         if data_fim:
             placeholder = self._proximo_placeholder()
-            self.clausulas_where.append(f"Data <= {placeholder}")
+            self.clausulas_where.append(
+                f"Data <= {placeholder} AND Mes <= date_trunc('month', {placeholder}::TIMESTAMP)::DATE")
             self.parametros[placeholder] = data_fim
         
         return self
@@ -83,11 +188,37 @@ class ConstrutorConsulta:
     def adicionar_filtro_customizado(self, coluna, valor):
         """Adiciona filtro customizado à query"""
         if valor and valor != 'all':
+            if coluna in COLUNAS_CATEGORICAS:
+                return self._adicionar_filtro_categorico(coluna, [valor])
             placeholder = self._proximo_placeholder()
             self.clausulas_where.append(f"{coluna} = {placeholder}")
             self.parametros[placeholder] = valor
         return self
     
+    def _adicionar_filtro_categorico(self, coluna, valores):
+        """
+        Filtro por valores de uma coluna ENUM
+        
+        Os valores são convertidos para o tipo da coluna (valores fora do
+        ENUM viram NULL e não casam), e a comparação é feita entre códigos
+        do dicionário, sem converter cada linha para texto como acontece
+        em "coluna IN ('texto', ...)".
+        """
+        if not valores:
+            return self
+        
+        convertidos = []
+        for valor in valores:
+            placeholder = self._proximo_placeholder()
+            convertidos.append(f"TRY_CAST({placeholder} AS {nome_tipo(coluna)})")
+            self.parametros[placeholder] = valor
+        
+        if len(convertidos) == 1:
+            self.clausulas_where.append(f"{coluna} = {convertidos[0]}")
+        else:
+            self.clausulas_where.append(f"list_contains([{', '.join(convertidos)}], {coluna})")
+        return self
+    
     def adicionar_filtro_busca(self, consulta_busca, colunas):
         """Adiciona filtro de busca textual em múltiplas colunas"""
         if consulta_busca and consulta_busca.strip():
@@ -100,6 +231,32 @@ class ConstrutorConsulta:
         
         return self
     
+    def adicionar_filtro_ids(self, ids):
+        """Restringe a query aos ids informados (resultado do índice de busca)"""
+        placeholder = self._proximo_placeholder()
+        self.clausulas_where.append(f"id IN (SELECT UNNEST({placeholder}::INTEGER[]))")
+        self.parametros[placeholder] = list(ids)
+        return self
+    
+    def adicionar_filtro_cursor(self, data, id_acidente):
+        """
+        Adiciona a condição de paginação por cursor (keyset) à query
+        Seleciona as linhas posteriores a (data, id) na ordem Data DESC NULLS LAST, id DESC
+        """
+        placeholder_id = self._proximo_placeholder()
+        self.parametros[placeholder_id] = id_acidente
+        
+        if data is None:
+            self.clausulas_where.append(f"(Data IS NULL AND id < {placeholder_id})")
+        else:
+            placeholder_data = self._proximo_placeholder()
+            self.parametros[placeholder_data] = data
+            self.clausulas_where.append(
+                f"(Data < {placeholder_data} OR (Data = {placeholder_data} AND id < {placeholder_id})"
+                f" OR Data IS NULL)"
+            )
+        return self
+    
     def obter_clausula_where(self):
         """Retorna a cláusula WHERE completa"""
         return " AND ".join(self.clausulas_where) if self.clausulas_where else "1=1"
@@ -0,0 +1,77 @@
+"""
+Versão dos dados - Carimbo que identifica cada carga do banco
+
+O carimbo fica em um arquivo ao lado do banco (<banco>.versao) e é
+renovado por toda rotina de ingestão. Caches e estruturas derivadas dos
+dados comparam a versão atual com a versão em que foram construídos.
+"""
+import os
+import threading
+import time
+import uuid
+
+
+_trava = threading.Lock()
+_versoes_lidas = {}
+
+
+def caminho_versao(caminho_bd):
+    """Retorna o caminho do arquivo de versão de um banco"""
+    return f'{caminho_bd}.versao'
+
+
+def caminho_do_banco(bd):
+    """Retorna o caminho do arquivo de uma conexão DuckDB (None se em memória)"""
+    return bd.execute("""
+        SELECT path FROM duckdb_databases() WHERE database_name = current_database()
+    """).fetchone()[0]
+
+
+def registrar_nova_versao(caminho_bd):
+    """Gera e grava um novo carimbo de versão para o banco"""
+    if not caminho_bd:
+        return None
+
+    versao = f'{time.strftime("%Y%m%d%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    arquivo = caminho_versao(caminho_bd)
+    temporario = f'{arquivo}.tmp'
+
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(versao)
+    os.replace(temporario, arquivo)
+
+    return versao
+
+
+def ler_versao_dados(caminho_bd):
+    """
+    Retorna (versao, modificado_em) do banco
+
+    O arquivo só é relido quando sua data de modificação muda, então a
+    chamada custa apenas um stat por requisição.
+    """
+    arquivo = caminho_versao(caminho_bd)
+    try:
+        modificado_em = os.stat(arquivo).st_mtime
+    except FileNotFoundError:
+        return None, None
+
+    with _trava:
+        lida = _versoes_lidas.get(arquivo)
+        if lida and lida[1] == modificado_em:
+            return lida
+
+    with open(arquivo, encoding='utf-8') as f:
+        versao = f.read().strip()
+
+    with _trava:
+        _versoes_lidas[arquivo] = (versao, modificado_em)
+    return versao, modificado_em
+
+
+def garantir_versao(caminho_bd):
+    """Cria o carimbo de versão caso o banco ainda não tenha um"""
+    versao, _ = ler_versao_dados(caminho_bd)
+    if versao is None:
+        versao = registrar_nova_versao(caminho_bd)
+    return versao
@@ -3,141 +3,84 @@
 Script para adicionar coluna 'Parte_Corpo' ao CSV
 Analisa as descrições dos acidentes e identifica qual parte do corpo foi afetada
 """
-import pandas as pd
+import argparse
+import os
 import re
-from datetime import datetime
+import sys
+import time
+
+import pandas as pd
 
-def detectar_parte_corpo(descricao):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backups import guardar_backup
+from app.parte_corpo import PARTES_CORPO, SEM_PARTE, classificar_partes_corpo, detectar_parte_corpo
+
+def detectar_parte_corpo_referencia(descricao):
     """
-    Detecta a parte do corpo afetada baseada na descrição do acidente
-    Retorna a parte do corpo em português para o mapa de calor
+    Implementação original, palavra a palavra (um re.search por palavra-chave)
+    Mantida apenas como referência para --verificar
     """
     if not descricao or pd.isna(descricao):
-        return 'Não especificado'
+        return SEM_PARTE
     
     desc_lower = descricao.lower()
     
-    # Dicionário de palavras-chave para cada parte do corpo
-    # Ordem de prioridade: mais específico primeiro
-    partes_corpo = {
-        # Cabeça e Face
-        'Olhos': [
-            'olho', 'olhos', 'eye', 'eyes', 'córnea', 'pálpebra', 'visão', 
-            'pupila', 'íris', 'retina', 'cego', 'cegueira'
-        ],
-        'Face': [
-            'rosto', 'face', 'facial', 'bochecha', 'zigomático', 'maxilar',
-            'queixo', 'testa', 'nariz', 'boca', 'lábio', 'dente', 'mandíbula'
-        ],
-        'Cabeça': [
-            'cabeça', 'crânio', 'craniano', 'head', 'skull', 'couro cabeludo',
-            'têmpora', 'occipital', 'frontal'
-        ],
-        'Orelha': [
-            'orelha', 'ouvido', 'ear', 'audição', 'tímpano', 'auricular'
-        ],
-        'Pescoço': [
-            'pescoço', 'cervical', 'neck', 'garganta', 'throat', 'traqueia',
-            'laringe', 'nuca'
-        ],
-        
-        # Membros Superiores - Específico para Esquerdo/Direito
-        'Mão Esquerda': [
-            'mão esquerda', 'left hand', 'dedo esquerdo', 'dedos esquerdos',
-            'pulso esquerdo', 'palma esquerda', 'quirodáctilo esquerdo'
-        ],
-        'Mão Direita': [
-            'mão direita', 'right hand', 'dedo direito', 'dedos direitos',
-            'pulso direito', 'palma direita', 'quirodáctilo direito'
-        ],
-        'Braço Esquerdo': [
-            'braço esquerdo', 'left arm', 'antebraço esquerdo', 
-            'cotovelo esquerdo', 'úmero esquerdo', 'ombro esquerdo'
-        ],
-        'Braço Direito': [
-            'braço direito', 'right arm', 'antebraço direito',
-            'cotovelo direito', 'úmero direito', 'ombro direito'
-        ],
-        
-        # Membros Superiores - Genérico
-        'Mãos': [
-            'mão', 'mãos', 'hand', 'hands', 'dedo', 'dedos', 'finger', 'fingers',
-            'pulso', 'wrist', 'palma', 'punho', 'metacarpo', 'falange',
-            'quirodáctilo', 'polegar', 'indicador', 'médio', 'anelar', 'mindinho'
-        ],
-        'Braços': [
-            'braço', 'braços', 'arm', 'arms', 'antebraço', 'forearm',
-            'cotovelo', 'elbow', 'úmero', 'rádio', 'ulna', 'ombro', 'shoulder'
-        ],
-        
-        # Tronco
-        'Tórax': [
-            'tórax', 'peito', 'chest', 'peitoral', 'costela', 'esterno',
-            'clavícula', 'escápula', 'rib'
-        ],
-        'Abdômen': [
-            'abdômen', 'abdomen', 'barriga', 'belly', 'estômago', 'stomach',
-            'abdominal', 'ventre', 'umbigo'
-        ],
-        'Costas': [
-            'costas', 'back', 'dorsal', 'lombar', 'coluna', 'vértebra',
-            'espinha', 'spine', 'lombo'
-        ],
-        'Quadril': [
-            'quadril', 'hip', 'pelve', 'pélvico', 'ilíaco', 'sacro', 'cóccix'
-        ],
-        
-        # Membros Inferiores - Específico para Esquerdo/Direito
-        'Perna Esquerda': [
-            'perna esquerda', 'left leg', 'coxa esquerda', 'joelho esquerdo',
-            'canela esquerda', 'panturrilha esquerda', 'tíbia esquerda'
-        ],
-        'Perna Direita': [
-            'perna direita', 'right leg', 'coxa direita', 'joelho direito',
-            'canela direita', 'panturrilha direita', 'tíbia direita'
-        ],
-        'Pé Esquerdo': [
-            'pé esquerdo', 'left foot', 'tornozelo esquerdo', 
-            'calcanhar esquerdo', 'dedos do pé esquerdo'
-        ],
-        'Pé Direito': [
-            'pé direito', 'right foot', 'tornozelo direito',
-            'calcanhar direito', 'dedos do pé direito'
-        ],
-        
-        # Membros Inferiores - Genérico
-        'Pernas': [
-            'perna', 'pernas', 'leg', 'legs', 'coxa', 'thigh', 
-            'joelho', 'knee', 'canela', 'panturrilha', 'calf',
-            'fêmur', 'tíbia', 'fíbula', 'patela'
-        ],
-        'Pés': [
-            'pé', 'pés', 'foot', 'feet', 'tornozelo', 'ankle',
-            'calcanhar', 'heel', 'dedos do pé', 'toe', 'toes',
-            'metatarso', 'tarso', 'calcâneo', 'planta do pé'
-        ],
-        
-        # Múltiplas partes
-        'Múltiplas': [
-            'várias partes', 'multiple', 'politraumatismo', 'politrauma',
-            'corpo todo', 'whole body', 'várias regiões'
-        ]
-    }
-    
     # Verificar cada parte do corpo
     # Ordem de prioridade: mais específico primeiro
-    for parte, palavras_chave in partes_corpo.items():
+    for parte, palavras_chave in PARTES_CORPO.items():
         for palavra in palavras_chave:
             # Usar regex para buscar palavra completa
             if re.search(r'\b' + re.escape(palavra) + r'\b', desc_lower):
                 return parte
     
     # Se não encontrou nada específico, retornar 'Não especificado'
-    return 'Não especificado'
+    return SEM_PARTE
+
+def textos_de_verificacao(descricoes):
+    """Descrições do CSV mais frases sintéticas com cada par de palavras-chave"""
+    palavras = [palavra for lista in PARTES_CORPO.values() for palavra in lista]
+    sinteticos = [f"O colaborador feriu {a}, e também {b}." for a in palavras for b in palavras]
+    # Palavra-chave dentro de outra palavra não conta (limite de palavra)
+    sinteticos += [f"Sem lesão: {palavra}s{palavra}x" for palavra in palavras]
+    sinteticos += [palavra.upper() for palavra in palavras] + ['', None, float('nan')]
+    return pd.concat([pd.Series(descricoes, dtype=object), pd.Series(sinteticos, dtype=object)],
+                     ignore_index=True)
 
-def adicionar_coluna_parte_corpo():
-    csv_path = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
-    backup_path = f'data/backup_antes_adicionar_parte_corpo_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+def verificar_classificador(csv_path, processos):
+    """Compara o classificador vetorizado com a implementação original"""
+    print("=" * 80)
+    print("🧪 VERIFICANDO O CLASSIFICADOR DE PARTE DO CORPO")
+    print("=" * 80)
+    
+    textos = textos_de_verificacao(pd.read_csv(csv_path)['Descricao'])
+    print(f"\n   Textos verificados: {len(textos)}")
+    
+    inicio = time.perf_counter()
+    esperado = [detectar_parte_corpo_referencia(texto) for texto in textos]
+    tempo_referencia = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    obtido = classificar_partes_corpo(textos, processos=processos).tolist()
+    tempo_vetorizado = time.perf_counter() - inicio
+    
+    individual = [detectar_parte_corpo(texto) for texto in textos]
+    
+    divergencias = [(texto, a, b, c) for texto, a, b, c in zip(textos, esperado, obtido, individual)
+                    if not a == b == c]
+    print(f"   Original (por palavra): {tempo_referencia:.2f}s")
+    print(f"   Vetorizado:             {tempo_vetorizado:.2f}s ({tempo_referencia / tempo_vetorizado:.0f}x)")
+    
+    if divergencias:
+        print(f"\n❌ {len(divergencias)} rótulos diferentes. Exemplos:")
+        for texto, a, b, c in divergencias[:10]:
+            print(f"   • {str(texto)[:60]!r}: original={a} vetorizado={b} individual={c}")
+        sys.exit(1)
+    print(f"\n✅ Rótulos idênticos aos da implementação original")
+
+CSV_PATH = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
+
+def adicionar_coluna_parte_corpo(csv_path=CSV_PATH, processos=1):
     
     print("=" * 80)
     print("🔍 ADICIONANDO COLUNA 'PARTE DO CORPO' AO CSV")
@@ -148,26 +91,16 @@ def adicionar_coluna_parte_corpo():
     df = pd.read_csv(csv_path)
     print(f"   Total de registros: {len(df)}")
     
-    # Backup
-    print(f"\n💾 Criando backup em: {backup_path}")
-    df.to_csv(backup_path, index=False)
+    # Backup (só os blocos que mudaram desde a última versão são gravados)
+    backup = guardar_backup(csv_path, 'antes_adicionar_parte_corpo')
+    print(f"\n💾 Backup guardado: versão {backup['versao']} ({backup['bytesGravados'] / 1024:.1f} KB novos)")
     
     # Detectar parte do corpo para cada acidente
+    # (palavras-chave compiladas uma vez, classificação vetorizada por parte)
     print(f"\n🔍 Analisando descrições para detectar partes do corpo...")
-    print(f"   (Isso pode levar alguns segundos...)\n")
-    
-    partes_corpo = []
-    for idx, row in df.iterrows():
-        parte = detectar_parte_corpo(row['Descricao'])
-        partes_corpo.append(parte)
-        
-        if (idx + 1) % 50 == 0:
-            print(f"   Processado: {idx + 1}/{len(df)} acidentes...", end='\r')
-    
-    print(f"   Processado: {len(df)}/{len(df)} acidentes... ✅")
-    
-    # Adicionar coluna
-    df['Parte_Corpo'] = partes_corpo
+    inicio = time.perf_counter()
+    df['Parte_Corpo'] = classificar_partes_corpo(df['Descricao'], processos=processos)
+    print(f"   Processado: {len(df)}/{len(df)} acidentes em {time.perf_counter() - inicio:.2f}s ✅")
     
     # Estatísticas
     print(f"\n📊 ESTATÍSTICAS DAS PARTES DO CORPO DETECTADAS:")
@@ -185,7 +118,7 @@ def adicionar_coluna_parte_corpo():
     print("=" * 80)
     
     print(f"\n📁 ARQUIVOS:")
-    print(f"   • Backup: {backup_path}")
+    print(f"   • Backup: versão {backup['versao']} (python scripts/backups.py restaurar {backup['versao']})")
     print(f"   • CSV Atualizado: {csv_path}")
     
     print(f"\n🔍 AMOSTRAS:")
@@ -203,4 +136,15 @@ def adicionar_coluna_parte_corpo():
     return df
 
 if __name__ == '__main__':
-    adicionar_coluna_parte_corpo()
+    parser = argparse.ArgumentParser(description="Adiciona a coluna Parte_Corpo ao CSV")
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1,
+                        help='Processos para arquivos grandes (a partir de 50 mil linhas por processo)')
+    parser.add_argument('--verificar', action='store_true',
+                        help='Compara o classificador com a implementação original, sem alterar o CSV')
+    args = parser.parse_args()
+    
+    if args.verificar:
+        verificar_classificador(args.csv, args.processos)
+    else:
+        adicionar_coluna_parte_corpo(args.csv, args.processos)
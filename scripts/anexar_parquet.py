@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script para anexar acidentes ao armazenamento em Parquet particionado
+(ARMAZENAMENTO = 'parquet')
+
+Lê um CSV no formato do arquivo original e grava apenas os acidentes cujo
+id ainda não existe, como arquivos novos nas partições Ano=/Mes=/Pais=. Os
+arquivos já gravados não são reescritos. Ao final a versão dos dados é
+renovada, e a aplicação recria a view na próxima requisição.
+
+Pode rodar com a aplicação no ar: o script não abre o banco DuckDB, só
+grava na pasta de Parquet e no arquivo de versão.
+
+Uso:
+    python scripts/anexar_parquet.py [--csv arquivo.csv] [--pasta data/acidentes_parquet]
+                                     [--banco acidentes.duckdb]
+"""
+import argparse
+import os
+import sys
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.esquema import ARQUIVO_CSV, anexar_particoes, origem_csv, origem_parquet, particoes_existem
+from app.versao_dados import registrar_nova_versao
+
+
+def anexar(caminho_csv, pasta, caminho_bd):
+    print("=" * 80)
+    print("📦 CARGA INCREMENTAL NO PARQUET PARTICIONADO")
+    print("=" * 80)
+
+    if not os.path.exists(caminho_csv):
+        print(f"\n❌ ERRO: Arquivo CSV não encontrado em {caminho_csv}")
+        return
+
+    print(f"\n📁 Arquivo CSV: {caminho_csv}")
+    print(f"📁 Pasta Parquet: {pasta}")
+
+    os.makedirs(pasta, exist_ok=True)
+    db = duckdb.connect()
+    try:
+        inicio = time.perf_counter()
+        total = anexar_particoes(db, origem_csv(caminho_csv), pasta)
+        print(f"\n   ✅ {total} acidentes novos gravados em {time.perf_counter() - inicio:.1f}s")
+
+        if particoes_existem(pasta):
+            linhas, particoes = db.execute(f"""
+                SELECT COUNT(*), COUNT(DISTINCT (Ano, Mes, Pais)) FROM {origem_parquet(pasta)}
+            """).fetchone()
+            print(f"   📊 Total no Parquet: {linhas} acidentes em {particoes} partições")
+    finally:
+        db.close()
+
+    if total:
+        versao = registrar_nova_versao(caminho_bd)
+        print(f"   🏷️  Nova versão dos dados: {versao}")
+    else:
+        print(f"   ℹ️  Nenhum acidente novo, versão dos dados mantida")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default=ARQUIVO_CSV)
+    parser.add_argument('--pasta', default='data/acidentes_parquet')
+    parser.add_argument('--banco', default='acidentes.duckdb')
+    args = parser.parse_args()
+
+    anexar(args.csv, args.pasta, args.banco)
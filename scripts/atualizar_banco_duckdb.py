@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
 """
 Script para atualizar o banco DuckDB com os dados traduzidos
-Remove a tabela antiga e recria com os dados novos em português BR
+Aplica de forma incremental apenas os acidentes novos, alterados ou
+removidos do CSV em português BR (no layout definido em app/esquema.py)
+
+A carga é feita em um snapshot novo (cópia do arquivo ativo), validada e
+publicada com a troca atômica do ponteiro de app/snapshots.py; a aplicação
+pode continuar no ar e passa a servir o snapshot novo sem reiniciar.
 """
 import duckdb
 import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backups import guardar_backup
+from app.esquema import atualizar_incremental, carregar_acidentes, esquema_otimizado, origem_csv
+from app.snapshots import (arquivo_ativo, coletar_snapshots, descartar_snapshot, novo_snapshot,
+                           publicar_snapshot)
 
 def atualizar_banco_duckdb():
     db_path = 'acidentes.duckdb'
@@ -22,20 +36,32 @@ def atualizar_banco_duckdb():
     print(f"\n📁 Arquivo CSV: {csv_path}")
     print(f"📁 Banco DuckDB: {db_path}")
     
-    # Backup do banco antigo se existir
-    if os.path.exists(db_path):
-        backup_path = f"{db_path}.backup"
+    ativo = arquivo_ativo(db_path)
+    if ativo != db_path:
+        print(f"📁 Snapshot ativo: {ativo}")
+    
+    # Backup do banco antigo se existir (deduplicado por conteúdo: só os
+    # blocos que mudaram desde o último backup são gravados)
+    if os.path.exists(ativo):
         print(f"\n💾 Fazendo backup do banco atual...")
         try:
-            import shutil
-            shutil.copy2(db_path, backup_path)
-            print(f"   ✅ Backup criado em: {backup_path}")
+            backup = guardar_backup(ativo, 'antes_atualizar_banco', origem=db_path)
+            print(f"   ✅ Backup: versão {backup['versao']} "
+                  f"({backup['blocosNovos']} blocos novos, {backup['bytesGravados'] / 1024:.1f} KB gravados)")
         except Exception as e:
             print(f"   ⚠️  Aviso: Não foi possível criar backup: {e}")
     
-    # Conectar ao banco
+    # A carga é aplicada em uma cópia do arquivo ativo, que a aplicação continua
+    # servindo; snapshots publicados não são mais alterados (abertos somente leitura)
+    snapshot = novo_snapshot(db_path)
+    print(f"\n🗂️  Preparando o snapshot {snapshot}...")
+    for sufixo in ('', '.wal'):
+        if os.path.exists(f'{ativo}{sufixo}'):
+            shutil.copy2(f'{ativo}{sufixo}', f'{snapshot}{sufixo}')
+    
+    # Conectar ao snapshot novo
     print(f"\n🔌 Conectando ao banco DuckDB...")
-    db = duckdb.connect(db_path)
+    db = duckdb.connect(snapshot)
     
     # Verificar se a tabela existe e quantos registros tem
     try:
@@ -46,46 +72,31 @@ def atualizar_banco_duckdb():
         registros_antigos = 0
         print(f"   ℹ️  Tabela 'acidentes' ainda não existe")
     
-    # Dropar a tabela antiga se existir
-    print(f"\n🗑️  Removendo tabela antiga...")
-    db.execute("DROP TABLE IF EXISTS acidentes")
-    print(f"   ✅ Tabela removida")
-    
-    # Criar nova tabela com nomes de colunas atualizados (em português)
-    print(f"\n🏗️  Criando nova estrutura da tabela...")
-    db.execute("""
-        CREATE TABLE acidentes (
-            id INTEGER PRIMARY KEY,
-            Data TIMESTAMP,
-            Pais VARCHAR(100),
-            Estado VARCHAR(200),
-            Setor_Industrial VARCHAR(100),
-            Nivel_Acidente VARCHAR(50),
-            Nivel_Acidente_Potencial VARCHAR(50),
-            Genero VARCHAR(20),
-            Tipo_Trabalhador VARCHAR(50),
-            Risco_Critico VARCHAR(200),
-            Descricao TEXT,
-            Parte_Corpo VARCHAR(50)
-        )
-    """)
-    print(f"   ✅ Tabela criada")
-    
-    # Importar dados do CSV
-    print(f"\n📥 Importando dados do CSV traduzido...")
+    # Aplicar só as diferenças em relação ao CSV traduzido (hash por linha +
+    # INSERT ... ON CONFLICT); o CSV é a fonte completa, então ids ausentes
+    # são removidos. Sem tabela ou no layout antigo, recria a partir do CSV.
     try:
-        # Usar a função COPY do DuckDB para importação eficiente
-        db.execute(f"""
-            COPY acidentes FROM '{csv_path}' 
-            (DELIMITER ',', HEADER TRUE, AUTO_DETECT TRUE)
-        """)
+        if registros_antigos and esquema_otimizado(db):
+            print(f"\n📥 Aplicando as alterações do CSV traduzido...")
+            resultado = atualizar_incremental(db, origem_csv(csv_path), remover_ausentes=True)
+            print(f"   • Novos: {resultado['inserted']}")
+            print(f"   • Alterados: {resultado['updated']}")
+            print(f"   • Inalterados: {resultado['unchanged']}")
+            print(f"   • Removidos: {resultado['deleted']}")
+            if resultado['rebuilt']:
+                print(f"   ℹ️  Categorias novas encontradas, tabela recriada")
+            houve_alteracao = any(resultado[chave] for chave in ('inserted', 'updated', 'deleted'))
+        else:
+            print(f"\n📥 Recriando a tabela e importando dados do CSV traduzido...")
+            carregar_acidentes(db, origem_csv(csv_path))
+            houve_alteracao = True
         
         # Verificar quantos registros foram importados
         result = db.execute("SELECT COUNT(*) FROM acidentes").fetchone()
         registros_novos = result[0]
         
         print(f"   ✅ Dados importados com sucesso!")
-        print(f"   📊 Total de registros importados: {registros_novos}")
+        print(f"   📊 Total de registros na tabela: {registros_novos}")
         
         # Estatísticas dos dados importados
         print(f"\n📊 ESTATÍSTICAS DOS DADOS IMPORTADOS:")
@@ -151,10 +162,6 @@ def atualizar_banco_duckdb():
             print(f"      Estado: {amostra[1]}")
             print(f"      Descrição: {amostra[2][:150]}...")
         
-        print("\n" + "=" * 80)
-        print("✅ BANCO DUCKDB ATUALIZADO COM SUCESSO!")
-        print("=" * 80)
-        
         if registros_antigos > 0:
             diferenca = registros_novos - registros_antigos
             print(f"\n📊 COMPARAÇÃO:")
@@ -164,15 +171,42 @@ def atualizar_banco_duckdb():
             if diferenca < 0:
                 print(f"   ℹ️  Menos registros (duplicatas foram removidas)")
         
-        print(f"\n✅ O banco está pronto para uso com dados 100% em português BR!")
-        
     except Exception as e:
         print(f"\n❌ ERRO ao importar dados: {e}")
+        db.close()
+        descartar_snapshot(snapshot)
         raise
     
     finally:
         db.close()
         print(f"\n🔌 Conexão com o banco fechada.")
+    
+    # Sem alterações, o snapshot ativo continua valendo
+    if not houve_alteracao:
+        descartar_snapshot(snapshot)
+        print(f"\n   ℹ️  Nenhuma alteração, snapshot e versão dos dados mantidos")
+        return
+    
+    # Validar e publicar o snapshot (troca atômica do ponteiro + nova versão dos
+    # dados, que invalida os caches da aplicação)
+    print(f"\n🔁 Publicando o snapshot...")
+    try:
+        versao = publicar_snapshot(db_path, snapshot)
+    except Exception as e:
+        print(f"   ❌ Snapshot rejeitado, a aplicação continua no anterior: {e}")
+        descartar_snapshot(snapshot)
+        raise
+    print(f"   ✅ Snapshot ativo: {snapshot}")
+    print(f"   🏷️  Nova versão dos dados: {versao}")
+    
+    # Apagar snapshots antigos (mantém o anterior para rollback)
+    for removido in coletar_snapshots(db_path):
+        print(f"   🗑️  Snapshot antigo removido: {removido}")
+    
+    print("\n" + "=" * 80)
+    print("✅ BANCO DUCKDB ATUALIZADO COM SUCESSO!")
+    print("=" * 80)
+    print(f"\n✅ O banco está pronto para uso com dados 100% em português BR!")
 
 if __name__ == '__main__':
     try:
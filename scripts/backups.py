@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script para listar, restaurar e podar os backups deduplicados (app/backups.py)
+
+Os scripts de ETL guardam uma versão do CSV (e atualizar_banco_duckdb.py do
+banco) antes de alterá-lo; só os blocos que mudaram ocupam espaço novo.
+
+Uso:
+    python scripts/backups.py listar [--origem arquivo]
+    python scripts/backups.py guardar arquivo [--rotulo texto]
+    python scripts/backups.py restaurar VERSAO [--destino arquivo]
+    python scripts/backups.py restaurar VERSAO --publicar acidentes.duckdb
+    python scripts/backups.py podar [--manter 10] [--dias 30]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backups import DIAS_RETENCAO, PASTA_BACKUPS, VERSOES_RETIDAS, ArmazemBackups
+from app.snapshots import descartar_snapshot, novo_snapshot, publicar_snapshot
+
+
+def tamanho_legivel(total):
+    for unidade in ('B', 'KB', 'MB'):
+        if total < 1024:
+            return f'{total:.1f} {unidade}'
+        total /= 1024
+    return f'{total:.1f} GB'
+
+
+def listar(armazem, origem):
+    versoes = armazem.listar(origem)
+    if not versoes:
+        print("ℹ️  Nenhum backup guardado")
+        return
+
+    print(f"   {'Versão':26} {'Criado em':20} {'Tamanho':>10}  {'Rótulo':28} Origem")
+    for manifesto in versoes:
+        print(f"   {manifesto['versao']:26} {manifesto['criadoEm'][:19].replace('T', ' '):20} "
+              f"{tamanho_legivel(manifesto['tamanho']):>10}  {manifesto['rotulo'] or '-':28} {manifesto['origem']}")
+
+    ocupacao = armazem.ocupacao()
+    print(f"\n📦 {len(versoes)} versões, {tamanho_legivel(ocupacao['originais'])} no total; "
+          f"{tamanho_legivel(ocupacao['ocupados'])} ocupados em disco (todas as versões)")
+
+
+def guardar(armazem, caminho, rotulo):
+    backup = armazem.guardar(caminho, rotulo)
+    print(f"💾 Versão {backup['versao']}: {backup['blocosNovos']} de {len(backup['blocos'])} blocos novos, "
+          f"{tamanho_legivel(backup['bytesGravados'])} gravados")
+
+
+def restaurar(armazem, versao, destino, banco):
+    if banco:
+        # Restaura o banco como um snapshot novo, validado e publicado com a
+        # aplicação no ar (como atualizar_banco_duckdb.py)
+        snapshot = armazem.restaurar(versao, novo_snapshot(banco))
+        try:
+            nova_versao = publicar_snapshot(banco, snapshot)
+        except Exception:
+            descartar_snapshot(snapshot)
+            raise
+        print(f"✅ Versão {versao} publicada como {snapshot}")
+        print(f"🏷️  Nova versão dos dados: {nova_versao}")
+        return
+
+    caminho = armazem.restaurar(versao, destino)
+    print(f"✅ Versão {versao} restaurada em {caminho}")
+
+
+def podar(armazem, manter, dias):
+    resultado = armazem.podar(manter, dias)
+    print(f"🗑️  {resultado['versoes']} versões e {resultado['objetos']} blocos removidos "
+          f"({tamanho_legivel(resultado['bytes'])} liberados)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pasta', default=PASTA_BACKUPS)
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_listar = comandos.add_parser('listar', help='Lista as versões guardadas')
+    parser_listar.add_argument('--origem', help='Só as versões deste arquivo')
+
+    parser_guardar = comandos.add_parser('guardar', help='Guarda uma versão de um arquivo')
+    parser_guardar.add_argument('caminho')
+    parser_guardar.add_argument('--rotulo')
+
+    parser_restaurar = comandos.add_parser('restaurar', help='Restaura uma versão')
+    parser_restaurar.add_argument('versao', help='Identificador da versão (ou um prefixo único)')
+    parser_restaurar.add_argument('--destino', help='Arquivo a gravar (padrão: o arquivo de origem)')
+    parser_restaurar.add_argument('--publicar', metavar='BANCO',
+                                  help='Publica a versão como snapshot ativo deste banco DuckDB')
+
+    parser_podar = comandos.add_parser('podar', help='Aplica a política de retenção')
+    parser_podar.add_argument('--manter', type=int, default=VERSOES_RETIDAS,
+                              help='Versões mais recentes mantidas por arquivo')
+    parser_podar.add_argument('--dias', type=int, default=DIAS_RETENCAO,
+                              help='Mantém também as versões mais novas que isso')
+
+    args = parser.parse_args()
+    armazem = ArmazemBackups(args.pasta)
+
+    if args.comando == 'listar':
+        listar(armazem, args.origem)
+    elif args.comando == 'guardar':
+        guardar(armazem, args.caminho, args.rotulo)
+    elif args.comando == 'restaurar':
+        restaurar(armazem, args.versao, args.destino, args.publicar)
+    else:
+        podar(armazem, args.manter, args.dias)
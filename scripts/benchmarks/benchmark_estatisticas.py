@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark de /api/statistics: seis consultas GROUP BY separadas versus
+uma única varredura com GROUPING SETS (ServicoEstatisticas)
+
+Gera tabelas sintéticas em memória replicando as linhas do CSV original
+até o tamanho desejado e mede o tempo médio de cada abordagem.
+
+Uso:
+    python scripts/benchmarks/benchmark_estatisticas.py [--linhas 1000000 10000000] [--repeticoes 5] [--sintetico]
+"""
+import argparse
+import os
+import sys
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.esquema import carregar_acidentes
+from app.services import ServicoEstatisticas
+from gerar_dados_sinteticos import criar_replicas_sinteticas
+
+CSV_PATH = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
+
+
+def criar_tabela_sintetica(bd, total_linhas, sintetico=False):
+    """
+    Cria a tabela acidentes replicando o CSV até total_linhas, variando datas
+    
+    Com sintetico=True, as linhas vêm de gerar_dados_sinteticos.py.
+    """
+    if sintetico:
+        criar_replicas_sinteticas(bd, total_linhas)
+        carregar_acidentes(bd, 'replicas')
+        return
+    
+    bd.execute(f"CREATE OR REPLACE TEMP TABLE base AS SELECT * FROM read_csv('{CSV_PATH}', header = true)")
+    linhas_base = bd.execute("SELECT COUNT(*) FROM base").fetchone()[0]
+    copias = -(-total_linhas // linhas_base)
+    
+    bd.execute(f"""
+        CREATE OR REPLACE TEMP TABLE replicas AS
+        SELECT (c.i * {linhas_base} + b.id)::INTEGER as id,
+               b.Data + to_days((c.i % 730)::INTEGER) as Data,
+               b.* EXCLUDE (id, Data)
+        FROM base b, range({copias}) c(i)
+        LIMIT {total_linhas}
+    """)
+    
+    # Mesmo layout da aplicação (ENUM, ordem por Data, coluna Mes)
+    carregar_acidentes(bd, 'replicas')
+
+
+def estatisticas_seis_consultas(bd):
+    """Implementação anterior: uma consulta GROUP BY por estatística"""
+    return {
+        'gender': bd.execute("""
+            SELECT Genero, COUNT(*) as count FROM acidentes GROUP BY Genero
+        """).fetchall(),
+        'countries': bd.execute("""
+            SELECT Pais, COUNT(*) as count FROM acidentes GROUP BY Pais ORDER BY count DESC
+        """).fetchall(),
+        'sectors': bd.execute("""
+            SELECT Setor_Industrial, COUNT(*) as count FROM acidentes GROUP BY Setor_Industrial
+        """).fetchall(),
+        'months': bd.execute("""
+            SELECT strftime(Data, '%Y-%m') as month, COUNT(*) as count
+            FROM acidentes GROUP BY month ORDER BY month
+        """).fetchall(),
+        'locations': bd.execute("""
+            SELECT Estado, Pais, COUNT(*) as count
+            FROM acidentes GROUP BY Estado, Pais ORDER BY count DESC LIMIT 10
+        """).fetchall(),
+        'bodyParts': bd.execute("""
+            SELECT Parte_Corpo, COUNT(*) as count
+            FROM acidentes GROUP BY Parte_Corpo ORDER BY count DESC
+        """).fetchall()
+    }
+
+
+def medir(funcao, repeticoes):
+    """Executa a função uma vez para aquecer e retorna o tempo médio em ms"""
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def executar_benchmark(tamanhos, repeticoes, sintetico=False):
+    print("=" * 80)
+    print("⏱️  BENCHMARK - ESTATÍSTICAS AGREGADAS (/api/statistics)")
+    print("=" * 80)
+    
+    for total_linhas in tamanhos:
+        bd = duckdb.connect()
+        print(f"\n🏗️  Gerando {total_linhas:,} linhas sintéticas...")
+        criar_tabela_sintetica(bd, total_linhas, sintetico)
+        
+        servico = ServicoEstatisticas(bd)
+        tempo_antigo = medir(lambda: estatisticas_seis_consultas(bd), repeticoes)
+        tempo_novo = medir(servico.obter_todas_estatisticas, repeticoes)
+        
+        print(f"   • Seis consultas GROUP BY:  {tempo_antigo:10.1f} ms")
+        print(f"   • GROUPING SETS (1 scan):   {tempo_novo:10.1f} ms")
+        print(f"   • Speedup:                  {tempo_antigo / tempo_novo:10.2f}x")
+        
+        bd.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sintetico', action='store_true',
+                        help='Usa o gerador de dados sintéticos em vez de replicar o CSV')
+    args = parser.parse_args()
+    
+    executar_benchmark(args.linhas, args.repeticoes, args.sintetico)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark do layout físico da tabela acidentes: layout antigo (VARCHAR, ordem
+do CSV, strftime por linha) versus o layout de app/esquema.py (ENUM, ordem
+por Data, coluna Mes)
+
+Gera os dois bancos em arquivos temporários com as mesmas linhas sintéticas
+e compara, para cada consulta, o tempo médio e as linhas lidas pela varredura
+(operator_rows_scanned do EXPLAIN ANALYZE), que mostra os row groups
+descartados pelos zone maps. Também compara o tamanho dos arquivos. As
+consultas do layout otimizado são as geradas pelo ConstrutorConsulta.
+
+Uso:
+    python scripts/benchmarks/benchmark_layout.py [--linhas 1000000 10000000] [--repeticoes 5] [--sintetico]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.esquema import carregar_acidentes, origem_csv
+from gerar_dados_sinteticos import criar_replicas_sinteticas
+
+DDL_ANTIGO = """
+    CREATE TABLE acidentes (
+        id INTEGER PRIMARY KEY,
+        Data TIMESTAMP,
+        Pais VARCHAR(100),
+        Estado VARCHAR(200),
+        Setor_Industrial VARCHAR(100),
+        Nivel_Acidente VARCHAR(50),
+        Nivel_Acidente_Potencial VARCHAR(50),
+        Genero VARCHAR(20),
+        Tipo_Trabalhador VARCHAR(50),
+        Risco_Critico VARCHAR(200),
+        Descricao TEXT,
+        Parte_Corpo VARCHAR(50)
+    )
+"""
+
+# (nome, SQL no layout antigo, SQL no layout otimizado)
+CONSULTAS = [
+    ('Período de 1 mês (contagem)',
+     """SELECT COUNT(*) FROM acidentes
+        WHERE Data >= TIMESTAMP '2017-03-01' AND Data < TIMESTAMP '2017-04-01'""",
+     """SELECT COUNT(*) FROM acidentes
+        WHERE Data >= TIMESTAMP '2017-03-01' AND Data < TIMESTAMP '2017-04-01'"""),
+    ('Trimestre por setor e gênero',
+     """SELECT Setor_Industrial, Genero, COUNT(*) FROM acidentes
+        WHERE Data >= TIMESTAMP '2018-01-01' AND Data < TIMESTAMP '2018-04-01'
+        GROUP BY ALL""",
+     """SELECT Setor_Industrial, Genero, COUNT(*) FROM acidentes
+        WHERE Data >= TIMESTAMP '2018-01-01' AND Data < TIMESTAMP '2018-04-01'
+        GROUP BY ALL"""),
+    ('Série mensal',
+     """SELECT strftime(Data, '%Y-%m') as month, COUNT(*) FROM acidentes
+        GROUP BY month ORDER BY month""",
+     """SELECT strftime(Mes, '%Y-%m') as month, COUNT(*) FROM acidentes
+        GROUP BY Mes ORDER BY Mes"""),
+    ('Gênero e país por setor',
+     """SELECT Setor_Industrial, COUNT(*) FROM acidentes
+        WHERE Genero = 'Mulher' AND Pais IN ('Brasil', 'EUA') GROUP BY 1""",
+     """SELECT Setor_Industrial, COUNT(*) FROM acidentes
+        WHERE Genero = TRY_CAST('Mulher' AS categoria_genero)
+          AND list_contains([TRY_CAST('Brasil' AS categoria_pais), TRY_CAST('EUA' AS categoria_pais)], Pais)
+        GROUP BY 1"""),
+    ('Um país por parte do corpo',
+     """SELECT Parte_Corpo, COUNT(*) FROM acidentes WHERE Pais = 'Brasil' GROUP BY 1""",
+     """SELECT Parte_Corpo, COUNT(*) FROM acidentes
+        WHERE Pais = TRY_CAST('Brasil' AS categoria_pais) GROUP BY 1"""),
+    ('Estatísticas (GROUPING SETS)',
+     """SELECT Genero, Pais, Setor_Industrial, strftime(month, '%Y-%m'), Estado, Parte_Corpo, COUNT(*)
+        FROM (SELECT *, date_trunc('month', Data) as month FROM acidentes)
+        GROUP BY GROUPING SETS ((Genero), (Pais), (Setor_Industrial), (month), (Estado, Pais), (Parte_Corpo))""",
+     """SELECT Genero, Pais, Setor_Industrial, strftime(Mes, '%Y-%m'), Estado, Parte_Corpo, COUNT(*)
+        FROM acidentes
+        GROUP BY GROUPING SETS ((Genero), (Pais), (Setor_Industrial), (Mes), (Estado, Pais), (Parte_Corpo))"""),
+]
+
+
+def criar_replicas(bd, total_linhas, sintetico=False):
+    """
+    Tabela temporária com o CSV replicado até total_linhas (ordem do CSV, datas variando)
+    
+    Com sintetico=True, as linhas vêm de gerar_dados_sinteticos.py: textos
+    e combinações de colunas variados, em vez das mesmas linhas repetidas.
+    """
+    if sintetico:
+        criar_replicas_sinteticas(bd, total_linhas)
+        return
+    
+    bd.execute(f"CREATE OR REPLACE TEMP TABLE base AS SELECT * FROM {origem_csv()}")
+    linhas_base = bd.execute("SELECT COUNT(*) FROM base").fetchone()[0]
+    copias = -(-total_linhas // linhas_base)
+    
+    bd.execute(f"""
+        CREATE OR REPLACE TEMP TABLE replicas AS
+        SELECT (c.i * {linhas_base} + b.id)::INTEGER as id,
+               b.Data + to_days((c.i % 730)::INTEGER) as Data,
+               b.* EXCLUDE (id, Data)
+        FROM range({copias}) c(i), base b
+        LIMIT {total_linhas}
+    """)
+
+
+def criar_banco(caminho, total_linhas, otimizado, sintetico=False):
+    """Cria um banco em arquivo com o layout antigo ou o otimizado"""
+    bd = duckdb.connect(caminho)
+    criar_replicas(bd, total_linhas, sintetico)
+    if otimizado:
+        carregar_acidentes(bd, 'replicas')
+    else:
+        bd.execute(DDL_ANTIGO)
+        bd.execute("INSERT INTO acidentes SELECT * FROM replicas")
+        bd.execute("CHECKPOINT")
+    bd.execute("DROP TABLE replicas")
+    bd.execute("DROP TABLE IF EXISTS base")
+    return bd
+
+
+def linhas_lidas(bd, consulta):
+    """Soma das linhas lidas pelas varreduras da tabela (após os zone maps)"""
+    plano = bd.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {consulta}").fetchall()[0][1]
+    
+    def somar(no):
+        total = no.get('operator_rows_scanned', 0) if 'SCAN' in no.get('operator_name', '') else 0
+        return total + sum(somar(filho) for filho in no.get('children', []))
+    
+    return somar(json.loads(plano))
+
+
+def medir(bd, consulta, repeticoes):
+    """Executa a consulta uma vez para aquecer e retorna o tempo médio em ms"""
+    bd.execute(consulta).fetchall()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        bd.execute(consulta).fetchall()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def executar_benchmark(tamanhos, repeticoes, sintetico=False):
+    print("=" * 80)
+    print("⏱️  BENCHMARK - LAYOUT FÍSICO DA TABELA ACIDENTES")
+    print("=" * 80)
+    
+    for total_linhas in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            print(f"\n🏗️  Gerando {total_linhas:,} linhas sintéticas nos dois layouts...")
+            caminhos = {nome: os.path.join(pasta, f'{nome}.duckdb') for nome in ('antigo', 'otimizado')}
+            bancos = {nome: criar_banco(caminho, total_linhas, nome == 'otimizado', sintetico)
+                      for nome, caminho in caminhos.items()}
+    
+            tamanhos_arquivo = {nome: os.path.getsize(caminho) / 1024 / 1024
+                                for nome, caminho in caminhos.items()}
+            print(f"   • Arquivo: {tamanhos_arquivo['antigo']:.1f} MB -> "
+                  f"{tamanhos_arquivo['otimizado']:.1f} MB")
+    
+            print(f"\n   {'Consulta':32} {'Antigo':>10} {'Otimizado':>10} {'Speedup':>8}"
+                  f" {'Linhas lidas (antigo -> otimizado)':>38}")
+            for nome, consulta_antiga, consulta_nova in CONSULTAS:
+                tempo_antigo = medir(bancos['antigo'], consulta_antiga, repeticoes)
+                tempo_novo = medir(bancos['otimizado'], consulta_nova, repeticoes)
+                lidas_antigo = linhas_lidas(bancos['antigo'], consulta_antiga)
+                lidas_novo = linhas_lidas(bancos['otimizado'], consulta_nova)
+                print(f"   {nome:32} {tempo_antigo:8.1f}ms {tempo_novo:8.1f}ms "
+                      f"{tempo_antigo / tempo_novo:7.2f}x {lidas_antigo:>18,} -> {lidas_novo:<15,}")
+    
+            for bd in bancos.values():
+                bd.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sintetico', action='store_true',
+                        help='Usa o gerador de dados sintéticos em vez de replicar o CSV')
+    args = parser.parse_args()
+    
+    executar_benchmark(args.linhas, args.repeticoes, args.sintetico)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark do armazenamento em Parquet particionado (Ano/Mes/Pais) versus a
+tabela DuckDB, com as consultas filtradas geradas pelo ConstrutorConsulta
+
+Grava as mesmas linhas sintéticas (vários anos) nos dois armazenamentos, o
+Parquet em várias cargas incrementais, e compara o tempo médio e quantos
+arquivos Parquet cada consulta abre (os demais são descartados pelo
+partition pruning).
+
+Uso:
+    python scripts/benchmarks/benchmark_parquet.py [--linhas 1000000 10000000] [--cargas 4] [--repeticoes 5] [--sintetico]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.esquema import anexar_particoes, carregar_acidentes, criar_visao_parquet
+from app.utils import ConstrutorConsulta, FiltroAcidentes
+from benchmark_layout import criar_replicas, medir
+
+FILTROS = [
+    ('Sem filtro', {}),
+    ('Um país', {'country': ['Brasil']}),
+    ('Um mês', {'startDate': '2017-03-01', 'endDate': '2017-03-31'}),
+    ('Um trimestre em dois países', {'country': ['Brasil', 'EUA'],
+                                     'startDate': '2018-01-01', 'endDate': '2018-03-31'}),
+]
+
+
+def consulta_filtrada(parametros):
+    """Contagem por setor com os filtros do ConstrutorConsulta (parâmetros como literais)"""
+    construtor = ConstrutorConsulta(FiltroAcidentes(
+        generos=parametros.get('gender', ()), paises=parametros.get('country', ()),
+        data_inicio=parametros.get('startDate'), data_fim=parametros.get('endDate')))
+    construtor.adicionar_filtro_genero().adicionar_filtro_pais().adicionar_filtro_intervalo_data()
+    
+    consulta = f"""
+        SELECT Setor_Industrial, COUNT(*) FROM acidentes
+        WHERE {construtor.obter_clausula_where()} GROUP BY 1
+    """
+    # Do maior placeholder para o menor, para $1 não substituir parte de $10
+    parametros_sql = list(enumerate(construtor.obter_parametros(), start=1))
+    for posicao, valor in reversed(parametros_sql):
+        consulta = consulta.replace(f'${posicao}', f"'{valor}'")
+    return consulta
+
+
+def arquivos_lidos(bd, consulta):
+    """Total de arquivos Parquet abertos pela consulta"""
+    plano = json.loads(bd.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {consulta}").fetchall()[0][1])
+    
+    def somar(no):
+        total = int(no.get('extra_info', {}).get('Total Files Read', 0))
+        return total + sum(somar(filho) for filho in no.get('children', []))
+    
+    return somar(plano)
+
+
+def executar_benchmark(tamanhos, cargas, repeticoes, sintetico=False):
+    print("=" * 80)
+    print("⏱️  BENCHMARK - PARQUET PARTICIONADO vs. TABELA DUCKDB")
+    print("=" * 80)
+    
+    for total_linhas in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            print(f"\n🏗️  Gerando {total_linhas:,} linhas sintéticas ({cargas} cargas no Parquet)...")
+            tabela = duckdb.connect(os.path.join(pasta, 'tabela.duckdb'))
+            criar_replicas(tabela, total_linhas, sintetico)
+            carregar_acidentes(tabela, 'replicas')
+    
+            pasta_parquet = os.path.join(pasta, 'parquet')
+            parquet = duckdb.connect(os.path.join(pasta, 'parquet.duckdb'))
+            criar_replicas(parquet, total_linhas, sintetico)
+            for carga in range(cargas):
+                anexar_particoes(parquet, f'(SELECT * FROM replicas WHERE id % {cargas} = {carga})',
+                                 pasta_parquet)
+            parquet.execute("DROP TABLE replicas")
+            criar_visao_parquet(parquet, pasta_parquet)
+    
+            print(f"\n   {'Filtro':30} {'Tabela':>10} {'Parquet':>10} {'Arquivos lidos':>16}")
+            for nome, parametros in FILTROS:
+                consulta = consulta_filtrada(parametros)
+                tempo_tabela = medir(tabela, consulta, repeticoes)
+                tempo_parquet = medir(parquet, consulta, repeticoes)
+                print(f"   {nome:30} {tempo_tabela:8.1f}ms {tempo_parquet:8.1f}ms "
+                      f"{arquivos_lidos(parquet, consulta):>16,}")
+    
+            tabela.close()
+            parquet.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--cargas', type=int, default=4)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sintetico', action='store_true',
+                        help='Usa o gerador de dados sintéticos em vez de replicar o CSV')
+    args = parser.parse_args()
+    
+    executar_benchmark(args.linhas, args.cargas, args.repeticoes, args.sintetico)
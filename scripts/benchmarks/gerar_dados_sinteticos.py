@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Gerador de acidentes sintéticos, com semente, para testes de escala
+
+Ajusta as distribuições ao CSV real e sorteia linhas novas:
+- Pais pela frequência real, Estado e Setor_Industrial condicionados ao
+  Pais (um estado só aparece no país em que existe);
+- Genero, Tipo_Trabalhador e Risco_Critico pelas frequências reais, e
+  (Nivel_Acidente, Nivel_Acidente_Potencial) pelo par observado;
+- Data uniforme entre --inicio e --fim;
+- Parte_Corpo pela frequência real, e uma Descricao coerente com ela:
+  1 a N frases das descrições reais (N com a distribuição real de frases
+  por descrição), uma com a parte sorteada e as demais de partes de
+  prioridade menor. O classificador de app/parte_corpo.py dá ao texto
+  montado exatamente a parte sorteada, e os textos variados em português
+  exercitam a busca.
+
+As linhas são geradas em partes de LINHAS_POR_PARTE por processos em
+paralelo; cada parte tem seu próprio gerador (semente, número da parte) e
+grava seu arquivo Parquet, então o resultado depende só da semente e do
+total, não do número de processos. Os Parquet são carregados no banco
+(app/esquema.py, como snapshot novo e publicado) ou nas partições Hive.
+
+Uso:
+    python scripts/benchmarks/gerar_dados_sinteticos.py --linhas 10000000 --banco /tmp/sintetico.duckdb
+    python scripts/benchmarks/gerar_dados_sinteticos.py --linhas 10000000 --parquet /tmp/acidentes_parquet
+        [--semente 42] [--processos 4] [--inicio 2016-01-01] [--fim 2025-12-31]
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.esquema import ARQUIVO_CSV, COLUNAS_ORIGEM, anexar_particoes, carregar_acidentes
+from app.parte_corpo import PARTES_CORPO, SEM_PARTE, classificar_partes_corpo
+from app.snapshots import coletar_snapshots, descartar_snapshot, novo_snapshot, publicar_snapshot
+
+LINHAS_POR_PARTE = 1_000_000
+SEMENTE = 42
+
+_FIM_DE_FRASE = re.compile(r'(?<=[.!?])\s+')
+
+
+# ==================== MODELO ====================
+
+def _frequencias(serie):
+    """(valores, probabilidades) de uma coluna"""
+    contagem = serie.value_counts()
+    return contagem.index.to_numpy(dtype=object), (contagem / contagem.sum()).to_numpy()
+
+
+def _condicionadas(df, coluna, chave, chaves):
+    """
+    Categorias de `coluna` e, para cada posição de `chaves`, a distribuição
+    (códigos das categorias, probabilidades) de `coluna` dado df[chave]
+    """
+    categorias = np.sort(df[coluna].unique().astype(object))
+    distribuicoes = []
+    for valor in chaves:
+        valores, probabilidades = _frequencias(df.loc[df[chave] == valor, coluna])
+        distribuicoes.append((np.searchsorted(categorias, valores), probabilidades))
+    return categorias, distribuicoes
+
+
+def ajustar_modelo(caminho_csv=ARQUIVO_CSV):
+    """Distribuições do CSV real usadas pelo gerador"""
+    df = pd.read_csv(caminho_csv)
+
+    frases_por_descricao = df['Descricao'].map(lambda texto: [frase for frase in _FIM_DE_FRASE.split(texto) if frase])
+    frases = pd.Series(frases_por_descricao.explode().unique())
+
+    # Prioridade de cada parte: a posição em PARTES_CORPO (SEM_PARTE por
+    # último). O classificador testa as partes nessa ordem, então o rótulo
+    # de um texto montado com várias frases é o da frase de maior prioridade.
+    # As frases ficam ordenadas por prioridade: as de uma parte p ocupam
+    # [inicio[p], fim[p]) e as que podem acompanhá-la, [inicio[p], total).
+    rotulos = [*PARTES_CORPO, SEM_PARTE]
+    prioridades = classificar_partes_corpo(frases).map(rotulos.index).to_numpy()
+    ordem = np.argsort(prioridades, kind='stable')
+    indices = np.arange(len(rotulos))
+
+    # Os níveis são sorteados como par: cada par observado vira os códigos
+    # das duas colunas
+    pares = df.groupby(['Nivel_Acidente', 'Nivel_Acidente_Potencial']).size()
+    niveis = np.sort(pd.unique(np.r_[df['Nivel_Acidente'].unique(), df['Nivel_Acidente_Potencial'].unique()]).astype(object))
+
+    paises, probabilidades_paises = _frequencias(df['Pais'])
+    return {
+        'paises': (paises, probabilidades_paises),
+        'estados': _condicionadas(df, 'Estado', 'Pais', paises),
+        'setores': _condicionadas(df, 'Setor_Industrial', 'Pais', paises),
+        'generos': _frequencias(df['Genero']),
+        'tipos_trabalhador': _frequencias(df['Tipo_Trabalhador']),
+        'riscos': _frequencias(df['Risco_Critico']),
+        'niveis': niveis,
+        'pares_niveis': (np.searchsorted(niveis, pares.index.get_level_values(0).to_numpy(dtype=object)),
+                         np.searchsorted(niveis, pares.index.get_level_values(1).to_numpy(dtype=object)),
+                         (pares / pares.sum()).to_numpy()),
+        'partes': _frequencias(classificar_partes_corpo(df['Descricao']).map(rotulos.index)),
+        'frases_por_descricao': _frequencias(frases_por_descricao.str.len()),
+        'frases': frases.to_numpy(dtype=object)[ordem],
+        'inicio': np.searchsorted(prioridades[ordem], indices, side='left'),
+        'fim': np.searchsorted(prioridades[ordem], indices, side='right'),
+        'rotulos': np.array(rotulos, dtype=object),
+    }
+
+
+# ==================== GERAÇÃO ====================
+
+def _codigos(rng, probabilidades, tamanho):
+    return rng.choice(len(probabilidades), size=tamanho, p=probabilidades)
+
+
+def _sortear(rng, distribuicao, tamanho):
+    valores, probabilidades = distribuicao
+    return valores[_codigos(rng, probabilidades, tamanho)]
+
+
+def _categorico(rng, distribuicao, tamanho):
+    """Coluna categórica montada direto dos códigos sorteados, sem criar as strings"""
+    valores, probabilidades = distribuicao
+    return pd.Categorical.from_codes(_codigos(rng, probabilidades, tamanho), categories=valores)
+
+
+def _categorico_condicionado(rng, condicionadas, chaves):
+    """Sorteia, para cada linha, um valor da distribuição da sua chave (ex.: Estado dado o Pais)"""
+    categorias, distribuicoes = condicionadas
+    codigos = np.empty(len(chaves), dtype=np.int64)
+    for chave, (valores, probabilidades) in enumerate(distribuicoes):
+        linhas = np.flatnonzero(chaves == chave)
+        codigos[linhas] = valores[_codigos(rng, probabilidades, len(linhas))]
+    return pd.Categorical.from_codes(codigos, categories=categorias)
+
+
+def _descricoes(rng, modelo, tamanho):
+    """Parte_Corpo sorteada e descrições montadas com frases reais coerentes com ela"""
+    partes = _sortear(rng, modelo['partes'], tamanho).astype(np.int64)
+    quantidades = _sortear(rng, modelo['frases_por_descricao'], tamanho).astype(np.int64)
+    inicios = np.r_[0, np.cumsum(quantidades)[:-1]]
+
+    # Todas as frases vêm de partes de prioridade igual ou menor...
+    parte_da_frase = np.repeat(partes, quantidades)
+    primeira = modelo['inicio'][parte_da_frase]
+    escolhidas = primeira + (rng.random(len(primeira)) * (len(modelo['frases']) - primeira)).astype(np.int64)
+
+    # ...e uma, em posição sorteada, é da própria parte
+    ancoras = modelo['inicio'][partes] + (
+        rng.random(tamanho) * (modelo['fim'][partes] - modelo['inicio'][partes])).astype(np.int64)
+    escolhidas[inicios + (rng.random(tamanho) * quantidades).astype(np.int64)] = ancoras
+
+    frases = modelo['frases'][escolhidas]
+    descricoes = [' '.join(frases[inicio:inicio + quantidade])
+                  for inicio, quantidade in zip(inicios.tolist(), quantidades.tolist())]
+    return descricoes, pd.Categorical.from_codes(partes, categories=modelo['rotulos'])
+
+
+def gerar_lote(modelo, tamanho, rng, id_inicial=0, inicio='2016-01-01', fim='2025-12-31'):
+    """DataFrame com `tamanho` acidentes sintéticos nas colunas de COLUNAS_ORIGEM"""
+    paises = _codigos(rng, modelo['paises'][1], tamanho)
+    nivel, potencial, probabilidades_pares = modelo['pares_niveis']
+    pares = _codigos(rng, probabilidades_pares, tamanho)
+    descricoes, partes = _descricoes(rng, modelo, tamanho)
+
+    dia_inicial, dia_final = np.datetime64(inicio, 'D'), np.datetime64(fim, 'D')
+    dias = rng.integers(0, (dia_final - dia_inicial).astype(int) + 1, size=tamanho)
+
+    return pd.DataFrame({
+        'id': np.arange(id_inicial, id_inicial + tamanho, dtype=np.int32),
+        'Data': (dia_inicial + dias).astype('datetime64[us]'),
+        'Pais': pd.Categorical.from_codes(paises, categories=modelo['paises'][0]),
+        'Estado': _categorico_condicionado(rng, modelo['estados'], paises),
+        'Setor_Industrial': _categorico_condicionado(rng, modelo['setores'], paises),
+        'Nivel_Acidente': pd.Categorical.from_codes(nivel[pares], categories=modelo['niveis']),
+        'Nivel_Acidente_Potencial': pd.Categorical.from_codes(potencial[pares], categories=modelo['niveis']),
+        'Genero': _categorico(rng, modelo['generos'], tamanho),
+        'Tipo_Trabalhador': _categorico(rng, modelo['tipos_trabalhador'], tamanho),
+        'Risco_Critico': _categorico(rng, modelo['riscos'], tamanho),
+        # object: converter milhões de textos para o tipo string do pandas
+        # custaria mais que montá-los, e o DuckDB lê os dois
+        'Descricao': pd.Series(descricoes, dtype=object),
+        'Parte_Corpo': partes,
+    }, columns=COLUNAS_ORIGEM)
+
+
+def _gerar_parte(modelo, parte, tamanho, semente, id_inicial, inicio, fim, pasta):
+    """Gera uma parte e grava em Parquet (executado nos processos filhos)"""
+    rng = np.random.default_rng([semente, parte])
+    lote = gerar_lote(modelo, tamanho, rng, id_inicial, inicio, fim)
+
+    caminho = os.path.join(pasta, f'parte-{parte:05d}.parquet')
+    destino = caminho.replace("'", "''")
+    bd = duckdb.connect(config={'threads': 1})
+    try:
+        bd.register('lote', lote)
+        bd.execute(f"COPY lote TO '{destino}' (FORMAT parquet)")
+    finally:
+        bd.close()
+    return caminho
+
+
+def gerar_parquet(total_linhas, pasta, semente=SEMENTE, processos=None, id_inicial=0,
+                  inicio='2016-01-01', fim='2025-12-31', modelo=None):
+    """
+    Grava total_linhas acidentes sintéticos em arquivos Parquet na pasta
+
+    Retorna a lista de arquivos, na ordem das partes.
+    """
+    modelo = modelo or ajustar_modelo()
+    os.makedirs(pasta, exist_ok=True)
+    partes = [(parte, min(LINHAS_POR_PARTE, total_linhas - parte * LINHAS_POR_PARTE))
+              for parte in range(-(-total_linhas // LINHAS_POR_PARTE))]
+    argumentos = [(modelo, parte, tamanho, semente, id_inicial + parte * LINHAS_POR_PARTE, inicio, fim, pasta)
+                  for parte, tamanho in partes]
+
+    processos = min(processos or os.cpu_count() or 1, len(partes))
+    if processos <= 1:
+        return [_gerar_parte(*args) for args in argumentos]
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return list(executor.map(_gerar_parte, *zip(*argumentos)))
+
+
+def origem_sintetica(pasta):
+    """Relação SQL que lê os Parquet gerados"""
+    caminho = os.path.join(pasta, '*.parquet').replace("'", "''")
+    return f"read_parquet('{caminho}')"
+
+
+def criar_replicas_sinteticas(bd, total_linhas, semente=SEMENTE, processos=None):
+    """Tabela temporária replicas com acidentes sintéticos (a mesma que os benchmarks montam do CSV)"""
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_parquet(total_linhas, pasta, semente, processos)
+        bd.execute(f"CREATE OR REPLACE TEMP TABLE replicas AS SELECT * FROM {origem_sintetica(pasta)} ORDER BY id")
+
+
+# ==================== DESTINOS ====================
+
+def gerar_banco(caminho_bd, pasta):
+    """Carrega os Parquet em um snapshot novo do banco e o publica"""
+    snapshot = novo_snapshot(caminho_bd)
+    bd = duckdb.connect(snapshot)
+    try:
+        total = carregar_acidentes(bd, origem_sintetica(pasta))
+    except Exception:
+        bd.close()
+        descartar_snapshot(snapshot)
+        raise
+    bd.close()
+
+    versao = publicar_snapshot(caminho_bd, snapshot)
+    coletar_snapshots(caminho_bd)
+    return total, snapshot, versao
+
+
+def gerar_particoes(pasta_destino, pasta):
+    """Anexa os Parquet às partições Hive (Ano/Mes/Pais) do armazenamento em Parquet"""
+    os.makedirs(pasta_destino, exist_ok=True)
+    bd = duckdb.connect()
+    try:
+        return anexar_particoes(bd, origem_sintetica(pasta), pasta_destino)
+    finally:
+        bd.close()
+
+
+def executar(total_linhas, caminho_bd, pasta_parquet, semente, processos, inicio, fim):
+    print("=" * 80)
+    print("🧪 GERAÇÃO DE ACIDENTES SINTÉTICOS")
+    print("=" * 80)
+
+    pasta = tempfile.mkdtemp(prefix='acidentes_sinteticos_')
+    try:
+        print(f"\n📐 Ajustando as distribuições ao CSV real...")
+        modelo = ajustar_modelo()
+        print(f"   • {len(modelo['frases'])} frases de descrição, {len(modelo['paises'][0])} países")
+
+        print(f"\n🏗️  Gerando {total_linhas:,} acidentes (semente {semente})...")
+        inicio_geracao = time.perf_counter()
+        arquivos = gerar_parquet(total_linhas, pasta, semente, processos, 0, inicio, fim, modelo)
+        duracao = time.perf_counter() - inicio_geracao
+        print(f"   ✅ {len(arquivos)} partes em {duracao:.1f}s ({total_linhas / duracao:,.0f} linhas/s)")
+
+        inicio_carga = time.perf_counter()
+        if caminho_bd:
+            print(f"\n📥 Carregando em um snapshot novo de {caminho_bd}...")
+            total, snapshot, versao = gerar_banco(caminho_bd, pasta)
+            print(f"   ✅ {total:,} acidentes em {time.perf_counter() - inicio_carga:.1f}s")
+            print(f"   🗂️  Snapshot ativo: {snapshot}")
+            print(f"   🏷️  Nova versão dos dados: {versao}")
+        else:
+            print(f"\n📥 Gravando as partições em {pasta_parquet}...")
+            total = gerar_particoes(pasta_parquet, pasta)
+            print(f"   ✅ {total:,} acidentes em {time.perf_counter() - inicio_carga:.1f}s")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--banco', help='Banco DuckDB (a carga é publicada como snapshot novo)')
+    destino.add_argument('--parquet', help='Pasta das partições Parquet (ARMAZENAMENTO = parquet)')
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--processos', type=int, default=None, help='Padrão: número de CPUs')
+    parser.add_argument('--inicio', default='2016-01-01')
+    parser.add_argument('--fim', default='2025-12-31')
+    args = parser.parse_args()
+
+    executar(args.linhas, args.banco, args.parquet, args.semente, args.processos, args.inicio, args.fim)
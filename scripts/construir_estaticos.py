@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Script para preparar os arquivos estáticos para produção
+
+Para cada arquivo de static/ gera, em static/dist/:
+- uma cópia com o hash do conteúdo no nome (css/home.css -> css/home.3f2a9c1b04.css);
+- as versões pré-comprimidas .gz e .br (brotli, se instalado) dos formatos de texto;
+- o manifest.json que mapeia o caminho original para o nome com hash.
+
+Como o nome muda sempre que o conteúdo muda, a aplicação serve esses
+arquivos com cache de longa duração (immutable).
+
+Uso:
+    python scripts/construir_estaticos.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, gera apenas .gz
+    brotli = None
+
+PASTA_ESTATICOS = 'static'
+PASTA_DESTINO = os.path.join(PASTA_ESTATICOS, 'dist')
+ARQUIVO_MANIFESTO = os.path.join(PASTA_DESTINO, 'manifest.json')
+
+# Formatos que valem a pena comprimir (imagens JPEG/PNG já são comprimidas)
+EXTENSOES_COMPRIMIVEIS = ('.css', '.js', '.html', '.svg', '.json', '.txt')
+
+
+def listar_estaticos():
+    """Lista os arquivos de static/ (caminhos relativos), ignorando a pasta dist"""
+    arquivos = []
+    for raiz, pastas, nomes in os.walk(PASTA_ESTATICOS):
+        pastas[:] = [p for p in pastas if os.path.join(raiz, p) != PASTA_DESTINO]
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            arquivos.append(os.path.relpath(caminho, PASTA_ESTATICOS).replace(os.sep, '/'))
+    return sorted(arquivos)
+
+
+def nome_com_hash(caminho_relativo, conteudo):
+    """Insere o hash do conteúdo antes da extensão"""
+    base, extensao = os.path.splitext(caminho_relativo)
+    resumo = hashlib.sha256(conteudo).hexdigest()[:10]
+    return f'{base}.{resumo}{extensao}'
+
+
+def gravar(caminho, conteudo):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'wb') as f:
+        f.write(conteudo)
+
+
+def construir_estaticos():
+    """Gera static/dist com os arquivos versionados, comprimidos e o manifesto"""
+    if os.path.isdir(PASTA_DESTINO):
+        shutil.rmtree(PASTA_DESTINO)
+
+    manifesto = {}
+    for caminho_relativo in listar_estaticos():
+        with open(os.path.join(PASTA_ESTATICOS, caminho_relativo), 'rb') as f:
+            conteudo = f.read()
+
+        destino_relativo = nome_com_hash(caminho_relativo, conteudo)
+        destino = os.path.join(PASTA_DESTINO, destino_relativo)
+        gravar(destino, conteudo)
+        manifesto[caminho_relativo] = destino_relativo
+
+        tamanhos = [f'{len(conteudo) / 1024:.1f} KB']
+        if caminho_relativo.endswith(EXTENSOES_COMPRIMIVEIS):
+            comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+            gravar(destino + '.gz', comprimido)
+            tamanhos.append(f'gzip {len(comprimido) / 1024:.1f} KB')
+
+            if brotli is not None:
+                comprimido = brotli.compress(conteudo, quality=11)
+                gravar(destino + '.br', comprimido)
+                tamanhos.append(f'brotli {len(comprimido) / 1024:.1f} KB')
+
+        print(f'{caminho_relativo} -> {destino_relativo} ({", ".join(tamanhos)})')
+
+    with open(ARQUIVO_MANIFESTO, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+
+    print(f'{len(manifesto)} arquivos em {PASTA_DESTINO}')
+    if brotli is None:
+        print('Aviso: pacote brotli não instalado, apenas versões .gz foram geradas')
+
+
+if __name__ == '__main__':
+    construir_estaticos()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script para migrar um banco existente para o layout otimizado da tabela acidentes
+(colunas categóricas como ENUM, linhas em ordem de Data e coluna Mes)
+
+A aplicação também migra automaticamente na inicialização; este script
+permite fazer a conversão antes do deploy. O arquivo ativo (o snapshot
+apontado por app/snapshots.py ou o próprio banco) é copiado para um
+snapshot novo, convertido nele e publicado com a troca atômica do ponteiro,
+como em atualizar_banco_duckdb.py.
+
+Uso:
+    python scripts/migrar_esquema.py [--banco acidentes.duckdb]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.esquema import tabela_existe, esquema_otimizado, migrar_esquema
+from app.snapshots import (arquivo_ativo, coletar_snapshots, descartar_snapshot, novo_snapshot,
+                           publicar_snapshot)
+
+
+def migrar(caminho_bd):
+    print("=" * 80)
+    print("🏗️  MIGRAÇÃO DO LAYOUT DA TABELA ACIDENTES")
+    print("=" * 80)
+
+    ativo = arquivo_ativo(caminho_bd)
+    if not os.path.exists(ativo):
+        print(f"\n❌ ERRO: Banco não encontrado em {ativo}")
+        return
+
+    # A conversão é feita em uma cópia do arquivo ativo, que a aplicação
+    # continua servindo até a publicação
+    tamanho_antes = os.path.getsize(ativo) / 1024 / 1024
+    snapshot = novo_snapshot(caminho_bd)
+    for sufixo in ('', '.wal'):
+        if os.path.exists(f'{ativo}{sufixo}'):
+            shutil.copy2(f'{ativo}{sufixo}', f'{snapshot}{sufixo}')
+
+    db = duckdb.connect(snapshot)
+    try:
+        if not tabela_existe(db):
+            print(f"\n❌ ERRO: O banco não tem a tabela 'acidentes'")
+            total = None
+        elif esquema_otimizado(db):
+            print(f"\n✅ A tabela já está no layout otimizado, nada a fazer")
+            total = None
+        else:
+            print(f"\n🔄 Convertendo {ativo} ({tamanho_antes:.1f} MB)...")
+            inicio = time.perf_counter()
+            total = migrar_esquema(db, renovar_versao=False)
+            print(f"   ✅ {total} registros migrados em {time.perf_counter() - inicio:.1f}s")
+    except Exception:
+        db.close()
+        descartar_snapshot(snapshot)
+        raise
+    db.close()
+
+    if total is None:
+        descartar_snapshot(snapshot)
+        return
+
+    try:
+        versao = publicar_snapshot(caminho_bd, snapshot)
+    except Exception as e:
+        print(f"   ❌ Snapshot rejeitado, a aplicação continua no anterior: {e}")
+        descartar_snapshot(snapshot)
+        raise
+    coletar_snapshots(caminho_bd)
+
+    tamanho_depois = os.path.getsize(snapshot) / 1024 / 1024
+    print(f"   📁 Tamanho do arquivo: {tamanho_antes:.1f} MB -> {tamanho_depois:.1f} MB")
+    print(f"   🗂️  Snapshot ativo: {snapshot}")
+    print(f"   🏷️  Nova versão dos dados: {versao} (caches da aplicação serão invalidados)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--banco', default='acidentes.duckdb')
+    args = parser.parse_args()
+
+    migrar(args.banco)
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Pipeline de ETL em streaming: CSV original (em inglês) -> banco DuckDB
+
+Substitui a sequência traduzir_cabecalhos -> traduzir_dados ->
+traduzir_descricoes -> remover_duplicatas -> adicionar_parte_corpo ->
+atualizar_banco_duckdb, em que cada script lia o CSV inteiro, gravava um
+backup e reescrevia o arquivo. Aqui cada etapa processa lotes de linhas
+(pd.read_csv com chunksize) e passa o lote adiante, sem CSV intermediário;
+a última etapa grava os lotes em uma tabela de carga do DuckDB e publica um
+snapshot novo do banco (app/snapshots.py).
+
+- A memória fica limitada ao tamanho do lote (mais a memória de tradução);
+  as linhas já vistas pela etapa de duplicatas e a tabela de carga ficam
+  em arquivos DuckDB com memory_limit (LIMITE_MEMORIA_DUCKDB), que
+  despejam em disco o que não couber.
+- Cada etapa registra tempo, lotes e linhas de entrada e saída.
+- Etapas com checkpoint (a tradução das descrições) gravam sua saída em
+  Parquet, identificada pela impressão digital da entrada e da
+  configuração de todas as etapas até ali. Em uma nova execução, o
+  pipeline retoma do checkpoint válido mais adiantado e refaz só as
+  etapas seguintes (mudar as palavras-chave de parte do corpo não refaz a
+  tradução). --desde ETAPA força refazer a partir de uma etapa.
+
+Uso:
+    python scripts/pipeline_etl.py --csv dados_originais.csv [--banco acidentes.duckdb]
+                                   [--lote 50000] [--backend google|local|nenhum]
+                                   [--desde etapa] [--checkpoints data/pipeline]
+"""
+import abc
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'scripts', 'traducoes'))
+
+from app.duplicatas import COLUNAS_COMPARACAO, normalizar
+from app.esquema import COLUNAS_ORIGEM, atualizar_incremental, carregar_acidentes, esquema_otimizado, tabela_existe
+from app.parte_corpo import PARTES_CORPO, classificar_partes_corpo
+from app.snapshots import (arquivo_ativo, coletar_snapshots, descartar_snapshot, novo_snapshot,
+                           publicar_snapshot)
+from motor_traducao import BACKENDS, LimitadorTaxa, MemoriaTraducao, MotorTraducao, caminho_memoria_padrao
+from traduzir_cabecalhos import CABECALHOS
+from traduzir_dados import MAPAS_POR_COLUNA
+
+# Teto de memória da conexão de carga (o DuckDB usa 80% da RAM por padrão)
+LIMITE_MEMORIA_DUCKDB = '256MB'
+
+
+def impressao(*partes):
+    """Impressão digital (sha256 curto) de valores serializáveis em JSON"""
+    conteudo = json.dumps(partes, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+# ==================== ETAPAS ====================
+
+class Etapa(abc.ABC):
+    """
+    Etapa do pipeline: transforma um lote (DataFrame) em outro
+
+    configuracao() entra na impressão digital: mudar o que ela retorna
+    invalida os checkpoints desta etapa e das seguintes. Etapas com
+    checkpoint = True têm a saída gravada para retomadas. Se a execução
+    falha depois de iniciar(), abortar() é chamado no lugar de finalizar().
+    """
+
+    nome = 'etapa'
+    checkpoint = False
+
+    def configuracao(self):
+        return None
+
+    def iniciar(self):
+        """Chamado antes do primeiro lote"""
+
+    @abc.abstractmethod
+    def processar(self, lote):
+        """Transforma um lote; o DataFrame retornado segue para a próxima etapa"""
+
+    def finalizar(self):
+        """Chamado depois do último lote"""
+
+    def abortar(self):
+        """Chamado se a execução falhar antes de finalizar(): libera o que iniciar() abriu"""
+
+
+class TraduzirCabecalhos(Etapa):
+    """Renomeia as colunas para os nomes em português (traduzir_cabecalhos.py)"""
+
+    nome = 'cabecalhos'
+
+    def configuracao(self):
+        return CABECALHOS
+
+    def processar(self, lote):
+        return lote.rename(columns=CABECALHOS)
+
+
+class TraduzirDados(Etapa):
+    """Traduz os valores categóricos com os mapas de traduzir_dados.py"""
+
+    nome = 'dados'
+
+    def __init__(self):
+        self.mapas = {CABECALHOS[coluna]: mapa for coluna, mapa in MAPAS_POR_COLUNA.items()}
+
+    def configuracao(self):
+        return self.mapas
+
+    def processar(self, lote):
+        for coluna, mapa in self.mapas.items():
+            if coluna in lote:
+                lote[coluna] = lote[coluna].replace(mapa)
+        return lote
+
+
+class TraduzirDescricoes(Etapa):
+    """Traduz Descricao com o motor_traducao.py (memória de tradução em disco)"""
+
+    nome = 'descricoes'
+    checkpoint = True
+
+    def __init__(self, backend, threads=4, taxa=5.0):
+        self.backend = backend
+        self.threads = threads
+        self.taxa = taxa
+        self.motor = None
+
+    def configuracao(self):
+        return {'backend': self.backend}
+
+    def iniciar(self):
+        if self.backend == 'nenhum':
+            return
+        tradutor = BACKENDS[self.backend]('en', 'pt')
+        self.motor = MotorTraducao(tradutor, MemoriaTraducao(caminho_memoria_padrao(tradutor)),
+                                   threads=self.threads, limitador=LimitadorTaxa(self.taxa, rajada=self.threads))
+
+    def processar(self, lote):
+        if self.motor is not None:
+            lote['Descricao'] = self.motor.traduzir(lote['Descricao'])
+        return lote
+
+
+class RemoverDuplicatas(Etapa):
+    """
+    Remove duplicatas exatas, mantendo a primeira, e renumera os ids em
+    sequência (como remover_duplicatas.py)
+
+    As linhas já vistas (hash de 64 bits + colunas de comparação
+    normalizadas, como em app/duplicatas.py) ficam em um arquivo DuckDB
+    temporário com memory_limit, então a memória não cresce com a entrada.
+    Cada lote consulta só a coluna de hash; as linhas cujo hash já existe
+    são conferidas coluna a coluna, e uma colisão nunca remove um acidente.
+    As quase duplicatas ficam para remover_duplicatas.py, que precisa de
+    uma assinatura MinHash por linha.
+    """
+
+    nome = 'duplicatas'
+
+    def iniciar(self):
+        self.pasta = tempfile.TemporaryDirectory(prefix='pipeline_duplicatas_')
+        self.bd = duckdb.connect(os.path.join(self.pasta.name, 'vistas.duckdb'),
+                                 config={'memory_limit': LIMITE_MEMORIA_DUCKDB})
+        colunas = ', '.join(f'{coluna} VARCHAR' for coluna in COLUNAS_COMPARACAO)
+        self.bd.execute(f"CREATE TABLE vistas (hash UBIGINT, {colunas})")
+        self.proximo_id = 0
+
+    def processar(self, lote):
+        normalizado = normalizar(lote).reset_index(drop=True)
+        normalizado.insert(0, 'hash', pd.util.hash_pandas_object(normalizado, index=False).to_numpy())
+        normalizado.insert(0, 'posicao', range(len(normalizado)))
+
+        # Repetidas dentro do lote: comparação direta das colunas
+        manter = ~normalizado.duplicated(subset=COLUNAS_COMPARACAO).to_numpy()
+        candidatas = normalizado[manter]
+
+        # Repetidas de lotes anteriores
+        self.bd.register('lote_duplicatas', candidatas)
+        try:
+            repetidas = self._ja_vistas()
+            manter[repetidas] = False
+            self.bd.execute(f"""
+                INSERT INTO vistas
+                SELECT hash, {', '.join(COLUNAS_COMPARACAO)} FROM lote_duplicatas
+                WHERE posicao NOT IN (SELECT UNNEST(?::BIGINT[]))
+            """, [repetidas])
+        finally:
+            self.bd.unregister('lote_duplicatas')
+
+        lote = lote[manter].copy()
+        lote['id'] = range(self.proximo_id, self.proximo_id + len(lote))
+        self.proximo_id += len(lote)
+        return lote
+
+    def _ja_vistas(self):
+        """Posições de lote_duplicatas iguais, coluna a coluna, a alguma linha já vista"""
+        acertos = [linha[0] for linha in self.bd.execute("""
+            SELECT DISTINCT v.hash FROM vistas v JOIN lote_duplicatas l ON v.hash = l.hash
+        """).fetchall()]
+        if not acertos:
+            return []
+
+        # Só as linhas vistas com esses hashes são lidas inteiras
+        iguais = ' AND '.join(f'v.{coluna} IS NOT DISTINCT FROM l.{coluna}' for coluna in COLUNAS_COMPARACAO)
+        return [linha[0] for linha in self.bd.execute(f"""
+            SELECT DISTINCT l.posicao
+            FROM (SELECT * FROM vistas WHERE hash IN ({', '.join(map(str, acertos))})) v
+            JOIN lote_duplicatas l ON v.hash = l.hash AND {iguais}
+        """).fetchall()]
+
+    def finalizar(self):
+        self.bd.close()
+        self.pasta.cleanup()
+
+    def abortar(self):
+        self.finalizar()
+
+
+class ClassificarParteCorpo(Etapa):
+    """Preenche Parte_Corpo com o classificador de app/parte_corpo.py"""
+
+    nome = 'parte_corpo'
+
+    def configuracao(self):
+        return PARTES_CORPO
+
+    def processar(self, lote):
+        lote['Parte_Corpo'] = classificar_partes_corpo(lote['Descricao']).to_numpy()
+        return lote
+
+
+class CarregarDuckDB(Etapa):
+    """
+    Grava os lotes em uma tabela de carga em um snapshot novo do banco e, ao
+    final, aplica a carga incremental (ou a carga completa) e publica o
+    snapshot (app/snapshots.py). A tabela de carga fica no arquivo do
+    snapshot, então o DuckDB a despeja em disco se não couber na memória.
+    """
+
+    nome = 'carga'
+
+    def __init__(self, caminho_bd):
+        self.caminho_bd = caminho_bd
+        self.resultado = None
+
+    def iniciar(self):
+        ativo = arquivo_ativo(self.caminho_bd)
+        self.snapshot = novo_snapshot(self.caminho_bd)
+        for sufixo in ('', '.wal'):
+            if os.path.exists(f'{ativo}{sufixo}'):
+                shutil.copy2(f'{ativo}{sufixo}', f'{self.snapshot}{sufixo}')
+
+        self.bd = duckdb.connect(self.snapshot, config={'memory_limit': LIMITE_MEMORIA_DUCKDB})
+        tipos = {'id': 'INTEGER', 'Data': 'TIMESTAMP'}
+        colunas = ', '.join(f'{coluna} {tipos.get(coluna, "VARCHAR")}' for coluna in COLUNAS_ORIGEM)
+        self.bd.execute(f"CREATE OR REPLACE TABLE acidentes_pipeline ({colunas})")
+
+    def processar(self, lote):
+        self.bd.register('lote_pipeline', lote[COLUNAS_ORIGEM])
+        self.bd.execute("INSERT INTO acidentes_pipeline SELECT * FROM lote_pipeline")
+        self.bd.unregister('lote_pipeline')
+        return lote
+
+    def finalizar(self):
+        try:
+            if tabela_existe(self.bd) and esquema_otimizado(self.bd):
+                self.resultado = atualizar_incremental(self.bd, 'acidentes_pipeline', remover_ausentes=True)
+                alterou = any(self.resultado[chave] for chave in ('inserted', 'updated', 'deleted'))
+            else:
+                total = carregar_acidentes(self.bd, 'acidentes_pipeline')
+                self.resultado = {'inserted': total, 'rebuilt': True}
+                alterou = True
+            self.bd.execute("DROP TABLE acidentes_pipeline")
+            self.bd.execute("CHECKPOINT")
+        except Exception:
+            self.bd.close()
+            descartar_snapshot(self.snapshot)
+            raise
+        self.bd.close()
+
+        if not alterou:
+            descartar_snapshot(self.snapshot)
+            self.resultado['versao'] = None
+            return
+        try:
+            self.resultado['versao'] = publicar_snapshot(self.caminho_bd, self.snapshot)
+        except Exception:
+            descartar_snapshot(self.snapshot)
+            raise
+        coletar_snapshots(self.caminho_bd)
+
+    def abortar(self):
+        # Sem isso a cópia ficaria para sempre: coletar_snapshots não apaga
+        # snapshots mais novos que o ativo
+        self.bd.close()
+        descartar_snapshot(self.snapshot)
+
+
+# ==================== EXECUÇÃO ====================
+
+class Pipeline:
+    """Encadeia as etapas sobre os lotes do CSV, com métricas e checkpoints"""
+
+    def __init__(self, etapas, pasta_checkpoints='data/pipeline', tamanho_lote=50_000):
+        self.etapas = etapas
+        self.pasta_checkpoints = pasta_checkpoints
+        self.tamanho_lote = tamanho_lote
+        self.metricas = []
+
+    def impressoes(self, caminho_csv):
+        """Impressão digital da saída de cada etapa (entrada + configurações até ela)"""
+        anterior = impressao(impressao_arquivo(caminho_csv), self.tamanho_lote)
+        resultado = []
+        for etapa in self.etapas:
+            anterior = impressao(anterior, etapa.nome, etapa.configuracao())
+            resultado.append(anterior)
+        return resultado
+
+    def executar(self, caminho_csv, desde=None):
+        impressoes = self.impressoes(caminho_csv)
+        nomes = [etapa.nome for etapa in self.etapas]
+        limite = nomes.index(desde) if desde else len(nomes)
+
+        # Checkpoint válido mais adiantado antes de `desde`
+        inicio = 0
+        for posicao in range(min(limite, len(nomes)) - 1, -1, -1):
+            if self.etapas[posicao].checkpoint and self._checkpoint_completo(impressoes[posicao]):
+                inicio = posicao + 1
+                break
+
+        for nome in ['leitura'] + nomes[inicio:]:
+            self._metrica(nome)
+
+        if inicio:
+            lotes = self._ler_checkpoint(impressoes[inicio - 1])
+            origem = f'checkpoint de {nomes[inicio - 1]}'
+        else:
+            lotes = pd.read_csv(caminho_csv, chunksize=self.tamanho_lote, dtype=str)
+            origem = caminho_csv
+        lotes = self._medir('leitura', lotes)
+
+        etapas = self.etapas[inicio:]
+        pendentes = []  # Etapas iniciadas e ainda não finalizadas
+        try:
+            for etapa in etapas:
+                etapa.iniciar()
+                pendentes.append(etapa)
+                lotes = self._medir(etapa.nome, lotes, etapa)
+                if etapa.checkpoint:
+                    lotes = self._gravar_checkpoint(impressoes[self.etapas.index(etapa)], lotes)
+
+            for _ in lotes:
+                pass
+            for etapa in etapas:
+                # finalizar() trata as próprias falhas (a carga descarta o snapshot)
+                pendentes.remove(etapa)
+                inicio_finalizacao = time.perf_counter()
+                etapa.finalizar()
+                self._metrica(etapa.nome)['segundos'] += time.perf_counter() - inicio_finalizacao
+        except BaseException:
+            # Inclusive Ctrl+C: conexões fechadas e snapshot da carga descartado
+            for etapa in pendentes:
+                try:
+                    etapa.abortar()
+                except Exception as erro:
+                    print(f"⚠️  Falha ao abortar a etapa {etapa.nome}: {erro}")
+            raise
+
+        return origem, [etapa.nome for etapa in self.etapas[:inicio]]
+
+    def _metrica(self, nome):
+        for metrica in self.metricas:
+            if metrica['etapa'] == nome:
+                return metrica
+        metrica = {'etapa': nome, 'lotes': 0, 'entrada': 0, 'saida': 0, 'segundos': 0.0}
+        self.metricas.append(metrica)
+        return metrica
+
+    def _medir(self, nome, lotes, etapa=None):
+        """Gerador que aplica a etapa (ou só repassa a leitura) medindo tempo e linhas"""
+        metrica = self._metrica(nome)
+        iterador = iter(lotes)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                lote = next(iterador)
+            except StopIteration:
+                return
+            if etapa is None:
+                metrica['segundos'] += time.perf_counter() - inicio
+                entrada = len(lote)
+            else:
+                entrada = len(lote)
+                inicio = time.perf_counter()
+                lote = etapa.processar(lote)
+                metrica['segundos'] += time.perf_counter() - inicio
+            metrica['lotes'] += 1
+            metrica['entrada'] += entrada
+            metrica['saida'] += len(lote)
+            yield lote
+
+    def _pasta(self, impressao_etapa):
+        return os.path.join(self.pasta_checkpoints, impressao_etapa)
+
+    def _checkpoint_completo(self, impressao_etapa):
+        return os.path.exists(os.path.join(self._pasta(impressao_etapa), '_completo'))
+
+    def _gravar_checkpoint(self, impressao_etapa, lotes):
+        """Grava cada lote em Parquet (via DuckDB) e marca o checkpoint como completo ao final"""
+        pasta = self._pasta(impressao_etapa)
+        shutil.rmtree(pasta, ignore_errors=True)
+        os.makedirs(pasta)
+        bd = duckdb.connect()
+        try:
+            for numero, lote in enumerate(lotes):
+                bd.register('lote_checkpoint', lote)
+                destino = os.path.join(pasta, f'lote_{numero:06d}.parquet').replace("'", "''")
+                bd.execute(f"COPY lote_checkpoint TO '{destino}' (FORMAT parquet)")
+                bd.unregister('lote_checkpoint')
+                yield lote
+        finally:
+            bd.close()
+        open(os.path.join(pasta, '_completo'), 'w').close()
+
+    def _ler_checkpoint(self, impressao_etapa):
+        bd = duckdb.connect()
+        try:
+            for arquivo in sorted(glob.glob(os.path.join(self._pasta(impressao_etapa), 'lote_*.parquet'))):
+                yield bd.execute("SELECT * FROM read_parquet(?)", [arquivo]).df()
+        finally:
+            bd.close()
+
+
+def impressao_arquivo(caminho):
+    """sha256 do conteúdo do arquivo, lido em blocos"""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def executar_pipeline(caminho_csv, caminho_bd, tamanho_lote, backend, threads, taxa, desde, pasta_checkpoints):
+    print("=" * 80)
+    print("🏭 PIPELINE DE ETL - CSV ORIGINAL → DUCKDB")
+    print("=" * 80)
+
+    if not os.path.exists(caminho_csv):
+        print(f"\n❌ ERRO: Arquivo CSV não encontrado em {caminho_csv}")
+        return
+
+    carga = CarregarDuckDB(caminho_bd)
+    pipeline = Pipeline([
+        TraduzirCabecalhos(),
+        TraduzirDados(),
+        TraduzirDescricoes(backend, threads, taxa),
+        RemoverDuplicatas(),
+        ClassificarParteCorpo(),
+        carga,
+    ], pasta_checkpoints, tamanho_lote)
+
+    print(f"\n📁 Entrada: {caminho_csv}")
+    print(f"📁 Banco DuckDB: {caminho_bd}")
+    inicio = time.perf_counter()
+    origem, reaproveitadas = pipeline.executar(caminho_csv, desde)
+    duracao = time.perf_counter() - inicio
+
+    if reaproveitadas:
+        print(f"\n♻️  Retomado do {origem} (etapas reaproveitadas: {', '.join(reaproveitadas)})")
+
+    print(f"\n📊 ETAPAS:")
+    print(f"   {'Etapa':14} {'Lotes':>6} {'Entrada':>10} {'Saída':>10} {'Tempo':>9}")
+    for metrica in pipeline.metricas:
+        print(f"   {metrica['etapa']:14} {metrica['lotes']:6} {metrica['entrada']:10,} "
+              f"{metrica['saida']:10,} {metrica['segundos']:8.2f}s")
+    print(f"   {'total':14} {'':6} {'':10} {'':10} {duracao:8.2f}s")
+
+    resultado = carga.resultado
+    print(f"\n📥 CARGA:")
+    if resultado.get('rebuilt') and 'updated' not in resultado:
+        print(f"   • Tabela recriada com {resultado['inserted']} acidentes")
+    else:
+        print(f"   • Novos: {resultado['inserted']} | Alterados: {resultado['updated']} | "
+              f"Inalterados: {resultado['unchanged']} | Removidos: {resultado['deleted']}")
+    if resultado['versao']:
+        print(f"   🏷️  Snapshot publicado, nova versão dos dados: {resultado['versao']}")
+    else:
+        print(f"   ℹ️  Nenhuma alteração, snapshot e versão dos dados mantidos")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pipeline de ETL: CSV original -> banco DuckDB")
+    parser.add_argument('--csv', required=True, help='CSV original (cabeçalhos e valores em inglês)')
+    parser.add_argument('--banco', default='acidentes.duckdb')
+    parser.add_argument('--lote', type=int, default=50_000, help='Linhas por lote')
+    parser.add_argument('--backend', choices=sorted(BACKENDS) + ['nenhum'], default='google',
+                        help="Tradução das descrições ('nenhum' mantém o texto)")
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--taxa', type=float, default=5.0, help='Requisições de tradução por segundo')
+    parser.add_argument('--desde', choices=['cabecalhos', 'dados', 'descricoes', 'duplicatas',
+                                            'parte_corpo', 'carga'],
+                        help='Refaz a partir desta etapa, ignorando checkpoints dela em diante')
+    parser.add_argument('--checkpoints', default='data/pipeline')
+    args = parser.parse_args()
+
+    executar_pipeline(args.csv, args.banco, args.lote, args.backend, args.threads, args.taxa,
+                      args.desde, args.checkpoints)
@@ -3,93 +3,154 @@
 Script para remover duplicatas do CSV de acidentes
 Remove linhas completamente duplicadas (mesma data, local, descrição, etc.)
 Mantém apenas a primeira ocorrência de cada acidente
+
+Também aponta quase duplicatas: acidentes da mesma Data e Estado com
+descrições muito parecidas (MinHash/LSH de app/duplicatas.py), que só são
+removidos com --remover-quase.
+
+Com --incremental, só os acidentes cujo id ainda não está na tabela
+acidentes são conferidos, contra as linhas do banco e entre si; os ids dos
+que ficam não são renumerados.
+
+Uso:
+    python scripts/remover_duplicatas.py [--csv arquivo.csv] [--limiar 0.8] [--remover-quase]
+                                         [--incremental] [--banco acidentes.duckdb]
 """
+import argparse
+import os
+import sys
+
+import duckdb
 import pandas as pd
-from datetime import datetime
 
-def remover_duplicatas():
-    csv_path = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
-    backup_path = f'data/backup_antes_remover_duplicatas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backups import guardar_backup
+from app.duplicatas import LIMIAR_SIMILARIDADE, DetectorDuplicatas, linhas_existentes
+from app.esquema import ARQUIVO_CSV, tabela_existe
+from app.snapshots import arquivo_ativo
+
+
+def carregar_banco(caminho_bd, df, detector):
+    """Indexa as linhas do banco nos escopos do CSV e retorna só os acidentes novos"""
+    bd = duckdb.connect(arquivo_ativo(caminho_bd), read_only=True)
+    try:
+        if not tabela_existe(bd):
+            print(f"   ⚠️  Banco sem a tabela acidentes, conferindo o CSV inteiro")
+            return df, pd.DataFrame(columns=df.columns)
+        ids = {linha[0] for linha in bd.execute("SELECT id FROM acidentes").fetchall()}
+        novos = df[~df['id'].isin(ids)]
+        existentes = linhas_existentes(bd, novos)
+    finally:
+        bd.close()
+
+    detector.indexar(existentes)
+    return novos, existentes
+
+
+def remover_duplicatas(csv_path=ARQUIVO_CSV, limiar=LIMIAR_SIMILARIDADE, remover_quase=False,
+                       incremental=False, caminho_bd='acidentes.duckdb'):
     print("=" * 80)
     print("🧹 REMOÇÃO DE DUPLICATAS DO CSV")
     print("=" * 80)
-    
+
     # Ler o CSV
     print("\n📖 Lendo arquivo CSV...")
     df = pd.read_csv(csv_path)
-    
+
     print(f"   Total de linhas: {len(df)}")
-    
-    # Fazer backup
-    print(f"\n💾 Criando backup em: {backup_path}")
-    df.to_csv(backup_path, index=False)
-    
-    # Identificar duplicatas (todas as colunas exceto 'id')
-    colunas_comparacao = [col for col in df.columns if col != 'id']
-    
-    # Encontrar duplicatas
-    duplicatas_antes = df[df.duplicated(subset=colunas_comparacao, keep=False)]
-    
+
+    detector = DetectorDuplicatas(limiar=limiar)
+    conferir = df
+    if incremental:
+        print(f"\n🗄️  Lendo acidentes já carregados de {caminho_bd}...")
+        conferir, existentes = carregar_banco(caminho_bd, df, detector)
+        print(f"   Acidentes novos no CSV: {len(conferir)}")
+        print(f"   Acidentes do banco nos mesmos escopos (Data, Estado): {len(existentes)}")
+        referencia = pd.concat([existentes, df], ignore_index=True).drop_duplicates('id')
+    else:
+        referencia = df
+
+    # Um único passe: duplicatas exatas por hash e quase duplicatas por MinHash/LSH
+    duplicatas = detector.verificar(conferir)
+    exatas = duplicatas[duplicatas['tipo'] == 'exata']
+    quase = duplicatas[duplicatas['tipo'] == 'quase']
+
     print(f"\n🔍 DUPLICATAS ENCONTRADAS:")
-    print(f"   • Linhas duplicadas: {len(duplicatas_antes)}")
-    print(f"   • Grupos de duplicatas: {len(duplicatas_antes) // 2 if len(duplicatas_antes) > 0 else 0}")
-    
-    if len(duplicatas_antes) > 0:
-        # Mostrar detalhes das duplicatas
-        print(f"\n📋 DETALHES DOS GRUPOS DUPLICADOS:")
-        
-        grupos_vistos = set()
-        contador = 0
-        
-        for idx, row in duplicatas_antes.sort_values(by=colunas_comparacao).iterrows():
-            chave = tuple(row[col] for col in colunas_comparacao)
-            
-            if chave not in grupos_vistos:
-                grupos_vistos.add(chave)
-                contador += 1
-                
-                linhas_grupo = df[
-                    (df[colunas_comparacao] == row[colunas_comparacao]).all(axis=1)
-                ]
-                
-                print(f"\n   Grupo {contador}:")
-                print(f"      IDs: {', '.join(map(str, linhas_grupo['id'].values))}")
-                print(f"      Data: {row['Data']}")
-                print(f"      Local: {row['Countries']} - {row['Local']}")
-                print(f"      Descrição: {row['Description'][:80]}...")
-        
-        # Remover duplicatas mantendo a primeira ocorrência
-        print(f"\n🧹 Removendo duplicatas...")
-        df_limpo = df.drop_duplicates(subset=colunas_comparacao, keep='first')
-        
+    print(f"   • Linhas duplicadas (exatas): {len(exatas)}")
+    print(f"   • Grupos de duplicatas: {exatas['original'].nunique()}")
+    print(f"   • Quase duplicatas (similaridade ≥ {limiar:.0%}): {len(quase)}")
+
+    if len(duplicatas) == 0:
+        print("\n✅ Nenhuma duplicata encontrada!")
+        print("   O arquivo já está limpo.")
+        return df
+
+    # Mostrar detalhes das duplicatas
+    linhas_por_id = referencia.set_index('id')
+    for titulo, encontradas in (("DETALHES DOS GRUPOS DUPLICADOS", exatas), ("DETALHES DAS QUASE DUPLICATAS", quase)):
+        if len(encontradas) == 0:
+            continue
+        print(f"\n📋 {titulo}:")
+        for contador, (original, grupo) in enumerate(encontradas.groupby('original', sort=False), start=1):
+            row = linhas_por_id.loc[original]
+            print(f"\n   Grupo {contador}:")
+            print(f"      IDs: {', '.join(map(str, [original, *grupo['chave']]))}")
+            if encontradas is quase:
+                print(f"      Similaridade: {', '.join(f'{valor:.0%}' for valor in grupo['similaridade'])}")
+            print(f"      Data: {row['Data']}")
+            print(f"      Local: {row['Pais']} - {row['Estado']}")
+            print(f"      Descrição: {row['Descricao'][:80]}...")
+
+    removidas = exatas if not remover_quase else duplicatas
+    if len(removidas) == 0:
+        print("\nℹ️  Nenhuma duplicata exata; use --remover-quase para remover as quase duplicatas.")
+        return df
+
+    # Fazer backup (só os blocos que mudaram desde a última versão são gravados)
+    backup = guardar_backup(csv_path, 'antes_remover_duplicatas')
+    print(f"\n💾 Backup guardado: versão {backup['versao']} ({backup['bytesGravados'] / 1024:.1f} KB novos)")
+
+    # Remover duplicatas mantendo a primeira ocorrência
+    print(f"\n🧹 Removendo duplicatas...")
+    df_limpo = df[~df['id'].isin(removidas['chave'])]
+
+    if not incremental:
         # Reorganizar IDs sequencialmente
         print(f"   Reorganizando IDs sequencialmente...")
         df_limpo = df_limpo.reset_index(drop=True)
         df_limpo['id'] = df_limpo.index
-        
-        # Salvar CSV limpo
-        print(f"\n💾 Salvando CSV limpo...")
-        df_limpo.to_csv(csv_path, index=False)
-        
-        print("\n" + "=" * 80)
-        print("✅ DUPLICATAS REMOVIDAS COM SUCESSO!")
-        print("=" * 80)
-        print(f"\n📊 RESULTADO:")
-        print(f"   • Linhas antes: {len(df)}")
-        print(f"   • Linhas depois: {len(df_limpo)}")
-        print(f"   • Linhas removidas: {len(df) - len(df_limpo)}")
-        print(f"   • Redução: {((len(df) - len(df_limpo)) / len(df) * 100):.1f}%")
-        
-        print(f"\n📁 ARQUIVOS:")
-        print(f"   • Backup: {backup_path}")
-        print(f"   • CSV Limpo: {csv_path}")
-        
-        return df_limpo
-    else:
-        print("\n✅ Nenhuma duplicata encontrada!")
-        print("   O arquivo já está limpo.")
-        return df
+
+    # Salvar CSV limpo
+    print(f"\n💾 Salvando CSV limpo...")
+    df_limpo.to_csv(csv_path, index=False)
+
+    print("\n" + "=" * 80)
+    print("✅ DUPLICATAS REMOVIDAS COM SUCESSO!")
+    print("=" * 80)
+    print(f"\n📊 RESULTADO:")
+    print(f"   • Linhas antes: {len(df)}")
+    print(f"   • Linhas depois: {len(df_limpo)}")
+    print(f"   • Linhas removidas: {len(df) - len(df_limpo)}")
+    print(f"   • Redução: {((len(df) - len(df_limpo)) / len(df) * 100):.1f}%")
+
+    print(f"\n📁 ARQUIVOS:")
+    print(f"   • Backup: versão {backup['versao']} (python scripts/backups.py restaurar {backup['versao']})")
+    print(f"   • CSV Limpo: {csv_path}")
+
+    return df_limpo
+
 
 if __name__ == '__main__':
-    remover_duplicatas()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default=ARQUIVO_CSV)
+    parser.add_argument('--limiar', type=float, default=LIMIAR_SIMILARIDADE,
+                        help='Similaridade de Jaccard mínima entre descrições para uma quase duplicata')
+    parser.add_argument('--remover-quase', action='store_true',
+                        help='Remove também as quase duplicatas (por padrão só são listadas)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Confere só os acidentes que ainda não estão no banco')
+    parser.add_argument('--banco', default='acidentes.duckdb')
+    args = parser.parse_args()
+
+    remover_duplicatas(args.csv, args.limiar, args.remover_quase, args.incremental, args.banco)
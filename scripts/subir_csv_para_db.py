@@ -1,26 +1,56 @@
 """
 Script para importar dados do CSV para o banco DuckDB
-Utiliza o comando COPY nativo do DuckDB para importação eficiente
+Recria a tabela acidentes no layout de app/esquema.py (ENUM, ordem por Data, coluna Mes)
+
+A tabela é gravada em um snapshot novo, validado e publicado com a troca
+atômica do ponteiro de app/snapshots.py (como em atualizar_banco_duckdb.py):
+a aplicação pode continuar no ar e passa a servir o snapshot novo.
 """
+import os
+import sys
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.esquema import ARQUIVO_CSV, carregar_acidentes, origem_csv
+from app.snapshots import coletar_snapshots, descartar_snapshot, novo_snapshot, publicar_snapshot
 
-def subir_csv_para_db(db):
+
+def subir_csv_para_db(caminho_bd='acidentes.duckdb', caminho_csv=ARQUIVO_CSV):
     """
-    Importa dados do CSV para a tabela acidentes no banco DuckDB
+    Importa dados do CSV para a tabela acidentes de um snapshot novo do banco
     
     Args:
-        db: Conexão ativa com o banco de dados DuckDB
+        caminho_bd: Banco DuckDB servido pela aplicação
+        caminho_csv: CSV de acidentes
     
     Returns:
         None (imprime contagem de registros importados)
     """
-    # Executar importação do CSV usando COPY do DuckDB
-    # DELIMITER: especifica vírgula como separador
-    # HEADER: indica que primeira linha contém nomes das colunas
-    # NULL 'NA': trata string 'NA' como valor NULL
-    result = db.execute("""
-        COPY acidentes FROM 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv' 
-            (DELIMITER ',', HEADER, NULL 'NA');
-                """)
+    # O CSV é lido com read_csv (NULL 'NA') e gravado em ordem de Data
+    snapshot = novo_snapshot(caminho_bd)
+    db = duckdb.connect(snapshot)
+    try:
+        total = carregar_acidentes(db, origem_csv(caminho_csv))
+    except Exception:
+        db.close()
+        descartar_snapshot(snapshot)
+        raise
+    db.close()
+    
+    # Validar e publicar; a versão dos dados é renovada (invalida caches da aplicação)
+    try:
+        versao = publicar_snapshot(caminho_bd, snapshot)
+    except Exception:
+        descartar_snapshot(snapshot)
+        raise
+    coletar_snapshots(caminho_bd)
     
     # Imprimir contagem total de registros importados
-    print(db.execute("SELECT COUNT(*) FROM acidentes").fetchall())
\ No newline at end of file
+    print(f'{total} registros importados')
+    print(f'Snapshot ativo: {snapshot} (versão dos dados {versao})')
+
+
+if __name__ == '__main__':
+    subir_csv_para_db()
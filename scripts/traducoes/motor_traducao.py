@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Motor de tradução em lote com memória de tradução, concorrência e retomada
+
+- Backends plugáveis (BackendTraducao): Google Translate via deep-translator
+  e um backend local determinístico, sem rede, para testes e ensaios;
+- memória de tradução em disco (JSONL), indexada pelo sha256 do texto de
+  origem: textos já traduzidos nunca voltam ao backend;
+- textos repetidos são enviados uma única vez;
+- os textos pendentes vão em lotes, traduzidos por um pool de threads sob
+  um limitador de taxa (token bucket), com novas tentativas e backoff
+  exponencial;
+- cada lote concluído é gravado na memória na hora, então uma execução
+  interrompida recomeça de onde parou.
+"""
+import abc
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+# ==================== BACKENDS ====================
+
+class BackendTraducao(abc.ABC):
+    """
+    Interface dos backends de tradução
+
+    Subclasses implementam traduzir_lote, que recebe uma lista de textos e
+    retorna as traduções na mesma ordem (ou levanta exceção para o lote
+    inteiro, que será tentado de novo).
+    """
+
+    nome = 'base'
+    tamanho_lote = 20           # Textos por requisição
+    max_caracteres_lote = 4500  # Limite de caracteres por requisição
+
+    def __init__(self, origem='en', destino='pt'):
+        self.origem = origem
+        self.destino = destino
+
+    @abc.abstractmethod
+    def traduzir_lote(self, textos):
+        """Traduz uma lista de textos, retornando as traduções na mesma ordem"""
+
+
+class BackendGoogle(BackendTraducao):
+    """Google Translate gratuito via deep-translator"""
+
+    nome = 'google'
+    # O endpoint gratuito traduz um texto por requisição (translate_batch do
+    # deep-translator só itera); lotes de 1 fazem o limitador contar requisições reais
+    tamanho_lote = 1
+
+    def __init__(self, origem='en', destino='pt'):
+        super().__init__(origem, destino)
+        from deep_translator import GoogleTranslator
+        self._classe = GoogleTranslator
+        self._local = threading.local()
+
+    def _tradutor(self):
+        """
+        GoogleTranslator da thread atual
+
+        translate() grava o texto nos parâmetros da instância antes de
+        enviar a requisição; uma instância compartilhada entre as threads do
+        motor poderia enviar o texto de outra chamada e trocar as traduções.
+        """
+        tradutor = getattr(self._local, 'tradutor', None)
+        if tradutor is None:
+            tradutor = self._local.tradutor = self._classe(source=self.origem, target=self.destino)
+        return tradutor
+
+    def traduzir_lote(self, textos):
+        tradutor = self._tradutor()
+        return [tradutor.translate(texto) for texto in textos]
+
+
+class BackendLocal(BackendTraducao):
+    """
+    Backend determinístico sem rede, para testes
+
+    "Traduz" marcando o texto com o idioma de destino. Opcionalmente simula
+    latência por requisição e uma fração de falhas, para exercitar a
+    concorrência e as novas tentativas do motor.
+    """
+
+    nome = 'local'
+
+    def __init__(self, origem='en', destino='pt', latencia=0.0, taxa_falhas=0.0, semente=None):
+        super().__init__(origem, destino)
+        self.latencia = latencia
+        self.taxa_falhas = taxa_falhas
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+        self.requisicoes = 0
+
+    def traduzir_lote(self, textos):
+        with self._trava:
+            self.requisicoes += 1
+            falhar = self._aleatorio.random() < self.taxa_falhas
+        if self.latencia:
+            time.sleep(self.latencia)
+        if falhar:
+            raise ConnectionError('Falha simulada do backend local')
+        return [f'[{self.destino}] {texto}' for texto in textos]
+
+
+BACKENDS = {
+    BackendGoogle.nome: BackendGoogle,
+    BackendLocal.nome: BackendLocal,
+}
+
+
+# ==================== MEMÓRIA DE TRADUÇÃO ====================
+
+def chave_texto(texto):
+    """Chave de um texto na memória de tradução (sha256 do texto de origem)"""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class MemoriaTraducao:
+    """
+    Memória de tradução persistente em um arquivo JSONL
+
+    Cada linha é {"chave", "origem", "traducao"}. O arquivo só recebe
+    acréscimos (com flush e fsync por lote), então uma interrupção perde no
+    máximo a última linha, que é ignorada na leitura seguinte.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._traducoes = {}
+        self.linhas_invalidas = 0
+
+        if caminho and os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                        self._traducoes[registro['chave']] = registro['traducao']
+                    except (ValueError, KeyError):
+                        self.linhas_invalidas += 1
+
+    def __len__(self):
+        return len(self._traducoes)
+
+    def obter(self, texto):
+        """Tradução guardada para o texto (None se ainda não traduzido)"""
+        return self._traducoes.get(chave_texto(texto))
+
+    def guardar(self, pares):
+        """Grava uma lista de (texto, tradução) na memória e no disco"""
+        registros = [{'chave': chave_texto(texto), 'origem': texto, 'traducao': traducao}
+                     for texto, traducao in pares]
+        with self._trava:
+            for registro in registros:
+                self._traducoes[registro['chave']] = registro['traducao']
+            if not self.caminho:
+                return
+            os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def caminho_memoria_padrao(backend, pasta='data/traducoes'):
+    """Uma memória por backend e par de idiomas: data/traducoes/memoria_google_en-pt.jsonl"""
+    return os.path.join(pasta, f'memoria_{backend.nome}_{backend.origem}-{backend.destino}.jsonl')
+
+
+# ==================== LIMITADOR DE TAXA ====================
+
+class LimitadorTaxa:
+    """
+    Token bucket: até `taxa` requisições por segundo, com rajadas de até
+    `rajada` requisições. Compartilhado pelas threads do motor.
+    """
+
+    def __init__(self, taxa=5.0, rajada=5):
+        self.taxa = taxa
+        self.rajada = rajada
+        self._fichas = float(rajada)
+        self._atualizado_em = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia até haver uma ficha disponível e a consome"""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(self.rajada, self._fichas + (agora - self._atualizado_em) * self.taxa)
+                self._atualizado_em = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.taxa
+            time.sleep(espera)
+
+
+# ==================== MOTOR ====================
+
+class MotorTraducao:
+    """
+    Traduz listas de textos com memória, deduplicação, lotes e concorrência
+
+    Textos vazios ou não-texto (NaN, None) são devolvidos como vieram. Um
+    lote que falha em todas as tentativas mantém os textos originais (como
+    o script antigo fazia) e não entra na memória, então é tentado de novo
+    na próxima execução.
+    """
+
+    def __init__(self, backend, memoria=None, threads=4, limitador=None,
+                 tentativas=5, espera_inicial=1.0, espera_maxima=30.0):
+        self.backend = backend
+        self.memoria = memoria if memoria is not None else MemoriaTraducao(None)
+        self.threads = threads
+        self.limitador = limitador or LimitadorTaxa()
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self.erros = []
+        self.estatisticas = {}
+        self._trava = threading.Lock()
+
+    def traduzir(self, textos, progresso=None):
+        """
+        Retorna a lista de traduções, na ordem de `textos`
+
+        progresso(concluidos, total) é chamado a cada lote terminado, com
+        a contagem de textos únicos pendentes.
+        """
+        textos = list(textos)
+        validos = [texto for texto in textos if isinstance(texto, str) and texto.strip()]
+        unicos = list(dict.fromkeys(validos))
+        pendentes = [texto for texto in unicos if self.memoria.obter(texto) is None]
+        lotes = self._montar_lotes(pendentes)
+
+        self.erros = []
+        self.estatisticas = {
+            'textos': len(textos),
+            'unicos': len(unicos),
+            'daMemoria': len(unicos) - len(pendentes),
+            'pendentes': len(pendentes),
+            'lotes': len(lotes),
+            'traduzidos': 0,
+            'falhas': 0,
+            'novasTentativas': 0,
+        }
+
+        concluidos = 0
+        if lotes:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                futuros = {executor.submit(self._traduzir_com_retentativas, lote): lote for lote in lotes}
+                for futuro in as_completed(futuros):
+                    lote = futuros[futuro]
+                    try:
+                        traducoes = futuro.result()
+                    except Exception as erro:
+                        self.erros.append({'textos': len(lote), 'erro': str(erro)})
+                        self.estatisticas['falhas'] += len(lote)
+                    else:
+                        self.memoria.guardar(zip(lote, traducoes))
+                        self.estatisticas['traduzidos'] += len(lote)
+                    concluidos += len(lote)
+                    if progresso:
+                        progresso(concluidos, len(pendentes))
+
+        return [self._resultado(texto) for texto in textos]
+
+    def _resultado(self, texto):
+        """Tradução de um texto de entrada (o próprio texto se não houver)"""
+        if not isinstance(texto, str) or not texto.strip():
+            return texto
+        traducao = self.memoria.obter(texto)
+        return texto if traducao is None else traducao
+
+    def _montar_lotes(self, textos):
+        """Agrupa os textos respeitando o tamanho e o limite de caracteres do backend"""
+        lotes, atual, caracteres = [], [], 0
+        for texto in textos:
+            if atual and (len(atual) >= self.backend.tamanho_lote
+                          or caracteres + len(texto) > self.backend.max_caracteres_lote):
+                lotes.append(atual)
+                atual, caracteres = [], 0
+            atual.append(texto)
+            caracteres += len(texto)
+        if atual:
+            lotes.append(atual)
+        return lotes
+
+    def _traduzir_com_retentativas(self, lote):
+        """Traduz um lote sob o limitador, com backoff exponencial e jitter entre tentativas"""
+        for tentativa in range(self.tentativas):
+            self.limitador.aguardar()
+            try:
+                traducoes = self.backend.traduzir_lote(lote)
+                if len(traducoes) != len(lote):
+                    raise ValueError(f'Backend retornou {len(traducoes)} traduções para {len(lote)} textos')
+                return traducoes
+            except Exception:
+                if tentativa == self.tentativas - 1:
+                    raise
+                with self._trava:
+                    self.estatisticas['novasTentativas'] += 1
+                espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+                time.sleep(espera * random.uniform(0.5, 1.5))
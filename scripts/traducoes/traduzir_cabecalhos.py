@@ -2,12 +2,32 @@
 """
 Script para traduzir os cabeçalhos (nomes das colunas) do CSV para português BR
 """
+import os
+import sys
+
 import pandas as pd
-from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.backups import guardar_backup
+
+# Mapeamento de cabeçalhos inglês → português
+CABECALHOS = {
+    'id': 'id',  # Mantém id como está
+    'Data': 'Data',  # Data já está em português
+    'Countries': 'Pais',
+    'Local': 'Estado',
+    'Industry Sector': 'Setor_Industrial',
+    'Accident Level': 'Nivel_Acidente',
+    'Potential Accident Level': 'Nivel_Acidente_Potencial',
+    'Genre': 'Genero',
+    'c': 'Tipo_Trabalhador',
+    'Critical Risk': 'Risco_Critico',
+    'Description': 'Descricao'
+}
 
 def traduzir_cabecalhos():
     csv_path = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
-    backup_path = f'data/backup_antes_traducao_cabecalhos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
     
     print("=" * 80)
     print("📝 TRADUÇÃO DOS CABEÇALHOS DO CSV PARA PORTUGUÊS BR")
@@ -21,29 +41,14 @@ def traduzir_cabecalhos():
     for i, col in enumerate(df.columns, 1):
         print(f"   {i}. {col}")
     
-    # Fazer backup
-    print(f"\n💾 Criando backup em: {backup_path}")
-    df.to_csv(backup_path, index=False)
-    
-    # Mapeamento de cabeçalhos inglês → português
-    cabecalhos_map = {
-        'id': 'id',  # Mantém id como está
-        'Data': 'Data',  # Data já está em português
-        'Countries': 'Pais',
-        'Local': 'Estado',
-        'Industry Sector': 'Setor_Industrial',
-        'Accident Level': 'Nivel_Acidente',
-        'Potential Accident Level': 'Nivel_Acidente_Potencial',
-        'Genre': 'Genero',
-        'c': 'Tipo_Trabalhador',
-        'Critical Risk': 'Risco_Critico',
-        'Description': 'Descricao'
-    }
+    # Fazer backup (só os blocos que mudaram desde a última versão são gravados)
+    backup = guardar_backup(csv_path, 'antes_traducao_cabecalhos')
+    print(f"\n💾 Backup guardado: versão {backup['versao']} ({backup['bytesGravados'] / 1024:.1f} KB novos)")
     
     print(f"\n🔄 TRADUZINDO CABEÇALHOS:")
     print(f"   (mantendo formato adequado para banco de dados)\n")
     
-    for old_name, new_name in cabecalhos_map.items():
+    for old_name, new_name in CABECALHOS.items():
         if old_name in df.columns:
             if old_name != new_name:
                 print(f"   {old_name:30s} → {new_name}")
@@ -51,7 +56,7 @@ def traduzir_cabecalhos():
                 print(f"   {old_name:30s} (mantido)")
     
     # Renomear colunas
-    df.rename(columns=cabecalhos_map, inplace=True)
+    df.rename(columns=CABECALHOS, inplace=True)
     
     # Salvar CSV com cabeçalhos traduzidos
     print(f"\n💾 Salvando CSV com cabeçalhos traduzidos...")
@@ -66,7 +71,7 @@ def traduzir_cabecalhos():
     print("=" * 80)
     
     print(f"\n📁 ARQUIVOS:")
-    print(f"   • Backup: {backup_path}")
+    print(f"   • Backup: versão {backup['versao']} (python scripts/backups.py restaurar {backup['versao']})")
     print(f"   • CSV Atualizado: {csv_path}")
     
     print(f"\n⚠️  IMPORTANTE:")
@@ -1,18 +1,32 @@
 #!/usr/bin/env python3
 """
 Script para traduzir as descrições de acidentes de inglês para português BR
-Usa a biblioteca deep-translator (Google Translate gratuito)
+Usa o motor_traducao.py (por padrão com Google Translate gratuito via
+deep-translator): memória de tradução em disco, textos repetidos traduzidos
+uma vez, requisições concorrentes sob limite de taxa e retomada de
+execuções interrompidas
+
+Uso:
+    python scripts/traducoes/traduzir_descricoes.py [--backend google|local] [--threads 4]
+                                                    [--taxa 5] [--memoria arquivo.jsonl]
 """
+import argparse
 import pandas as pd
 import time
-from deep_translator import GoogleTranslator
-from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.backups import guardar_backup
+
+from motor_traducao import (BACKENDS, LimitadorTaxa, MemoriaTraducao, MotorTraducao,
+                            caminho_memoria_padrao)
 
-def traduzir_descricoes():
+CSV_PATH = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
+
+def traduzir_descricoes(csv_path=CSV_PATH, backend='google', threads=4, taxa=5.0, memoria=None):
     # Configurações
-    csv_path = 'data/IHMStefanini_industrial_safety_and_health_database_with_accidents_description.csv'
-    backup_path = f'data/backup_antes_traducao_descricoes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
     
     print("=" * 80)
     print("🌍 TRADUÇÃO AUTOMÁTICA DAS DESCRIÇÕES - INGLÊS → PORTUGUÊS BR")
@@ -22,48 +36,30 @@ def traduzir_descricoes():
     print("\n📖 Lendo arquivo CSV...")
     df = pd.read_csv(csv_path)
     
-    # Fazer backup
-    print(f"💾 Criando backup em: {backup_path}")
-    df.to_csv(backup_path, index=False)
+    # Fazer backup (só os blocos que mudaram desde a última versão são gravados)
+    backup = guardar_backup(csv_path, 'antes_traducao_descricoes')
+    print(f"💾 Backup guardado: versão {backup['versao']} ({backup['bytesGravados'] / 1024:.1f} KB novos)")
     
-    # Inicializar tradutor
-    translator = GoogleTranslator(source='en', target='pt')
+    # Inicializar o motor de tradução (a memória guarda cada lote assim que
+    # ele termina; rodar de novo após uma interrupção só traduz o que faltou)
+    tradutor = BACKENDS[backend]('en', 'pt')
+    memoria = MemoriaTraducao(memoria or caminho_memoria_padrao(tradutor))
+    motor = MotorTraducao(tradutor, memoria, threads=threads, limitador=LimitadorTaxa(taxa, rajada=threads))
     
     # Estatísticas
     total = len(df)
     print(f"\n📊 Total de descrições: {total}")
     print(f"📝 Caracteres totais: {df['Description'].str.len().sum():,}")
-    print(f"\n⏳ Iniciando tradução... (pode levar alguns minutos)")
-    print(f"💡 Dica: Adiciono delay entre traduções para evitar rate limit\n")
-    
-    # Traduzir cada descrição
-    traducoes = []
-    erros = []
+    print(f"🧠 Memória de tradução: {memoria.caminho} ({len(memoria)} textos)")
+    print(f"\n⏳ Iniciando tradução ({backend}, {threads} threads, até {taxa:g} requisições/s)...\n")
     
-    for idx, row in df.iterrows():
-        try:
-            # Mostrar progresso
-            if idx % 10 == 0:
-                progresso = (idx / total) * 100
-                print(f"   [{idx}/{total}] - {progresso:.1f}% concluído...", end='\r')
-            
-            # Traduzir
-            texto_original = row['Description']
-            texto_traduzido = translator.translate(texto_original)
-            traducoes.append(texto_traduzido)
-            
-            # Pequeno delay para evitar rate limit (50ms)
-            time.sleep(0.05)
-            
-        except Exception as e:
-            print(f"\n⚠️  Erro na linha {idx}: {str(e)}")
-            erros.append({'linha': idx, 'erro': str(e)})
-            # Em caso de erro, manter o texto original
-            traducoes.append(row['Description'])
-            time.sleep(1)  # Delay maior em caso de erro
+    def mostrar_progresso(concluidos, pendentes):
+        print(f"   [{concluidos}/{pendentes}] - {concluidos / pendentes * 100:.1f}% concluído...", end='\r')
     
-    # Atualizar DataFrame
-    df['Description'] = traducoes
+    inicio = time.perf_counter()
+    df['Description'] = motor.traduzir(df['Description'], progresso=mostrar_progresso)
+    duracao = time.perf_counter() - inicio
+    estatisticas = motor.estatisticas
     
     # Salvar arquivo traduzido
     print(f"\n\n💾 Salvando arquivo traduzido...")
@@ -74,20 +70,24 @@ def traduzir_descricoes():
     print("✅ TRADUÇÃO CONCLUÍDA!")
     print("=" * 80)
     print(f"\n📊 ESTATÍSTICAS:")
-    print(f"   ✅ Traduções bem-sucedidas: {total - len(erros)}")
-    print(f"   ❌ Erros: {len(erros)}")
-    print(f"   📈 Taxa de sucesso: {((total - len(erros)) / total * 100):.1f}%")
+    print(f"   📝 Descrições únicas: {estatisticas['unicos']} de {estatisticas['textos']}")
+    print(f"   🧠 Já estavam na memória: {estatisticas['daMemoria']}")
+    print(f"   ✅ Traduções bem-sucedidas: {estatisticas['traduzidos']} em {estatisticas['lotes']} lotes ({duracao:.1f}s)")
+    print(f"   🔁 Novas tentativas: {estatisticas['novasTentativas']}")
+    print(f"   ❌ Erros (texto original mantido): {estatisticas['falhas']}")
     
+    erros = motor.erros
     if erros:
-        print(f"\n⚠️  ERROS ENCONTRADOS:")
+        print(f"\n⚠️  ERROS ENCONTRADOS (rode de novo para tentar só o que faltou):")
         for erro in erros[:5]:  # Mostrar apenas os 5 primeiros
-            print(f"   • Linha {erro['linha']}: {erro['erro']}")
+            print(f"   • Lote com {erro['textos']} textos: {erro['erro']}")
         if len(erros) > 5:
             print(f"   ... e mais {len(erros) - 5} erros")
     
     print(f"\n📁 ARQUIVOS:")
-    print(f"   • Original (backup): {backup_path}")
+    print(f"   • Original (backup): versão {backup['versao']} (python scripts/backups.py restaurar {backup['versao']})")
     print(f"   • Traduzido: {csv_path}")
+    print(f"   • Memória de tradução: {memoria.caminho}")
     
     print(f"\n🔍 PRÓXIMOS PASSOS:")
     print(f"   1. Revisar algumas descrições traduzidas")
@@ -104,8 +104,17 @@ def traduzir_descricoes():
     return df
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Traduz as descrições do CSV de inglês para português BR")
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='google',
+                        help="'local' não usa a rede (testes)")
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--taxa', type=float, default=5.0, help='Requisições por segundo')
+    parser.add_argument('--memoria', help='Arquivo JSONL da memória de tradução')
+    args = parser.parse_args()
+    
     try:
-        traduzir_descricoes()
+        traduzir_descricoes(args.csv, args.backend, args.threads, args.taxa, args.memoria)
     except KeyboardInterrupt:
         print("\n\n⚠️  Tradução interrompida pelo usuário!")
     except Exception as e:
@@ -31,10 +31,12 @@ const estado = {
   incidentes: {
     dados: [],              // Array com os dados dos incidentes
     pagina: 1,              // Página atual
+    cursor: null,           // Cursor da próxima página (paginação keyset)
     porPagina: 20,          // Quantidade de itens por página
     temMais: true,          // Indica se há mais dados para carregar
     consultaBusca: '',      // Texto de busca
-    estaCarregando: false   // Flag de loading
+    estaCarregando: false,  // Flag de loading
+    controlador: null       // AbortController da requisição em andamento
   }
 };
 
@@ -222,63 +224,82 @@ function alternarFiltroGenero(genero) {
 
 /**
  * Atualiza todo o dashboard com base nos filtros atuais
- * Faz requisições ao backend para buscar dados filtrados
+ * Faz uma única requisição ao endpoint agregado (/api/dashboard/bundle),
+ * que devolve todos os painéis calculados a partir do mesmo conjunto filtrado
  * Atualiza: cards de estatísticas, gráficos, mapa de calor e lista de incidentes
  */
 async function atualizarDashboard() {
   // Construir query string com filtros atuais
   const stringConsulta = construirStringConsultaFiltros();
   
+  // Filtros novos cancelam a requisição em andamento (pacote anterior ou
+  // página do scroll infinito), em vez de serem ignorados
+  const controlador = iniciarRequisicaoIncidentes();
+  
   try {
+    let parametroBusca = '';
+    if (estado.incidentes.consultaBusca) {
+      parametroBusca = `&search=${encodeURIComponent(estado.incidentes.consultaBusca)}`;
+    }
+    
+    const resposta = await fetch(`/api/dashboard/bundle?${stringConsulta}&perPage=${estado.incidentes.porPagina}${parametroBusca}`,
+                                 { signal: controlador.signal });
+    if (!resposta.ok) throw new Error('Erro ao buscar dados do dashboard');
+    
+    const pacote = await resposta.json();
+    if (controlador.signal.aborted) return;
+    
     // Atualizar cards de estatísticas (gênero, países, período)
-    await atualizarCardsFiltro(stringConsulta);
+    renderizarCardsFiltro(pacote.stats);
     
     // Atualizar todos os gráficos (mensal, setores, localização)
-    await atualizarTodosGraficos(stringConsulta);
+    renderizarGraficoMensal(pacote.monthly);
+    renderizarGraficoPotencial(pacote.sectors);
+    renderizarGraficoLocalizacao(pacote.locations);
+    atualizarDropdownFiltroPais();
     
     // Atualizar mapa de calor do corpo humano
-    await atualizarMapaCorpo(stringConsulta);
+    renderizarMapaCorpo(pacote.heatmap);
     
     // Atualizar lista de incidentes (com reset para página 1)
-    await atualizarListaIncidentes(stringConsulta);
+    estado.incidentes.pagina = 1;
+    renderizarListaIncidentes(pacote.accidents, pacote.nextCursor, true);
   } catch (erro) {
-    console.error('Erro ao atualizar dashboard:', erro);
+    if (erro.name !== 'AbortError') console.error('Erro ao atualizar dashboard:', erro);
+  } finally {
+    finalizarRequisicaoIncidentes(controlador);
   }
 }
 
-async function atualizarCardsFiltro(stringConsulta) {
-  try {
-    const resposta = await fetch(`/api/dashboard/stats?${stringConsulta}`);
-    if (!resposta.ok) throw new Error('Erro ao buscar estatísticas');
-    
-    const dados = await resposta.json();
-    
-    // Debug logging
-    console.log('📊 Dados recebidos do backend:', dados);
-    console.log(`Total: ${dados.total}, Mulheres: ${dados.women.count}, Homens: ${dados.men.count}`);
-    
-    document.getElementById('womenCount').textContent = dados.women.count;
-    document.getElementById('womenPercent').textContent = `${dados.women.percent}%`;
-    
-    document.getElementById('menCount').textContent = dados.men.count;
-    document.getElementById('menPercent').textContent = `${dados.men.percent}%`;
-    
-    document.getElementById('countriesCount').textContent = dados.countriesCount;
-    document.getElementById('countriesNames').textContent = estado.filtros.paises.join(', ');
-    
-    // Calcular dias do período
-    if (dados.dateRange.start && dados.dateRange.end) {
-      const inicio = new Date(dados.dateRange.start);
-      const fim = new Date(dados.dateRange.end);
-      const diferencaDias = Math.ceil((fim - inicio) / (1000 * 60 * 60 * 24));
-      document.getElementById('periodDays').textContent = `${diferencaDias} dias`;
-      
-      const mesInicio = inicio.toLocaleDateString('pt-BR', { month: 'short', year: 'numeric' });
-      const mesFim = fim.toLocaleDateString('pt-BR', { month: 'short', year: 'numeric' });
-      document.getElementById('periodRange').textContent = `${mesInicio} - ${mesFim}`;
-    }
-  } catch (erro) {
-    console.error('Erro ao atualizar cards de filtro:', erro);
+/**
+ * Preenche os cards de filtro (gênero, países e período) com as estatísticas recebidas
+ * 
+ * @param {Object} dados - Resposta de /api/dashboard/stats
+ */
+function renderizarCardsFiltro(dados) {
+  // Debug logging
+  console.log('📊 Dados recebidos do backend:', dados);
+  console.log(`Total: ${dados.total}, Mulheres: ${dados.women.count}, Homens: ${dados.men.count}`);
+  
+  document.getElementById('womenCount').textContent = dados.women.count;
+  document.getElementById('womenPercent').textContent = `${dados.women.percent}%`;
+  
+  document.getElementById('menCount').textContent = dados.men.count;
+  document.getElementById('menPercent').textContent = `${dados.men.percent}%`;
+  
+  document.getElementById('countriesCount').textContent = dados.countriesCount;
+  document.getElementById('countriesNames').textContent = estado.filtros.paises.join(', ');
+  
+  // Calcular dias do período
+  if (dados.dateRange.start && dados.dateRange.end) {
+    const inicio = new Date(dados.dateRange.start);
+    const fim = new Date(dados.dateRange.end);
+    const diferencaDias = Math.ceil((fim - inicio) / (1000 * 60 * 60 * 24));
+    document.getElementById('periodDays').textContent = `${diferencaDias} dias`;
+    
+    const mesInicio = inicio.toLocaleDateString('pt-BR', { month: 'short', year: 'numeric' });
+    const mesFim = fim.toLocaleDateString('pt-BR', { month: 'short', year: 'numeric' });
+    document.getElementById('periodRange').textContent = `${mesInicio} - ${mesFim}`;
   }
 }
 
@@ -467,13 +488,6 @@ function criarGraficoAcidentesPorLocal() {
   });
 }
 
-async function atualizarTodosGraficos(stringConsulta) {
-  await atualizarGraficoMensal('all', stringConsulta);
-  await atualizarGraficoPotencial(stringConsulta);
-  await atualizarGraficoLocalizacao('all', stringConsulta);
-  atualizarDropdownFiltroPais();
-}
-
 function atualizarDropdownFiltroPais() {
   const dropdown = document.getElementById('countryFilter');
   const htmlOpcoes = '<option value="all">Todos os países</option>' +
@@ -490,44 +504,35 @@ async function atualizarGraficoMensal(intervalo, stringConsulta = null) {
     const resposta = await fetch(`/api/charts/monthly?${stringConsulta}&range=${intervalo}`);
     if (!resposta.ok) throw new Error('Erro ao buscar dados mensais');
     
-    const dados = await resposta.json();
-    
-    estado.graficos.graficoMensal.data.labels = dados.labels;
-    estado.graficos.graficoMensal.data.datasets[0].data = dados.data;
-    estado.graficos.graficoMensal.update();
+    renderizarGraficoMensal(await resposta.json());
   } catch (erro) {
     console.error('Erro ao atualizar gráfico mensal:', erro);
   }
 }
 
-async function atualizarGraficoPotencial(stringConsulta = null) {
-  if (!stringConsulta) stringConsulta = construirStringConsultaFiltros();
+function renderizarGraficoMensal(dados) {
+  estado.graficos.graficoMensal.data.labels = dados.labels;
+  estado.graficos.graficoMensal.data.datasets[0].data = dados.data;
+  estado.graficos.graficoMensal.update();
+}
+
+function renderizarGraficoPotencial(dados) {
+  estado.graficos.graficoPotencial.data.labels = dados.labels;
+  estado.graficos.graficoPotencial.data.datasets[0].data = dados.data;
+  estado.graficos.graficoPotencial.update();
   
-  try {
-    const resposta = await fetch(`/api/charts/sectors?${stringConsulta}`);
-    if (!resposta.ok) throw new Error('Erro ao buscar dados de setores');
-    
-    const dados = await resposta.json();
-    
-    estado.graficos.graficoPotencial.data.labels = dados.labels;
-    estado.graficos.graficoPotencial.data.datasets[0].data = dados.data;
-    estado.graficos.graficoPotencial.update();
-    
-    // Atualizar legenda
-    const htmlLegenda = dados.labels.map((rotulo, indice) => {
-      const cores = ['#FF0000', '#4F46E5', '#10B981'];
-      return `
-        <div class="legend-item">
-          <span class="legend-color" style="background: ${cores[indice]};"></span>
-          <span>${rotulo} (${dados.data[indice]})</span>
-        </div>
-      `;
-    }).join('');
-    
-    document.getElementById('potentialLegend').innerHTML = htmlLegenda;
-  } catch (erro) {
-    console.error('Erro ao atualizar gráfico de setores:', erro);
-  }
+  // Atualizar legenda
+  const htmlLegenda = dados.labels.map((rotulo, indice) => {
+    const cores = ['#FF0000', '#4F46E5', '#10B981'];
+    return `
+      <div class="legend-item">
+        <span class="legend-color" style="background: ${cores[indice]};"></span>
+        <span>${rotulo} (${dados.data[indice]})</span>
+      </div>
+    `;
+  }).join('');
+  
+  document.getElementById('potentialLegend').innerHTML = htmlLegenda;
 }
 
 async function atualizarGraficoLocalizacao(filtroPais, stringConsulta = null) {
@@ -537,16 +542,18 @@ async function atualizarGraficoLocalizacao(filtroPais, stringConsulta = null) {
     const resposta = await fetch(`/api/charts/locations?${stringConsulta}&filterCountry=${filtroPais}`);
     if (!resposta.ok) throw new Error('Erro ao buscar dados de localização');
     
-    const dados = await resposta.json();
-    
-    estado.graficos.graficoLocalizacao.data.labels = dados.labels;
-    estado.graficos.graficoLocalizacao.data.datasets[0].data = dados.data;
-    estado.graficos.graficoLocalizacao.update();
+    renderizarGraficoLocalizacao(await resposta.json());
   } catch (erro) {
     console.error('Erro ao atualizar gráfico de localização:', erro);
   }
 }
 
+function renderizarGraficoLocalizacao(dados) {
+  estado.graficos.graficoLocalizacao.data.labels = dados.labels;
+  estado.graficos.graficoLocalizacao.data.datasets[0].data = dados.data;
+  estado.graficos.graficoLocalizacao.update();
+}
+
 // ==================== MAPA DE CALOR DO CORPO ====================
 
 /**
@@ -554,17 +561,10 @@ async function atualizarGraficoLocalizacao(filtroPais, stringConsulta = null) {
  * Mostra quais partes do corpo foram mais afetadas
  * Usa escala de cores para representar intensidade (amarelo → laranja → vermelho)
  * 
- * @param {string} stringConsulta - Query string com filtros (opcional)
+ * @param {Object} result - Resposta de /api/heatmap/bodyparts
  */
-async function atualizarMapaCorpo(stringConsulta = null) {
-  if (!stringConsulta) stringConsulta = construirStringConsultaFiltros();
-  
+function renderizarMapaCorpo(result) {
   try {
-    // Buscar dados do mapa de calor da API
-    const response = await fetch(`/api/heatmap/bodyparts?${stringConsulta}`);
-    if (!response.ok) throw new Error('Erro ao buscar dados do mapa de calor');
-    
-    const result = await response.json();
     const data = result.bodyParts || result;
     console.log('Dados do heatmap recebidos no dashboard:', data);
     
@@ -704,63 +704,102 @@ function configurarTooltipsMapaCorpo() {
  */
 async function atualizarListaIncidentes(stringConsulta = null, resetarLista = true) {
   if (!stringConsulta) stringConsulta = construirStringConsultaFiltros();
-  // Prevenir múltiplas requisições simultâneas
-  if (estado.incidentes.estaCarregando) return;
+  // Páginas do scroll infinito esperam a requisição em andamento; uma lista
+  // nova (busca ou filtros) a cancela e a substitui
+  if (estado.incidentes.estaCarregando && !resetarLista) return;
   
   // Resetar estado se necessário (nova busca ou novos filtros)
   if (resetarLista) {
     estado.incidentes.pagina = 1;
+    estado.incidentes.cursor = null;
     estado.incidentes.dados = [];
     estado.incidentes.temMais = true;
   }
   
+  const controlador = iniciarRequisicaoIncidentes();
+  
   try {
-    estado.incidentes.estaCarregando = true;
-    document.getElementById('incidentsLoading').style.display = 'block';
-    
     // Adicionar query de busca
     let parametroBusca = '';
     if (estado.incidentes.consultaBusca) {
       parametroBusca = `&search=${encodeURIComponent(estado.incidentes.consultaBusca)}`;
     }
     
-    const resposta = await fetch(`/api/accidents/filtered?${stringConsulta}&page=${estado.incidentes.pagina}&perPage=${estado.incidentes.porPagina}${parametroBusca}`);
+    // Paginação por cursor: cada página continua a partir do último incidente carregado
+    const cursor = encodeURIComponent(estado.incidentes.cursor || '');
+    const resposta = await fetch(`/api/accidents/filtered?${stringConsulta}&cursor=${cursor}&perPage=${estado.incidentes.porPagina}${parametroBusca}`,
+                                 { signal: controlador.signal });
     if (!resposta.ok) throw new Error('Erro ao buscar lista de incidentes');
     
-    const incidentes = await resposta.json();
-    
-    // Adicionar novos incidentes ao estado
-    estado.incidentes.dados = resetarLista ? incidentes : [...estado.incidentes.dados, ...incidentes];
-    estado.incidentes.temMais = incidentes.length === estado.incidentes.porPagina;
-    
-    const containerLista = document.getElementById('incidentsList');
-    const htmlLista = estado.incidentes.dados.map(incidente => `
-      <div class="incident-item" data-id="${incidente.id}">
-        <div class="incident-item-header">
-          <span class="incident-id">Acidente #${String(incidente.id).padStart(3, '0')} Nível ${incidente.accidentLevel}</span>
-          <span class="incident-date">${new Date(incidente.date).toLocaleDateString('pt-BR')}</span>
-        </div>
-        <div class="incident-location">${incidente.local} - ${incidente.country}</div>
+    const pagina = await resposta.json();
+    if (controlador.signal.aborted) return;
+    renderizarListaIncidentes(pagina.accidents, pagina.nextCursor, resetarLista);
+  } catch (erro) {
+    if (erro.name !== 'AbortError') console.error('Erro ao atualizar lista de incidentes:', erro);
+  } finally {
+    finalizarRequisicaoIncidentes(controlador);
+  }
+}
+
+/**
+ * Cancela a requisição da lista em andamento e marca o início de uma nova
+ * 
+ * @returns {AbortController} Controlador da nova requisição
+ */
+function iniciarRequisicaoIncidentes() {
+  if (estado.incidentes.controlador) estado.incidentes.controlador.abort();
+  estado.incidentes.controlador = new AbortController();
+  estado.incidentes.estaCarregando = true;
+  document.getElementById('incidentsLoading').style.display = 'block';
+  return estado.incidentes.controlador;
+}
+
+/**
+ * Marca o fim de uma requisição da lista; uma requisição já substituída por
+ * outra não altera o estado de carregamento da nova
+ * 
+ * @param {AbortController} controlador - Controlador retornado por iniciarRequisicaoIncidentes
+ */
+function finalizarRequisicaoIncidentes(controlador) {
+  if (estado.incidentes.controlador !== controlador) return;
+  estado.incidentes.controlador = null;
+  estado.incidentes.estaCarregando = false;
+  document.getElementById('incidentsLoading').style.display = 'none';
+}
+
+/**
+ * Adiciona uma página de incidentes ao estado e redesenha a lista
+ * 
+ * @param {Array} incidentes - Incidentes da página recebida
+ * @param {string|null} proximoCursor - Cursor da próxima página (null quando não há mais)
+ * @param {boolean} resetarLista - Se true, substitui os incidentes já carregados
+ */
+function renderizarListaIncidentes(incidentes, proximoCursor, resetarLista) {
+  // Adicionar novos incidentes ao estado
+  estado.incidentes.dados = resetarLista ? incidentes : [...estado.incidentes.dados, ...incidentes];
+  estado.incidentes.cursor = proximoCursor;
+  estado.incidentes.temMais = proximoCursor !== null;
+  
+  const containerLista = document.getElementById('incidentsList');
+  const htmlLista = estado.incidentes.dados.map(incidente => `
+    <div class="incident-item" data-id="${incidente.id}">
+      <div class="incident-item-header">
+        <span class="incident-id">Acidente #${String(incidente.id).padStart(3, '0')} Nível ${incidente.accidentLevel}</span>
+        <span class="incident-date">${new Date(incidente.date).toLocaleDateString('pt-BR')}</span>
       </div>
-    `).join('');
+      <div class="incident-location">${incidente.local} - ${incidente.country}</div>
+    </div>
+  `).join('');
 
-    containerLista.innerHTML = htmlLista;
+  containerLista.innerHTML = htmlLista;
 
-    // Adicionar listeners de clique
-    document.querySelectorAll('.incident-item').forEach(item => {
-      item.addEventListener('click', () => {
-        const id = parseInt(item.getAttribute('data-id'));
-        abrirModalIncidente(id, estado.incidentes.dados);
-      });
+  // Adicionar listeners de clique
+  document.querySelectorAll('.incident-item').forEach(item => {
+    item.addEventListener('click', () => {
+      const id = parseInt(item.getAttribute('data-id'));
+      abrirModalIncidente(id, estado.incidentes.dados);
     });
-    
-    estado.incidentes.estaCarregando = false;
-    document.getElementById('incidentsLoading').style.display = 'none';
-  } catch (erro) {
-    console.error('Erro ao atualizar lista de incidentes:', erro);
-    estado.incidentes.estaCarregando = false;
-    document.getElementById('incidentsLoading').style.display = 'none';
-  }
+  });
 }
 
 /**